@@ -8,6 +8,8 @@
 #  - Exposes a simple dataclass `Capabilities` and two entry points:
 #       compute_capabilities(require_party_move=True)  -> Capabilities
 #       refresh_capabilities(require_party_move=True)  -> Capabilities (and caches)
+#  - For the route planner: `traversal_tokens(caps)` ("SURF", "BADGE3",
+#    "MACH_BIKE", ...) and `read_event_flag(flag_id)` for story gates.
 #  - Designed to be robust across forks: all external calls are wrapped
 #    and have fallbacks.
 #
@@ -25,6 +27,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Iterable, Optional, Set
 
+from .log import DEBUG, get_logger
+
 # ---------- Optional debug toggle ----------
 DEBUG_CAPS = False  # flip True for verbose one-line prints
 
@@ -91,17 +95,14 @@ _CAPS_CACHE: Optional[Capabilities] = None
 
 
 # ---------- Small util: safe debug print ----------
+_LOG = get_logger("caps")
+
+
 def _dbg(msg: str) -> None:
     if DEBUG_CAPS:
-        try:
-            from modules.context import context
-            lg = getattr(context, "logger", None) or getattr(context, "log", None)
-            if lg and hasattr(lg, "info"):
-                lg.info(msg)
-                return
-        except Exception:
-            pass
-        print(msg)
+        _LOG.info("%s", msg)
+    else:
+        _LOG.debug("%s", msg)
 
 
 # ---------- Bag / save helpers (defensive across forks) ----------
@@ -213,6 +214,23 @@ def _read_badges() -> Set[int]:
     return set()
 
 
+def read_event_flag(flag_id: int) -> Optional[bool]:
+    """Event flag by number (e.g. 2145 = FLAG_SYS_POKEDEX_GET in Emerald); None if unreadable."""
+    try:
+        from modules.memory import get_event_flag_by_number  # type: ignore
+        return bool(get_event_flag_by_number(int(flag_id)))
+    except Exception:
+        pass
+    sd = _get_save_data()
+    get_flag = getattr(sd, "get_event_flag", None) if sd else None
+    if callable(get_flag):
+        try:
+            return bool(get_flag(int(flag_id)))
+        except Exception:
+            pass
+    return None
+
+
 # ---------- Party move checks using _asserts (preferred) ----------
 def _party_knows_any_move(move_names: Iterable[str]) -> bool:
     """
@@ -354,7 +372,7 @@ def compute_capabilities(require_party_move: bool = True) -> Capabilities:
         can_waterfall=can_waterfall,
     )
 
-    _dbg(
+    if DEBUG_CAPS or _LOG.is_enabled(DEBUG): _dbg(
         f"[Caps] badges={sorted(caps.badges)} "
         f"rods=({caps.has_old_rod},{caps.has_good_rod},{caps.has_super_rod}) "
         f"bikes=({caps.has_mach_bike},{caps.has_acro_bike}) "
@@ -408,3 +426,29 @@ def get_current_capabilities(ctx=None, require_party_move: bool = True) -> Set[s
         tokens.add("ROCK_SMASH")
 
     return tokens
+
+
+def traversal_tokens(caps: Optional[Capabilities] = None) -> Set[str]:
+    """
+    Tokens the route planner matches edge requirements against: HM moves the
+    party can use ("CUT", "SURF", ...), "BADGE1".."BADGE8", "MACH_BIKE",
+    "ACRO_BIKE", "OLD_ROD"/"GOOD_ROD"/"SUPER_ROD" and "ROD". Uses the cached
+    snapshot (or computes one) when *caps* is None.
+    """
+    if caps is None:
+        caps = get_cached_capabilities()
+        if caps is None:
+            try:
+                caps = refresh_capabilities()
+            except Exception:
+                return set()
+
+    tokens: Set[str] = {f"BADGE{i}" for i in caps.badges}
+    for key in HM_NAMES:
+        if getattr(caps, f"can_{key}", False):
+            tokens.add(key.upper())
+    for attr, tok in (("has_old_rod", "OLD_ROD"), ("has_good_rod", "GOOD_ROD"), ("has_super_rod", "SUPER_ROD"),
+                      ("has_any_rod", "ROD"), ("has_mach_bike", "MACH_BIKE"), ("has_acro_bike", "ACRO_BIKE")):
+        if getattr(caps, attr, False):
+            tokens.add(tok)
+    return tokens
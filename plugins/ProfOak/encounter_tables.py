@@ -0,0 +1,270 @@
+# plugins/ProfOak/encounter_tables.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Encounter table snapshots
+#
+# What this does
+#  - Reads the ROM's effective wild encounter tables for the current map ONCE
+#    and freezes them into an `EncounterTableSnapshot`: species per method,
+#    per-slot encounter rates and level ranges. "ROD" lists every rod's
+#    species, but its rates come from one rod's table at a time.
+#  - Keeps recent snapshots in a small LRU keyed by (map group, map number),
+#    so walking back and forth between neighbouring routes never re-reads ROM.
+#  - `StaticWildTable` holds the optional hand-written wild_by_mapmode.json:
+#    parsed once, re-parsed only when its mtime changes (stat'ed at most every
+#    few seconds), stored forward ((map, method) -> species) and inverted
+#    (species -> [(map, method)]) for "where else can I find X" lookups.
+#
+# Entry points
+#       snapshot_for_current_map(map_id)  -> EncounterTableSnapshot | None
+#       clear_snapshot_cache()
+#       StaticWildTable(path).species_for(map, method) / .locations_of(species)
+#
+# Safe to import anywhere; `modules.map` is only imported when a table is read.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import itertools
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+# How many maps to keep in memory (a route plus its neighbours fits easily)
+SNAPSHOT_CACHE_SIZE = 16
+
+# How often StaticWildTable may stat() its file to notice edits
+STATIC_STAT_INTERVAL_S = 2.0
+
+# Canonical method -> attribute(s) on `regular_encounters`
+METHOD_TABLES: Dict[str, Tuple[str, ...]] = {
+    "GRASS": ("land_encounters",),
+    "SURF": ("surf_encounters",),
+    "ROCK_SMASH": ("rock_smash_encounters",),
+    "ROD": ("old_rod_encounters", "good_rod_encounters", "super_rod_encounters"),
+}
+
+# Each rod fishes its own table; weakest first
+ROD_TABLES: Dict[str, str] = {
+    "OLD_ROD": "old_rod_encounters",
+    "GOOD_ROD": "good_rod_encounters",
+    "SUPER_ROD": "super_rod_encounters",
+}
+
+MapId = Tuple[int, int]
+DebugFn = Optional[Callable[[str], None]]
+MapMethod = Tuple[str, str]
+
+
+# ---------- Data model ----------
+@dataclass(frozen=True)
+class EncounterSlot:
+    species: str
+    rate: float
+    min_level: int
+    max_level: int
+
+
+@dataclass(frozen=True)
+class EncounterTableSnapshot:
+    map_id: Optional[MapId]
+    slots: Mapping[str, Tuple[EncounterSlot, ...]]
+    species: Mapping[str, FrozenSet[str]]
+    generation: int = field(default=0, compare=False)   # unique per ROM read; part of memo keys
+
+    def species_for(self, method: str) -> FrozenSet[str]:
+        return self.species.get(method, frozenset())
+
+    def rates_for(self, method: str, rod: Optional[str] = None) -> Dict[str, float]:
+        """
+        Summed slot rate per species for *method* (same units the ROM reports).
+        "ROD" uses the table of *rod* (a ROD_TABLES key), else the best rod
+        this map has a table for; the three tables are never pooled.
+        """
+        if method == "ROD":
+            method = rod if rod in ROD_TABLES else next(
+                (r for r in reversed(list(ROD_TABLES)) if self.slots.get(r)), "SUPER_ROD")
+        out: Dict[str, float] = {}
+        for slot in self.slots.get(method, ()):
+            out[slot.species] = out.get(slot.species, 0.0) + slot.rate
+        return out
+
+    def summary(self) -> Dict[str, List[str]]:
+        """{METHOD: sorted species} for every method bucket."""
+        return {m: sorted(self.species_for(m)) for m in METHOD_TABLES}
+
+
+_GENERATION = itertools.count(1)
+
+# Module-level LRU: (group, number) -> snapshot
+_CACHE: "OrderedDict[MapId, EncounterTableSnapshot]" = OrderedDict()
+
+
+# ---------- Building ----------
+def _norm(name) -> Optional[str]:
+    return name.strip().upper() if isinstance(name, str) and name.strip() else None
+
+
+def _int(v, default: int = 0) -> int:
+    try: return int(v)
+    except Exception: return default
+
+
+def _slots_from(enc_list) -> List[EncounterSlot]:
+    out: List[EncounterSlot] = []
+    for e in enc_list or []:
+        sp = getattr(e, "species", None)
+        nm = _norm(getattr(sp, "name", None) if sp is not None else None)
+        if not nm:
+            continue
+        rate = getattr(e, "encounter_rate", None)
+        if rate is None: rate = getattr(e, "rate", 0)
+        try: rate = float(rate)
+        except Exception: rate = 0.0
+        out.append(EncounterSlot(nm, rate, _int(getattr(e, "min_level", 0)), _int(getattr(e, "max_level", 0))))
+    return out
+
+
+def build_snapshot(regular_encounters, map_id: Optional[MapId] = None) -> EncounterTableSnapshot:
+    """Walk every slot list of `regular_encounters` exactly once."""
+    slots: Dict[str, Tuple[EncounterSlot, ...]] = {}
+    species: Dict[str, FrozenSet[str]] = {}
+    for method, attrs in METHOD_TABLES.items():
+        bucket: List[EncounterSlot] = []
+        for attr in attrs:
+            bucket.extend(_slots_from(getattr(regular_encounters, attr, None)))
+        slots[method] = tuple(bucket)
+        species[method] = frozenset(s.species for s in bucket)
+    for rod, attr in ROD_TABLES.items():
+        slots[rod] = tuple(_slots_from(getattr(regular_encounters, attr, None)))
+    return EncounterTableSnapshot(map_id, MappingProxyType(slots), MappingProxyType(species), next(_GENERATION))
+
+
+def read_current_snapshot(map_id: Optional[MapId] = None, debug: DebugFn = None) -> Optional[EncounterTableSnapshot]:
+    """Read the ROM once for the current map. None means the ROM couldn't be read."""
+    def _dbg(m: str) -> None:
+        if debug: debug(m)
+
+    try:
+        import modules.map as mapmod
+    except Exception as e:
+        _dbg(f"import modules.map failed: {e}"); return None
+
+    eff_fn = getattr(mapmod, "get_effective_encounter_rates_for_current_map", None)
+    if not callable(eff_fn):
+        _dbg("get_effective_encounter_rates_for_current_map unavailable"); return None
+    try:
+        eff = eff_fn()
+    except Exception as e:
+        _dbg(f"effective() raised: {e}"); return None
+    if eff is None:
+        _dbg("effective() is None"); return None
+
+    we = getattr(eff, "regular_encounters", None)
+    if we is None:
+        _dbg("regular_encounters missing"); return None
+    try:
+        return build_snapshot(we, map_id)
+    except Exception as e:
+        _dbg(f"while mapping method tables: {e}"); return None
+
+
+# ---------- Public API ----------
+def snapshot_for_current_map(map_id: Optional[MapId], debug: DebugFn = None) -> Optional[EncounterTableSnapshot]:
+    """
+    Cached snapshot for the current map. `map_id` must be the (group, number)
+    the player is on; without it the ROM is read but nothing is cached.
+    """
+    if map_id is not None:
+        hit = _CACHE.get(map_id)
+        if hit is not None:
+            _CACHE.move_to_end(map_id)
+            return hit
+
+    snap = read_current_snapshot(map_id, debug)
+    if snap is not None and map_id is not None:
+        _CACHE[map_id] = snap
+        while len(_CACHE) > SNAPSHOT_CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return snap
+
+
+def clear_snapshot_cache() -> None:
+    """Forget every snapshot (e.g. after a profile/ROM change)."""
+    _CACHE.clear()
+
+
+# ---------- Static (hand-written) wild tables ----------
+class StaticWildTable:
+    """
+    wild_by_mapmode.json ({MAP: {METHOD: [species]}}) kept in memory.
+    Every query calls `refresh()`, which costs nothing between stat checks.
+    """
+
+    def __init__(self, path: Path, stat_interval: float = STATIC_STAT_INTERVAL_S,
+                 on_error: Optional[Callable[[str], None]] = None) -> None:
+        self.path = path
+        self.stat_interval = stat_interval
+        self._on_error = on_error
+        self._mtime: Optional[float] = None
+        self._next_stat = 0.0
+        self.forward: Dict[MapMethod, FrozenSet[str]] = {}
+        self.inverted: Dict[str, Tuple[MapMethod, ...]] = {}
+        self.generation = 0  # bumped on every (re)load; lets callers drop derived caches
+
+    # ---- queries -------------------------------------------------------------
+    def species_for(self, map_key: str, method: str) -> FrozenSet[str]:
+        self.refresh()
+        return self.forward.get((map_key, method), frozenset())
+
+    def locations_of(self, species: str) -> Tuple[MapMethod, ...]:
+        """Every (map, method) the static table lists *species* for, sorted."""
+        self.refresh()
+        return self.inverted.get(_norm(species) or species, ())
+
+    def __bool__(self) -> bool:
+        self.refresh()
+        return bool(self.forward)
+
+    # ---- loading -------------------------------------------------------------
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if the file changed (or appeared/disappeared). Returns True if reloaded."""
+        now = time.monotonic()
+        if not force and now < self._next_stat:
+            return False
+        self._next_stat = now + self.stat_interval
+        try:
+            mtime: Optional[float] = self.path.stat().st_mtime
+        except OSError:
+            mtime = None
+        if not force and mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        self._load(mtime is not None)
+        return True
+
+    def _load(self, exists: bool) -> None:
+        forward: Dict[MapMethod, FrozenSet[str]] = {}
+        if exists:
+            try:
+                raw = json.loads(self.path.read_text(encoding="utf-8"))
+                for mk, per in (raw.items() if isinstance(raw, dict) else ()):
+                    if not isinstance(per, dict): continue
+                    for meth, lst in per.items():
+                        names = frozenset(n for n in (_norm(x) for x in lst or ()) if n)
+                        if _norm(mk) and _norm(meth) and names:
+                            forward[(_norm(mk), _norm(meth))] = names
+            except Exception as e:
+                if self._on_error:
+                    self._on_error(f"wild-data read failed: {e}")
+                return  # keep the previous tables; retried when the file changes again
+        inverted: Dict[str, List[MapMethod]] = {}
+        for key in sorted(forward):
+            for sp in forward[key]:
+                inverted.setdefault(sp, []).append(key)
+        self.forward = forward
+        self.inverted = {sp: tuple(v) for sp, v in inverted.items()}
+        self.generation += 1
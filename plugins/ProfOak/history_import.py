@@ -0,0 +1,295 @@
+# plugins/ProfOak/history_import.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Seed learned tables from the bot's encounter history
+#
+# What this does
+#  - Streams pokebot-gen3's own encounter history (profiles/<name>/stats.db,
+#    table `encounters`) in fixed-size batches and feeds it to
+#    `ShinyQuotaPlugin.ingest_encounters`, so routes the bot has hunted before
+#    start with their species already learned.
+#  - Columns are discovered with PRAGMA table_info, so older/newer schemas
+#    work as long as they have a species and a map column.
+#  - Unown letters come from the personality value (Gen III formula); no
+#    Pokémon data has to be decoded.
+#  - Without a stats.db, CSV encounter logs under the profile's stats/
+#    folder are read instead (csv.DictReader, one row at a time).
+#  - Remembers the last imported row per database (JSON/history_import.json),
+#    so later runs only read new encounters. The marker is written behind the
+#    learned data it covers (`plugin.after_state_saved`), never ahead of it.
+#
+# Entry points
+#       python -m plugins.ProfOak.history_import PROFILE_DIR [--db stats.db] [--csv a.csv ...]
+#       import_history(plugin, profile_dir)
+#       import_history_steps(...)   same, one chunk per step (ShinyQuota runs it
+#                                   on its frame scheduler after a profile load)
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .persistence import atomic_write_json
+
+FETCH_BATCH = 5000
+INGEST_CHUNK = 2000   # records per import step (~1-2 ms of ingest work)
+STATS_DB_NAME = "stats.db"
+MARKER_PATH = Path(__file__).resolve().parent / "JSON" / "history_import.json"
+
+Record = Tuple[str, Optional[str], str, Optional[str]]   # (map, method, species, Unown letter)
+
+UNOWN_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ!?"
+
+# Candidate column names, most specific first
+_COLS: Dict[str, Tuple[str, ...]] = {
+    "id": ("encounter_id", "id"),
+    "species_id": ("species_id", "species_index"),
+    "species_name": ("species_name", "species", "pokemon"),
+    "map": ("map", "map_name", "location"),
+    "type": ("type", "encounter_type", "method"),
+    "pv": ("personality_value", "pid", "personality"),
+}
+
+
+# ---------- Field helpers ----------
+def unown_letter_from_pv(pv: int) -> str:
+    """Gen III Unown form: 2 low bits of each personality byte, mod 28."""
+    x = ((pv >> 18) & 0xC0) | ((pv >> 12) & 0x30) | ((pv >> 6) & 0x0C) | (pv & 0x03)
+    return UNOWN_LETTERS[x % 28]
+
+
+def method_from_type(t) -> Optional[str]:
+    """Encounter type -> GRASS/SURF/ROD/ROCK_SMASH; None for non-wild types (gift, static, egg...)."""
+    if t is None or t == "":
+        return "GRASS"  # column missing/empty: assume walking encounters
+    n = str(getattr(t, "name", t)).strip().upper()
+    if "SURF" in n or n == "WATER": return "SURF"
+    if "FISH" in n or "ROD" in n: return "ROD"
+    if "ROCK" in n and "SMASH" in n: return "ROCK_SMASH"
+    if "LAND" in n or "GRASS" in n or "WALK" in n: return "GRASS"
+    return None
+
+
+def _norm(name) -> Optional[str]:
+    return name.strip().upper() if isinstance(name, str) and name.strip() else None
+
+
+def _pick(columns: Sequence[str], role: str) -> Optional[str]:
+    lower = {c.lower(): c for c in columns}
+    for cand in _COLS[role]:
+        if cand in lower:
+            return lower[cand]
+    return None
+
+
+def _species_resolver() -> Callable[[Any], Optional[str]]:
+    """Internal species id -> upper-case name, memoized; uses modules.pokemon if available."""
+    try:
+        from modules.pokemon import get_species_by_index  # type: ignore
+    except Exception:
+        get_species_by_index = None
+    cache: Dict[Any, Optional[str]] = {}
+
+    def resolve(sid) -> Optional[str]:
+        try: return cache[sid]
+        except KeyError: pass
+        nm = None
+        if get_species_by_index is not None:
+            try: nm = _norm(getattr(get_species_by_index(int(sid)), "name", None))
+            except Exception: nm = None
+        cache[sid] = nm
+        return nm
+    return resolve
+
+
+def _record(mk, method, sp, pv) -> Optional[Record]:
+    mk = _norm(mk) if isinstance(mk, str) else (f"MAP_{mk}" if isinstance(mk, int) else None)
+    if not mk or not sp or method is None:
+        return None
+    letter = None
+    if sp == "UNOWN" and pv is not None:
+        try: letter = unown_letter_from_pv(int(pv) & 0xFFFFFFFF)
+        except (TypeError, ValueError): letter = None
+    return mk, method, sp, letter
+
+
+# ---------- Sources ----------
+def iter_sqlite_encounters(db_path: Path, after_id: int = 0, batch: int = FETCH_BATCH,
+                           progress: Optional[Dict[str, int]] = None) -> Iterator[Record]:
+    """
+    Stream (map, method, species, letter) from a stats.db, oldest first, in
+    batches of *batch* rows. `progress["last_id"]` tracks the last row read.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cols = [r[1] for r in conn.execute("PRAGMA table_info(encounters)")]
+        if not cols:
+            return
+        c_id = _pick(cols, "id")
+        c_sid, c_name = _pick(cols, "species_id"), _pick(cols, "species_name")
+        c_map, c_type, c_pv = _pick(cols, "map"), _pick(cols, "type"), _pick(cols, "pv")
+        if c_map is None or (c_sid is None and c_name is None):
+            return
+        id_expr = f'"{c_id}"' if c_id else "rowid"
+        sel = [id_expr, f'"{c_map}"', f'"{c_sid or c_name}"',
+               f'"{c_type}"' if c_type else "NULL", f'"{c_pv}"' if c_pv else "NULL"]
+        cur = conn.execute(f"SELECT {', '.join(sel)} FROM encounters WHERE {id_expr} > ? ORDER BY {id_expr}",
+                           (int(after_id),))
+        resolve = _species_resolver() if c_sid else _norm
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                break
+            for rid, mk, sp, typ, pv in rows:
+                rec = _record(mk, method_from_type(typ), resolve(sp), pv)
+                if rec is not None:
+                    yield rec
+            if progress is not None:
+                progress["last_id"] = int(rows[-1][0])
+    finally:
+        conn.close()
+
+
+def iter_csv_encounters(paths: Iterable[Path]) -> Iterator[Record]:
+    """Stream records from CSV encounter logs, one row at a time."""
+    resolve = None
+    for path in paths:
+        try:
+            fh = open(path, "r", encoding="utf-8", newline="")
+        except OSError:
+            continue
+        with fh:
+            reader = csv.DictReader(fh)
+            cols = reader.fieldnames or []
+            c_map, c_type, c_pv = _pick(cols, "map"), _pick(cols, "type"), _pick(cols, "pv")
+            c_name, c_sid = _pick(cols, "species_name"), _pick(cols, "species_id")
+            if c_map is None or (c_name is None and c_sid is None):
+                continue
+            if c_name is None and resolve is None:
+                resolve = _species_resolver()
+            for row in reader:
+                sp = _norm(row.get(c_name)) if c_name else resolve(row.get(c_sid))
+                rec = _record(row.get(c_map), method_from_type(row.get(c_type) if c_type else None),
+                              sp, row.get(c_pv) if c_pv else None)
+                if rec is not None:
+                    yield rec
+
+
+def find_history_sources(profile_dir: Path) -> Tuple[Optional[Path], List[Path]]:
+    db = profile_dir / STATS_DB_NAME
+    if db.is_file():
+        return db, []
+    csvs = sorted((profile_dir / "stats").rglob("*.csv")) if (profile_dir / "stats").is_dir() else []
+    return None, csvs
+
+
+# ---------- Import ----------
+def _read_marker() -> Dict[str, Any]:
+    try:
+        raw = json.loads(MARKER_PATH.read_text(encoding="utf-8"))
+        return raw if isinstance(raw, dict) else {}
+    except Exception:
+        return {}
+
+
+def _write_marker(plugin, marker: Dict[str, Any]) -> None:
+    def write() -> None:
+        try: atomic_write_json(MARKER_PATH, marker)
+        except Exception: pass   # the next run re-reads those rows; ingesting is idempotent
+    after = getattr(plugin, "after_state_saved", None)
+    if callable(after): after(write)
+    else: write()
+
+
+def _ingest_steps(plugin, records: Iterator[Record], chunk: int) -> Generator[None, None, int]:
+    added = 0
+    while True:
+        part = list(itertools.islice(records, chunk))
+        if not part:
+            return added
+        added += plugin.ingest_encounters(part)
+        yield
+
+
+def import_history(plugin, profile_dir: Optional[Path] = None, db_path: Optional[Path] = None,
+                   csv_paths: Sequence[Path] = (), full: bool = False) -> int:
+    """
+    Feed encounter history into *plugin*.ingest_encounters. Databases resume
+    after the last imported row unless *full*; CSV logs are read once per file
+    (by path + size). Returns the number of new learned entries.
+    """
+    steps = import_history_steps(plugin, profile_dir, db_path, csv_paths, full, chunk=0)
+    while True:
+        try: next(steps)
+        except StopIteration as done: return done.value
+
+
+def import_history_steps(plugin, profile_dir: Optional[Path] = None, db_path: Optional[Path] = None,
+                         csv_paths: Sequence[Path] = (), full: bool = False,
+                         chunk: int = INGEST_CHUNK) -> Generator[None, None, int]:
+    """
+    `import_history` as a generator: ingests *chunk* records per step (0: all
+    at once) and returns the count. The marker is queued at the end, behind
+    the ingested data, so an abandoned or unsaved run is simply redone
+    (ingesting is idempotent).
+    """
+    if profile_dir is not None and db_path is None and not csv_paths:
+        db_path, csv_paths = find_history_sources(profile_dir)
+    marker = _read_marker()
+    added = 0
+
+    def ingest(records: Iterator[Record]) -> Generator[None, None, int]:
+        if chunk <= 0:
+            return plugin.ingest_encounters(records)
+        return (yield from _ingest_steps(plugin, records, chunk))
+
+    if db_path is not None:
+        key = str(Path(db_path).resolve())
+        progress = {"last_id": 0 if full else int(marker.get(key, 0) or 0)}
+        added += yield from ingest(iter_sqlite_encounters(Path(db_path), progress["last_id"], progress=progress))
+        marker[key] = progress["last_id"]
+
+    todo = []
+    for p in csv_paths:
+        try: sig = f"{Path(p).resolve()}:{Path(p).stat().st_size}"
+        except OSError: continue
+        if full or not marker.get(sig):
+            todo.append((Path(p), sig))
+    if todo:
+        added += yield from ingest(iter_csv_encounters(p for p, _ in todo))
+        for _, sig in todo:
+            marker[sig] = 1
+
+    if db_path is not None or todo:
+        _write_marker(plugin, marker)
+    return added
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m plugins.ProfOak.history_import",
+                                 description="Seed Prof Oak's learned tables from pokebot-gen3 encounter history.")
+    ap.add_argument("profile_dir", nargs="?", type=Path, help="profiles/<name> (uses its stats.db or stats/*.csv)")
+    ap.add_argument("--db", type=Path, help="explicit stats.db path")
+    ap.add_argument("--csv", type=Path, nargs="*", default=[], help="explicit CSV encounter logs")
+    ap.add_argument("--full", action="store_true", help="re-read everything, ignoring what was imported before")
+    args = ap.parse_args(argv)
+    if args.profile_dir is None and args.db is None and not args.csv:
+        ap.error("give a profile directory, --db or --csv")
+
+    from .shiny_quota import ShinyQuotaPlugin, _STORE  # needs the bot's `modules` on sys.path
+    plugin = ShinyQuotaPlugin()
+    added = import_history(plugin, args.profile_dir, args.db, args.csv, full=args.full)
+    plugin._state.close()
+    _STORE.close()
+    print(f"[ProfOak] Imported encounter history: {added} new learned entries.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
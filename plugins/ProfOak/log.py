@@ -0,0 +1,187 @@
+# plugins/ProfOak/log.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Lazy, level-gated, rate-limited logging
+#
+# What this does
+#  - Resolves the bot's logger (context.logger / context.log, else print)
+#    once, on first use, instead of probing context on every message.
+#  - One `CategoryLogger` per category ("quota", "rom", "nav", ...), each with
+#    its own level. A message below the level costs one int compare: the
+#    format string and its %-args are only combined when it is emitted.
+#  - `lazy(fn)` wraps an expensive argument (e.g. a joined missing list) so
+#    it is only computed if the message is actually written.
+#  - `throttled(key, signature, ...)` drops repeats: a message is written when
+#    its signature changes or once per interval, with a count of the repeats
+#    it swallowed. Used for "Missing (…)" and "Quota met" status lines.
+#
+# Levels come from PROFOAK_LOG_LEVEL (default for every category) and
+# PROFOAK_LOG_LEVELS, e.g. "rom=DEBUG,nav=WARNING". Levels: DEBUG, INFO,
+# WARNING, ERROR, OFF.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+DEBUG, INFO, WARNING, ERROR, OFF = 10, 20, 30, 40, 100
+LEVELS: Dict[str, int] = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "WARN": WARNING, "ERROR": ERROR, "OFF": OFF}
+
+THROTTLE_INTERVAL_S = 30.0   # identical throttled messages are repeated at most this often
+
+
+def _parse_level(value, default: int = INFO) -> int:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        v = value.strip().upper()
+        if v in LEVELS: return LEVELS[v]
+        if v.isdigit(): return int(v)
+    return default
+
+
+def _parse_category_levels(spec: Optional[str]) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            cat, lvl = part.split("=", 1)
+            if cat.strip():
+                out[cat.strip().lower()] = _parse_level(lvl)
+    return out
+
+
+DEFAULT_LEVEL = _parse_level(os.getenv("PROFOAK_LOG_LEVEL"), INFO)
+_CATEGORY_LEVELS: Dict[str, int] = _parse_category_levels(os.getenv("PROFOAK_LOG_LEVELS"))
+
+
+class lazy:
+    """Deferred %-argument: *fn* runs only when the message is formatted."""
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable[[], Any]) -> None:
+        self.fn = fn
+
+    def __str__(self) -> str:
+        return str(self.fn())
+
+
+# ---------- Sink (resolved once) ----------
+_SINK: Optional[Tuple[Callable[[str], None], Callable[[str], None]]] = None
+
+
+def _resolve_sink() -> Tuple[Callable[[str], None], Callable[[str], None]]:
+    info: Callable[[str], None] = print
+    warn: Callable[[str], None] = lambda m: print(f"WARNING: {m}")
+    try:
+        from modules.context import context  # type: ignore
+        lg = getattr(context, "logger", None) or getattr(context, "log", None)
+    except Exception:
+        lg = None
+    if lg is not None:
+        if callable(getattr(lg, "info", None)):
+            info = lg.info
+        for m in ("warning", "warn"):
+            if callable(getattr(lg, m, None)):
+                warn = getattr(lg, m); break
+    return info, warn
+
+
+def reset_sink() -> None:
+    """Re-resolve the logger on next use (e.g. after a profile load replaced it)."""
+    global _SINK
+    _SINK = None
+
+
+def _emit(level: int, text: str) -> None:
+    global _SINK
+    if _SINK is None:
+        _SINK = _resolve_sink()
+    fn = _SINK[1] if level >= WARNING else _SINK[0]
+    try:
+        fn(text)
+    except Exception:
+        print(text)
+
+
+# ---------- Category loggers ----------
+class CategoryLogger:
+    def __init__(self, category: str, prefix: str = "") -> None:
+        self.category = category
+        self.prefix = prefix
+        self.level = _CATEGORY_LEVELS.get(category, DEFAULT_LEVEL)
+        self._last: Dict[Hashable, Tuple[Hashable, float, int]] = {}   # key -> (signature, time, suppressed)
+
+    def is_enabled(self, level: int) -> bool:
+        return level >= self.level
+
+    def log(self, level: int, msg: str, *args: Any) -> None:
+        if level < self.level:
+            return
+        if args:
+            try: msg = msg % args
+            except Exception: msg = " ".join([msg, *map(str, args)])
+        _emit(level, self.prefix + msg)
+
+    def debug(self, msg: str, *args: Any) -> None:
+        if DEBUG >= self.level: self.log(DEBUG, msg, *args)
+
+    def info(self, msg: str, *args: Any) -> None:
+        if INFO >= self.level: self.log(INFO, msg, *args)
+
+    def warning(self, msg: str, *args: Any) -> None:
+        if WARNING >= self.level: self.log(WARNING, msg, *args)
+
+    def error(self, msg: str, *args: Any) -> None:
+        if ERROR >= self.level: self.log(ERROR, msg, *args)
+
+    # ---- rate limiting -------------------------------------------------------
+    def allow(self, key: Hashable, signature: Hashable = None, interval: float = THROTTLE_INTERVAL_S) -> int:
+        """
+        Throttle gate for *key*. Returns 0 to drop the message, otherwise
+        1 + the number of repeats dropped since it was last let through.
+        """
+        now = time.monotonic()
+        last = self._last.get(key)
+        if last is not None and last[0] == signature and now - last[1] < interval:
+            self._last[key] = (last[0], last[1], last[2] + 1)
+            return 0
+        suppressed = last[2] if last is not None and last[0] == signature else 0
+        self._last[key] = (signature, now, 0)
+        return 1 + suppressed
+
+    def throttled(self, level: int, key: Hashable, signature: Hashable, msg: str, *args: Any,
+                  interval: float = THROTTLE_INTERVAL_S) -> None:
+        if level < self.level:
+            return
+        n = self.allow(key, signature, interval)
+        if not n:
+            return
+        if n > 1:
+            msg = f"{msg} (repeated {n - 1}×)"
+        self.log(level, msg, *args)
+
+    def forget(self, key: Optional[Hashable] = None) -> None:
+        """Let the next throttled message for *key* (or all keys) through."""
+        if key is None: self._last.clear()
+        else: self._last.pop(key, None)
+
+
+_LOGGERS: Dict[str, CategoryLogger] = {}
+
+
+def get_logger(category: str, prefix: str = "") -> CategoryLogger:
+    cat = category.lower()
+    lg = _LOGGERS.get(cat)
+    if lg is None:
+        lg = _LOGGERS[cat] = CategoryLogger(cat, prefix)
+    return lg
+
+
+def set_level(category: str, level) -> None:
+    """Change one category's level at runtime (also applies to loggers created later)."""
+    cat = category.lower()
+    lvl = _parse_level(level)
+    _CATEGORY_LEVELS[cat] = lvl
+    if cat in _LOGGERS:
+        _LOGGERS[cat].level = lvl
@@ -0,0 +1,404 @@
+# plugins/ProfOak/nav_graph.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Persistent warp / connection graph
+#
+# What this does
+#  - Every map the player stands on is recorded as a node: its static warps
+#    (door/cave/stair tiles and the map each leads to), its edge connections
+#    (walk off the north edge of Route 101 into Oldale, ...) and the first
+#    tile the player was seen standing on (a known walkable spot to aim at).
+#  - Kept per ROM (game code + revision) in JSON/warp_graph.json, so a
+#    Ruby save never routes through Emerald-only edges.
+#  - `shortest_path(src, dst)` runs Dijkstra over what has been recorded so
+#    far; the navigator takes the next hop from it instead of guessing from
+#    the route order, and only falls back to guessing for unexplored maps.
+#
+#  - `NavGates` (JSON/emerald_nav_gates.json for Emerald) annotates edges and
+#    maps with requirements: capability tokens from capabilities.py ("SURF",
+#    "BADGE3", "MACH_BIKE") and story event flags ("FLAG:2145" set,
+#    "!FLAG:..." clear). Edges the save can't traverse yet are pruned before
+#    planning, so NPC-blocked story gates are never walked into.
+#
+# Dynamic warps (destination 127:127, "back to where you came from") have no
+# static target and are not recorded. Saving goes through the scheduler, so
+# recording on a map change costs one map read and a few dict writes.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import heapq
+import time
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .log import get_logger
+from .persistence import atomic_write_json
+
+MapId = Tuple[int, int]
+Edge = Tuple[MapId, MapId]
+
+JSON_DIR = Path(__file__).resolve().parent / "JSON"
+GRAPH_PATH = JSON_DIR / "warp_graph.json"
+GATE_FILES = {"BPEE": "emerald_nav_gates.json"}   # game code -> gate table
+GATES_STAT_INTERVAL_S = 2.0
+DYNAMIC_MAP: MapId = (127, 127)
+
+WARP = "warp"
+CONNECTION = "connection"
+EDGE_COST = {WARP: 1.0, CONNECTION: 1.0}
+
+_LOG = get_logger("nav", "[Navigator] ")
+
+
+def _key(m: MapId) -> str:
+    return f"{m[0]}:{m[1]}"
+
+
+def _parse_key(s: str) -> Optional[MapId]:
+    try:
+        g, n = s.split(":", 1)
+        return int(g), int(n)
+    except (ValueError, AttributeError):
+        return None
+
+
+def _xy(v) -> Optional[Tuple[int, int]]:
+    if isinstance(v, (tuple, list)) and len(v) == 2:
+        try: return int(v[0]), int(v[1])
+        except (TypeError, ValueError): return None
+    return None
+
+
+def _map_id_of(obj, group_attr: str = "map_group", number_attr: str = "map_number") -> Optional[MapId]:
+    try:
+        g, n = getattr(obj, group_attr, None), getattr(obj, number_attr, None)
+        return (int(g), int(n)) if g is not None and n is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _connection_target(c) -> Optional[MapId]:
+    dest = _map_id_of(c, "destination_map_group", "destination_map_number")
+    if dest is None:
+        dest = _map_id_of(getattr(c, "destination_map", None))
+    return dest
+
+
+def rom_key() -> str:
+    """"BPEE0"-style id of the loaded ROM; "default" when it can't be read."""
+    try:
+        from modules.context import context  # type: ignore
+        rom = getattr(context, "rom", None)
+        code = getattr(rom, "game_code", None) or getattr(rom, "id", None)
+        if code:
+            rev = getattr(rom, "revision", None)
+            return f"{code}{'' if rev is None else rev}"
+    except Exception:
+        pass
+    return "default"
+
+
+class _Node:
+    __slots__ = ("warps", "connections", "entry")
+
+    def __init__(self) -> None:
+        self.warps: Dict[MapId, List[Tuple[int, int]]] = {}   # destination -> warp tiles
+        self.connections: Dict[MapId, str] = {}               # destination -> direction
+        self.entry: Optional[Tuple[int, int]] = None          # first tile seen standing on
+
+
+class WarpGraph:
+    def __init__(self, path: Path = GRAPH_PATH) -> None:
+        self.path = path
+        self._games: Dict[str, Dict[MapId, _Node]] = {}
+        self._loaded = False
+        self._rom: Optional[str] = None
+
+    # ---- persistence -----------------------------------------------------------
+    def _load(self) -> None:
+        self._loaded = True
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            _LOG.warning("could not read %s (%s); starting an empty warp graph", self.path.name, e)
+            return
+        for game, maps in (raw.get("games") or {}).items() if isinstance(raw, dict) else ():
+            nodes = self._games.setdefault(game, {})
+            for mk, d in (maps or {}).items():
+                src = _parse_key(mk)
+                if src is None or not isinstance(d, dict): continue
+                node = nodes[src] = _Node()
+                for dk, tiles in (d.get("warps") or {}).items():
+                    dst = _parse_key(dk)
+                    if dst is not None:
+                        node.warps[dst] = [t for t in (_xy(v) for v in tiles or []) if t]
+                for dk, direction in (d.get("connections") or {}).items():
+                    dst = _parse_key(dk)
+                    if dst is not None:
+                        node.connections[dst] = str(direction)
+                node.entry = _xy(d.get("entry"))
+
+    def to_json(self) -> Dict[str, Any]:
+        games: Dict[str, Any] = {}
+        for game, nodes in self._games.items():
+            games[game] = {
+                _key(src): {
+                    "warps": {_key(d): [list(t) for t in tiles] for d, tiles in node.warps.items()},
+                    "connections": {_key(d): direction for d, direction in node.connections.items()},
+                    **({"entry": list(node.entry)} if node.entry else {}),
+                }
+                for src, node in nodes.items()
+            }
+        return {"version": 1, "games": games}
+
+    def save(self) -> None:
+        try:
+            atomic_write_json(self.path, self.to_json())
+        except Exception as e:
+            _LOG.warning("could not write %s: %s", self.path.name, e)
+
+    def _save_later(self) -> None:
+        from .scheduler import LOW, get_scheduler
+        get_scheduler().submit("warp_graph_save", self.save, LOW)
+
+    # ---- recording -------------------------------------------------------------
+    def _nodes(self) -> Dict[MapId, _Node]:
+        if not self._loaded:
+            self._load()
+        if self._rom is None:
+            self._rom = rom_key()
+        return self._games.setdefault(self._rom, {})
+
+    def reset_rom(self) -> None:
+        """Re-read the ROM id on next use (profile switch)."""
+        self._rom = None
+
+    def record(self, src: MapId, warps: Iterable[Tuple[MapId, Tuple[int, int]]],
+               connections: Iterable[Tuple[MapId, str]], standing: Optional[Tuple[int, int]] = None) -> bool:
+        """Merge one map's outgoing edges; returns True if anything new was learned."""
+        node = self._nodes().setdefault(src, _Node())
+        changed = False
+        for dst, xy in warps:
+            if dst == DYNAMIC_MAP or dst == src: continue
+            tiles = node.warps.setdefault(dst, [])
+            if xy not in tiles:
+                tiles.append(xy); changed = True
+        for dst, direction in connections:
+            if dst != src and node.connections.get(dst) != direction:
+                node.connections[dst] = direction; changed = True
+        if standing is not None and node.entry is None:
+            node.entry = standing; changed = True
+        if changed:
+            self._save_later()
+        return changed
+
+    def record_current(self) -> bool:
+        """Record the map the player is on now (from modules.map). Never raises."""
+        try:
+            from modules.map import get_map_data_for_current_position  # type: ignore
+            loc = get_map_data_for_current_position()
+        except Exception:
+            return False
+        src = _map_id_of(loc) if loc is not None else None
+        if src is None:
+            return False
+        warps: List[Tuple[MapId, Tuple[int, int]]] = []
+        for w in getattr(loc, "warps", None) or []:
+            dst = _map_id_of(w, "destination_map_group", "destination_map_number")
+            xy = _xy(getattr(w, "local_coordinates", None))
+            if dst is not None and xy is not None:
+                warps.append((dst, xy))
+        conns: List[Tuple[MapId, str]] = []
+        for c in getattr(loc, "connections", None) or []:
+            dst = _connection_target(c)
+            if dst is not None:
+                d = getattr(c, "direction", "")
+                conns.append((dst, str(getattr(d, "name", d) or "").lower()))
+        return self.record(src, warps, conns, _xy(getattr(loc, "local_coordinates", None)))
+
+    # ---- queries ---------------------------------------------------------------
+    def sources(self) -> List[MapId]:
+        return list(self._nodes())
+
+    def __contains__(self, m: MapId) -> bool:
+        return m in self._nodes()
+
+    def __len__(self) -> int:
+        return len(self._nodes())
+
+    def edges_from(self, src: MapId) -> List[Tuple[MapId, str]]:
+        node = self._nodes().get(src)
+        if node is None:
+            return []
+        out = [(d, WARP) for d in node.warps]
+        out += [(d, CONNECTION) for d in node.connections if d not in node.warps]
+        return out
+
+    def edge_kind(self, src: MapId, dst: MapId) -> Optional[str]:
+        node = self._nodes().get(src)
+        if node is None: return None
+        if dst in node.warps: return WARP
+        if dst in node.connections: return CONNECTION
+        return None
+
+    def warp_tiles(self, src: MapId, dst: MapId) -> List[Tuple[int, int]]:
+        node = self._nodes().get(src)
+        return list(node.warps.get(dst, ())) if node is not None else []
+
+    def entry_xy(self, m: MapId) -> Optional[Tuple[int, int]]:
+        node = self._nodes().get(m)
+        return node.entry if node is not None else None
+
+    def shortest_path(self, src: MapId, dst: MapId, avoid: FrozenSet[Edge] = frozenset()) -> Optional[List[MapId]]:
+        """Cheapest known map sequence src..dst (Dijkstra), skipping edges in *avoid*; None if unknown."""
+        if src == dst:
+            return [src]
+        dist: Dict[MapId, float] = {src: 0.0}
+        prev: Dict[MapId, MapId] = {}
+        heap: List[Tuple[float, MapId]] = [(0.0, src)]
+        done: Set[MapId] = set()
+        while heap:
+            d, m = heapq.heappop(heap)
+            if m in done: continue
+            if m == dst:
+                path = [m]
+                while m in prev:
+                    m = prev[m]; path.append(m)
+                return path[::-1]
+            done.add(m)
+            for nxt, kind in self.edges_from(m):
+                if (m, nxt) in avoid: continue
+                nd = d + EDGE_COST.get(kind, 1.0)
+                if nd < dist.get(nxt, float("inf")):
+                    dist[nxt] = nd; prev[nxt] = m
+                    heapq.heappush(heap, (nd, nxt))
+        return None
+
+
+_GRAPH: Optional[WarpGraph] = None
+
+
+def get_warp_graph() -> WarpGraph:
+    """The process-wide graph (shared by the quota plugin's map hook and the navigator)."""
+    global _GRAPH
+    if _GRAPH is None:
+        _GRAPH = WarpGraph()
+    return _GRAPH
+
+
+# ---------- Requirements (capability tokens / event flags) ----------
+class NavGates:
+    """
+    Requirement table: {"flags": {name: id}, "edges": [{"from": "g:n", "to": "g:n",
+    "requires": [...], "note": ...}], "maps": [{"map": "g:n", "requires": [...]}]}.
+    A map's requirements apply to every edge into it.
+    """
+
+    def __init__(self, path: Optional[Path]) -> None:
+        self.path = path
+        self.edges: Dict[Edge, Tuple[str, ...]] = {}
+        self.maps: Dict[MapId, Tuple[str, ...]] = {}
+        self.notes: Dict[Any, str] = {}
+        self._flags: Dict[str, int] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False) -> None:
+        """Reload when the file changed (stat at most every GATES_STAT_INTERVAL_S)."""
+        if self.path is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._checked_at < GATES_STAT_INTERVAL_S:
+            return
+        self._checked_at = now
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception as e:
+            _LOG.warning("could not read %s (%s); keeping previous gates", self.path.name, e)
+            return
+        self._mtime = mtime
+        self._flags = {str(k).upper(): int(v) for k, v in (raw.get("flags") or {}).items()}
+        self.edges, self.maps, self.notes = {}, {}, {}
+        for e in raw.get("edges") or []:
+            a, b = _parse_key(e.get("from")), _parse_key(e.get("to"))
+            if a and b:
+                self.edges[(a, b)] = self.edges.get((a, b), ()) + tuple(str(r).upper() for r in e.get("requires") or ())
+                if e.get("note"): self.notes[(a, b)] = str(e["note"])
+        for m in raw.get("maps") or []:
+            k = _parse_key(m.get("map"))
+            if k:
+                self.maps[k] = tuple(str(r).upper() for r in m.get("requires") or ())
+                if m.get("note"): self.notes[k] = str(m["note"])
+
+    # ---- evaluation ------------------------------------------------------------
+    def requirements(self, src: MapId, dst: MapId) -> Tuple[str, ...]:
+        return self.edges.get((src, dst), ()) + self.maps.get(dst, ())
+
+    def unmet(self, reqs: Sequence[str], tokens: Set[str],
+              flag: Callable[[int], Optional[bool]]) -> List[str]:
+        """Requirements in *reqs* the save doesn't meet. Unreadable flags count as met."""
+        out: List[str] = []
+        for r in reqs:
+            neg = r.startswith("!")
+            body = r[1:] if neg else r
+            if body.startswith("FLAG:"):
+                name = body[5:]
+                fid = self._flags.get(name)
+                if fid is None:
+                    try: fid = int(name)
+                    except ValueError: continue
+                v = flag(fid)
+                if v is not None and v == neg:
+                    out.append(r)
+            elif body not in tokens:
+                out.append(r)
+        return out
+
+    def blocked_edges(self, graph: "WarpGraph", tokens: Set[str],
+                      flag: Callable[[int], Optional[bool]]) -> FrozenSet[Edge]:
+        """Every known edge (graph or gate table) whose requirements aren't met right now."""
+        cache = _memo_flags(flag)
+        candidates: Set[Edge] = set(self.edges)
+        if self.maps:
+            for src in graph.sources():
+                for dst, _kind in graph.edges_from(src):
+                    if dst in self.maps: candidates.add((src, dst))
+        return frozenset(e for e in candidates if self.unmet(self.requirements(*e), tokens, cache))
+
+    def map_unmet(self, m: MapId, tokens: Set[str], flag: Callable[[int], Optional[bool]]) -> List[str]:
+        return self.unmet(self.maps.get(m, ()), tokens, flag)
+
+
+def _memo_flags(flag: Callable[[int], Optional[bool]]) -> Callable[[int], Optional[bool]]:
+    seen: Dict[int, Optional[bool]] = {}
+
+    def get(fid: int) -> Optional[bool]:
+        if fid not in seen:
+            seen[fid] = flag(fid)
+        return seen[fid]
+    return get
+
+
+_GATES: Dict[str, NavGates] = {}
+
+
+def get_nav_gates() -> NavGates:
+    """Gate table for the loaded ROM (empty for games without one)."""
+    game = rom_key()[:4]
+    gates = _GATES.get(game)
+    if gates is None:
+        name = GATE_FILES.get(game)
+        gates = _GATES[game] = NavGates(JSON_DIR / name if name else None)
+    else:
+        gates.refresh()
+    return gates
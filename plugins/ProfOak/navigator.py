@@ -5,7 +5,12 @@ import json
 import random
 import re
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .capabilities import read_event_flag, refresh_capabilities, traversal_tokens
+from .log import get_logger
+from .nav_graph import CONNECTION, WARP, Edge, NavGates, WarpGraph, get_nav_gates, get_warp_graph
+from .tile_bitmaps import ScanResult, get_tile_bitmaps, method_class
 
 try:
     from modules.player import (
@@ -23,21 +28,16 @@ except Exception:
         return False
 
 
+_LOG = get_logger("nav", "[Navigator] ")
+
+
+# `ctx` is kept for call-site compatibility; the logger is resolved once by .log
 def _log_info(ctx, msg: str) -> None:
-    lg = getattr(ctx, "logger", None) or getattr(ctx, "log", None)
-    if lg and hasattr(lg, "info"):
-        try: lg.info(msg); return
-        except Exception: pass
-    print(f"[Navigator] {msg}")
+    _LOG.info("%s", msg)
 
 
 def _log_warn(ctx, msg: str) -> None:
-    lg = getattr(ctx, "logger", None) or getattr(ctx, "log", None)
-    for m in ("warning", "warn"):
-        if lg and hasattr(lg, m):
-            try: getattr(lg, m)(msg); return
-            except Exception: pass
-    print(f"WARNING: [Navigator] {msg}")
+    _LOG.warning("%s", msg)
 
 
 def _profoak_dir(ctx) -> Path:
@@ -57,19 +57,6 @@ def _json_dir(ctx) -> Path:
     return base / "JSON"
 
 
-def _load_route_order(ctx) -> List[Dict[str, Any]]:
-    path = _json_dir(ctx) / "emerald_route_order.json"
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-        if not isinstance(data, list):
-            raise ValueError("route order json root must be a list")
-        _log_info(ctx, f"loaded route order with {len(data)} entries from {path}")
-        return data
-    except Exception as e:
-        _log_warn(ctx, f"could not load route order ({e}); navigation disabled")
-        return []
-
-
 _norm_rx = re.compile(r"[^A-Z0-9]+")
 def _norm_name(s: str) -> str:
     s = (s or "").upper()
@@ -77,6 +64,7 @@ def _norm_name(s: str) -> str:
     return _norm_rx.sub("", s)
 
 
+_id_regex = re.compile(r"^\s*(\d+)\D+(\d+)\s*$")
 def _extract_group_number(entry: Dict[str, Any]) -> Tuple[Optional[int], Optional[int]]:
     g = None; n = None
     for gk in ("group", "map_group", "mapGroup"):
@@ -92,7 +80,6 @@ def _extract_group_number(entry: Dict[str, Any]) -> Tuple[Optional[int], Optiona
             for nk in ("number", "map_number", "mapNumber"):
                 if nk in m: n = int(m[nk]); break
     if (g is None or n is None):
-        _id_regex = re.compile(r"^\s*(\d+)\D+(\d+)\s*$")
         for kk in ("map_key", "key", "id"):
             if kk in entry:
                 mm = _id_regex.match(str(entry[kk]))
@@ -110,33 +97,83 @@ def _extract_coords(entry: Dict[str, Any]) -> Optional[Tuple[int, int]]:
     return None
 
 
-def _resolve_current_index(current_map: Any, order: List[Dict[str, Any]], ctx) -> Optional[int]:
-    if isinstance(current_map, (tuple, list)) and len(current_map) == 2:
-        g, n = current_map
-        if isinstance(g, int) and isinstance(n, int):
-            for i, e in enumerate(order):
-                gg, nn = _extract_group_number(e)
-                if gg == g and nn == n:
-                    return i
-    if isinstance(current_map, str):
-        key = _norm_name(current_map)
-        for i, e in enumerate(order):
-            if _norm_name(str(e.get("name", ""))) == key:
+class RouteOrder:
+    """emerald_route_order.json parsed once: per-entry ids plus (group, number) and name -> index dicts."""
+
+    def __init__(self, entries: List[Dict[str, Any]]) -> None:
+        self.entries = entries
+        self.ids: List[Optional[Tuple[int, int]]] = []
+        self._by_id: Dict[Tuple[int, int], int] = {}
+        self._by_name: Dict[str, int] = {}
+        for i, e in enumerate(entries):
+            try:
+                g, n = _extract_group_number(e)
+            except Exception:
+                g = n = None
+            ids = (g, n) if g is not None and n is not None else None
+            self.ids.append(ids)
+            if ids is not None:
+                self._by_id.setdefault(ids, i)   # first entry wins, like the old linear scan
+            alts = e.get("alt", [])
+            for name in [e.get("name", "")] + ([alts] if isinstance(alts, str) else list(alts or [])):
+                key = _norm_name(str(name))
+                if key:
+                    self._by_name.setdefault(key, i)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        return self.entries[i]
+
+    def index_of(self, current_map: Any, ctx=None) -> Optional[int]:
+        """Index of *current_map* ((group, number) or a name/alt), falling back to the map on *ctx*."""
+        if isinstance(current_map, (tuple, list)) and len(current_map) == 2:
+            g, n = current_map
+            if isinstance(g, int) and isinstance(n, int) and (g, n) in self._by_id:
+                return self._by_id[(g, n)]
+        if isinstance(current_map, str):
+            i = self._by_name.get(_norm_name(current_map))
+            if i is not None:
                 return i
-            for alt in e.get("alt", []):
-                if _norm_name(str(alt)) == key:
-                    return i
+        try:
+            g = getattr(ctx, "map_group", None) or getattr(getattr(ctx, "map", None), "group", None)
+            n = getattr(ctx, "map_number", None) or getattr(getattr(ctx, "map", None), "number", None)
+            if isinstance(g, int) and isinstance(n, int):
+                return self._by_id.get((g, n))
+        except Exception:
+            pass
+        return None
+
+
+_route_order: Optional[RouteOrder] = None
+_route_order_key: Optional[Tuple[Path, float]] = None
+
+
+def _load_route_order(ctx) -> RouteOrder:
+    """The compiled route order, re-parsed only when the file's mtime changes."""
+    global _route_order, _route_order_key
+    path = _json_dir(ctx) / "emerald_route_order.json"
     try:
-        g = getattr(ctx, "map_group", None) or getattr(getattr(ctx, "map", None), "group", None)
-        n = getattr(ctx, "map_number", None) or getattr(getattr(ctx, "map", None), "number", None)
-        if isinstance(g, int) and isinstance(n, int):
-            for i, e in enumerate(order):
-                gg, nn = _extract_group_number(e)
-                if gg == g and nn == n:
-                    return i
-    except Exception:
-        pass
-    return None
+        key = (path, path.stat().st_mtime)
+    except OSError as e:
+        _log_warn(ctx, f"could not load route order ({e}); navigation disabled")
+        return RouteOrder([])
+    if key == _route_order_key and _route_order is not None:
+        return _route_order
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(data, list):
+            raise ValueError("route order json root must be a list")
+    except Exception as e:
+        if _route_order is not None and _route_order_key is not None and _route_order_key[0] == path:
+            _log_warn(ctx, f"could not reload route order ({e}); keeping the previous one")
+            return _route_order
+        _log_warn(ctx, f"could not load route order ({e}); navigation disabled")
+        return RouteOrder([])
+    _route_order, _route_order_key = RouteOrder(data), key
+    _log_info(ctx, f"loaded route order with {len(data)} entries from {path}")
+    return _route_order
 
 
 _GRASS_SET = {"GRASS", "TALL_GRASS", "LAND", "FIELD", "GRASSPATCH"}
@@ -148,17 +185,23 @@ def _label(o: Any) -> str:
     return str(o).strip().replace("-", "_").replace(" ", "_").upper()
 
 
-def _is_viable_tile_for_method(tile: Any, method: str) -> bool:
-    m = _label(method)
+def _tile_type(tile: Any) -> Optional[str]:
+    """Normalised tile type, or None when the tile reports no encounters."""
     if hasattr(tile, "tiletype"): raw = getattr(tile, "tiletype")
     elif hasattr(tile, "tile_type"): raw = getattr(tile, "tile_type")
     elif hasattr(tile, "behavior"): raw = getattr(tile, "behavior")
     elif hasattr(tile, "name"): raw = getattr(tile, "name")
     elif isinstance(tile, dict): raw = tile.get("tiletype") or tile.get("type") or tile.get("behavior") or tile.get("name")
     else: raw = tile
-    t = _label(raw)
     has_enc = getattr(tile, "has_encounters", True)
-    if isinstance(has_enc, bool) and not has_enc: return False
+    if isinstance(has_enc, bool) and not has_enc: return None
+    return _label(raw)
+
+
+def _is_viable_tile_for_method(tile: Any, method: str) -> bool:
+    m = _label(method)
+    t = _tile_type(tile)
+    if t is None: return False
     if m in ("GRASS", "LAND"): return (t in _GRASS_SET) and (t not in _WATER_SET)
     if m in ("SURF", "WATER", "ROD", "FISHING"): return t in _WATER_SET
     if m in ("ROCK_SMASH", "ROCKSMASH", "ROCK"): return t in _ROCK_SET
@@ -215,34 +258,24 @@ def _safe_center(size: Optional[Tuple[int,int]]) -> Tuple[int,int]:
     return (x,y)
 
 
-def _pick_encounter_coordinate(ctx, group: int, number: int, method: str) -> Tuple[int,int]:
+def _map_tiles(ctx, group: int, number: int) -> Optional[Tuple[int, int, Iterator[Tuple[int, int, Any]]]]:
+    """(w, h, iterator of (x, y, tile)) from the tile matrix, else per-tile probes; None if unreadable."""
     try:
-        import modules.map as m  # noqa: F401
         from modules.map import get_map_data
     except Exception:
         _log_warn(ctx, "modules.map not importable; using default coords")
-        return (10,10)
+        return None
 
     matrix, size = _try_get_matrix_or_size(group, number)
     if matrix is not None:
-        cands: List[Tuple[int,int]] = []
-        try:
-            h = len(matrix); w = len(matrix[0]) if h else 0
+        h = len(matrix); w = len(matrix[0]) if h else 0
+
+        def from_matrix():
             for y in range(h):
                 row = matrix[y]
                 for x in range(w):
-                    tile = row[x]
-                    if _is_viable_tile_for_method(tile, method):
-                        cands.append((x,y))
-        except Exception as e:
-            _log_warn(ctx, f"error scanning tile matrix ({e}); using safe center")
-            return _safe_center(size)
-        if cands:
-            coord = random.choice(cands)
-            _log_info(ctx, f"picked encounter tile for {method}: {coord} (from {len(cands)} candidates)")
-            return coord
-        _log_warn(ctx, f"no viable tiles found for method={method}; using safe center")
-        return _safe_center(size)
+                    yield x, y, row[x]
+        return w, h, from_matrix()
 
     if size is None:
         w,h = 60,60
@@ -250,27 +283,83 @@ def _pick_encounter_coordinate(ctx, group: int, number: int, method: str) -> Tup
     else:
         w,h = size
 
-    cands: List[Tuple[int,int]] = []
-    try:
-        from modules.map import get_map_data
+    def probed():
         for y in range(h):
             for x in range(w):
                 try:
                     tile = get_map_data((group, number), (x,y))
                 except Exception:
                     continue
-                if _is_viable_tile_for_method(tile, method):
-                    cands.append((x,y))
+                yield x, y, tile
+    return w, h, probed()
+
+
+def _scan_tile_bitmaps(ctx, group: int, number: int) -> Optional[ScanResult]:
+    """One pass over the map classifying every tile into the GRASS/WATER/ROCK bitmaps."""
+    tiles = _map_tiles(ctx, group, number)
+    if tiles is None:
+        return None
+    w, h, it = tiles
+    grass = water = rock = 0
+    try:
+        for x, y, tile in it:
+            t = _tile_type(tile)
+            if t is None: continue
+            bit = 1 << (y * w + x)
+            if t in _WATER_SET: water |= bit
+            elif t in _GRASS_SET: grass |= bit
+            if t in _ROCK_SET: rock |= bit
+    except Exception as e:
+        _log_warn(ctx, f"error scanning tiles of {group}:{number} ({e})")
+        return None
+    return w, h, {"GRASS": grass, "WATER": water, "ROCK": rock}
+
+
+def _arrival_xy(graph: WarpGraph, start: Optional[Tuple[int,int]], target: Tuple[int,int]) -> Optional[Tuple[int,int]]:
+    """Where the player is expected to appear on *target*: the warp back to the previous map on the known path."""
+    if start is not None:
+        path = graph.shortest_path(start, target)
+        if path and len(path) >= 2:
+            tiles = graph.warp_tiles(target, path[-2])
+            if tiles:
+                return tiles[0]
+    return graph.entry_xy(target)
+
+
+def _pick_encounter_coordinate(ctx, group: int, number: int, method: str,
+                               origin: Optional[Tuple[int,int]] = None) -> Tuple[int,int]:
+    picked = get_tile_bitmaps().pick((group, number), method, lambda: _scan_tile_bitmaps(ctx, group, number), origin)
+    if picked is not None:
+        coord, n, tiles = picked
+        if coord is not None:
+            _log_info(ctx, f"picked encounter tile for {method}: {coord} ({n} viable tiles nearby"
+                           + (f", arrival {origin})" if origin is not None else ")"))
+            return coord
+        _log_warn(ctx, f"no viable tiles found for method={method}; using safe center")
+        return _safe_center((tiles.w, tiles.h))
+    if method_class(method) is not None:
+        return (10,10)  # map unreadable; already logged
+
+    # method without a tile class: uncached scan for any passable tile
+    tiles = _map_tiles(ctx, group, number)
+    if tiles is None:
+        return (10,10)
+    w, h, it = tiles
+    cands: List[Tuple[int,int]] = []
+    try:
+        for x, y, tile in it:
+            if _is_viable_tile_for_method(tile, method):
+                cands.append((x,y))
     except Exception as e:
         _log_warn(ctx, f"error iterating tiles ({e}); using safe center")
-        return _safe_center(size)
+        return _safe_center((w, h))
 
     if cands:
         coord = random.choice(cands)
         _log_info(ctx, f"picked encounter tile for {method}: {coord} (from {len(cands)} candidates)")
         return coord
     _log_warn(ctx, f"no viable tiles found for method={method}; using safe center")
-    return _safe_center(size)
+    return _safe_center((w, h))
 
 
 def _is_controllable(context) -> bool:
@@ -499,6 +588,41 @@ def _step_off_warp_if_needed(context, navigate_to) -> None:
         return
 
 
+def _graph_next_hop(cur_ids: Tuple[int,int], target: Tuple[int,int], avoid: Set[Edge]) -> Optional[Tuple[Tuple[int,int], str]]:
+    """Next map on the shortest known path to *target* and how to get there (warp/connection)."""
+    graph = get_warp_graph()
+    path = graph.shortest_path(cur_ids, target, avoid=frozenset(avoid))
+    if not path or len(path) < 2:
+        return None
+    hop = path[1]
+    kind = graph.edge_kind(cur_ids, hop) or WARP
+    _LOG.info("Route %s (next: %s)", " → ".join(f"{g}:{n}" for g, n in path), kind)
+    return hop, kind
+
+
+def _target_blocked(entry: Dict[str, Any], target: Tuple[int,int], cur_ids: Optional[Tuple[int,int]],
+                    graph: WarpGraph, gates: NavGates, tokens: Set[str], blocked: frozenset) -> List[str]:
+    """Why *target* can't be reached with this save right now ([] = go ahead)."""
+    reqs = list(gates.maps.get(target, ())) + [str(r).upper() for r in entry.get("requires", []) or []]
+    why = gates.unmet(reqs, tokens, read_event_flag)
+    if why or not blocked:
+        return why
+    if cur_ids is not None and graph.shortest_path(cur_ids, target, avoid=blocked):
+        return []
+    path = graph.shortest_path(cur_ids, target) if cur_ids is not None else None
+    if path:
+        # Known routes exist, but every one of them crosses a gate we can't pass yet
+        closed = [e for e in zip(path, path[1:]) if e in blocked]
+    else:
+        # No known route: judge by the edges into the target (gate table and graph)
+        into = {e for e in gates.edges if e[1] == target}
+        into |= {(src, target) for src in graph.sources() if any(d == target for d, _k in graph.edges_from(src))}
+        closed = [e for e in into if e in blocked]
+        if not closed or len(closed) < len(into):
+            return []   # nothing gated, or an open way in we just haven't reached yet
+    return sorted({r for e in closed for r in gates.unmet(gates.requirements(*e), tokens, read_event_flag)})
+
+
 def _get_nav_state(context) -> Dict[str, Any]:
     st = getattr(context, "_prof_oak_nav_state", None)
     if st is None:
@@ -528,25 +652,45 @@ def navigate_after_quota(
 
     idx = state.get("last_idx")
     if idx is None:
-        idx = _resolve_current_index(current_map, order, context)
+        idx = order.index_of(current_map, context)
         if idx is None:
             _log_warn(context, "Could not parse current map; assuming first route in order")
             idx = 0
 
+    # Requirements are checked once per navigation: the save can't change mid-walk.
+    graph = get_warp_graph()
+    gates = get_nav_gates()
+    try:
+        tokens = traversal_tokens(refresh_capabilities())
+    except Exception as e:
+        _log_warn(context, f"capability read failed ({e}); only flag gates apply")
+        tokens = set()
+    graph.record_current()
+    blocked = gates.blocked_edges(graph, tokens, read_event_flag)
+    if blocked:
+        _log_info(context, f"{len(blocked)} gated edge(s) closed for this save: "
+                           + ", ".join(f"{a[0]}:{a[1]}→{b[0]}:{b[1]}" for a, b in sorted(blocked)[:6]))
+
     L = len(order)
     next_idx = None
+    start_ids = _current_map_id()
     for k in range(1, L + 1):
         cand = order[(idx + k) % L]
-        gg, nn = _extract_group_number(cand)
-        if gg is not None and nn is not None:
+        ids = order.ids[(idx + k) % L]
+        if ids is not None:
+            gg, nn = ids
+            why = _target_blocked(cand, ids, start_ids, graph, gates, tokens, blocked)
+            if why:
+                _log_info(context, f"Skipping {cand.get('name', f'{gg}:{nn}')}: needs {', '.join(why)}")
+                continue
             next_idx = (idx + k) % L
             break
     if next_idx is None:
-        _log_warn(context, "No valid (group, number) found in route order; aborting")
+        _log_warn(context, "No reachable (group, number) found in route order; aborting")
         return
 
     final_entry = order[next_idx]
-    FG, FN = _extract_group_number(final_entry)
+    FG, FN = order.ids[next_idx]
     final_name = final_entry.get("name", f"{FG}:{FN}")
     explicit_coords = _extract_coords(final_entry)
     _log_info(context, f"Final target -> {final_name} (group={FG}, number={FN})")
@@ -557,7 +701,8 @@ def navigate_after_quota(
         dest_xy = (int(explicit_coords[0]), int(explicit_coords[1]))
         _log_info(context, f"using coords provided by route json: {dest_xy}")
     else:
-        dest_xy = _pick_encounter_coordinate(context, int(FG), int(FN), method)
+        dest_xy = _pick_encounter_coordinate(context, int(FG), int(FN), method,
+                                             _arrival_xy(graph, start_ids, (int(FG), int(FN))))
 
     try:
         from modules.modes.util.walking import navigate_to
@@ -565,67 +710,70 @@ def navigate_after_quota(
         _log_warn(context, f"Cannot import walking.navigate_to: {e}")
         return
 
-    # -------- Phase 1: direct try BEFORE manual warp loop --------
-    for attempt in range(2):
-        yield from _wait_until_controllable(context)
-        cur_ids = _current_map_id()
-        if cur_ids == (int(FG), int(FN)):
-            break
-        try:
-            _log_info(context, f"Attempting direct navigate_to final {final_name} @ {dest_xy} …")
-            yield from _dismiss_dialog(context)
-            yield from navigate_to((int(FG), int(FN)), dest_xy, run=True,
-                                   avoid_encounters=False,
-                                   avoid_scripted_events=False,
-                                   expecting_script=True)
-        except Exception as e:
-            _log_warn(context, f"direct navigate_to final raised: {e}")
-
-    # -------- Phase 1 (fallback): manual warp stepping --------
+    # -------- Phase 1: follow the shortest known path; direct navigate_to only as a fallback --------
+    failed_edges: Set[Edge] = set()   # hops that didn't work this run; routed around
     last_map_before_step: Optional[Tuple[int,int]] = None
     while True:
         yield from _wait_until_controllable(context)
+        graph.record_current()
         cur_ids = _current_map_id()
         if cur_ids == (int(FG), int(FN)):
             break
 
-        # Try a direct path inside the loop as well (fixes 104N -> 116 style cases)
-        try:
-            _log_info(context, f"Retrying direct navigate_to {final_name} inside loop …")
-            yield from _dismiss_dialog(context)
-            yield from navigate_to((int(FG), int(FN)), dest_xy, run=True,
-                                   avoid_encounters=False,
-                                   avoid_scripted_events=False,
-                                   expecting_script=True)
-        except Exception as e:
-            _log_info(context, f"direct in-loop attempt yielded: {e}")
-        if _current_map_id() == (int(FG), int(FN)):
-            break
-
         direct_warps = _list_warp_tiles_to_target(int(FG), int(FN))
+        hop = _graph_next_hop(cur_ids, (int(FG), int(FN)), failed_edges | blocked) if cur_ids else None
+
+        # No known route (or every known one failed): let navigate_to try the whole way (fixes 104N -> 116 style cases)
+        if hop is None and not direct_warps:
+            try:
+                _log_info(context, f"No known path; attempting direct navigate_to {final_name} @ {dest_xy} …")
+                yield from _dismiss_dialog(context)
+                yield from navigate_to((int(FG), int(FN)), dest_xy, run=True,
+                                       avoid_encounters=False,
+                                       avoid_scripted_events=False,
+                                       expecting_script=True)
+            except Exception as e:
+                _log_info(context, f"direct attempt yielded: {e}")
+            if _current_map_id() == (int(FG), int(FN)):
+                break
 
         step_g, step_n = (int(FG), int(FN))
-        if not direct_warps:
+        if hop is not None and hop[1] == CONNECTION:
+            (step_g, step_n), _kind = hop
+            entry = graph.entry_xy((step_g, step_n))
+            if entry is None:
+                failed_edges.add((cur_ids, (step_g, step_n)))
+                continue
+            _log_info(context, f"Walking across the map edge into {(step_g, step_n)} toward {final_name}.")
+            try:
+                yield from _dismiss_dialog(context)
+                yield from navigate_to((step_g, step_n), entry, run=True,
+                                       avoid_encounters=False,
+                                       avoid_scripted_events=False,
+                                       expecting_script=True)
+            except Exception as e:
+                _log_warn(context, f"navigate_to (connection step) raised: {e}")
+            if _current_map_id() == cur_ids:
+                failed_edges.add((cur_ids, (step_g, step_n)))
+            else:
+                last_map_before_step = cur_ids
+            continue
+        if hop is not None:
+            (step_g, step_n), _kind = hop
+            warp_list = _list_warp_tiles_to_target(step_g, step_n) or graph.warp_tiles(cur_ids, (step_g, step_n))
+            _log_info(context, f"Stepping via {(step_g, step_n)} (shortest known path) toward {final_name}.")
+        elif not direct_warps:
             warp_dests = _list_all_warps_from_current()
 
             if not warp_dests:
-                _log_warn(context, "No warps available from current map; trying direct path instead of aborting.")
-                try:
-                    yield from _dismiss_dialog(context)
-                    yield from navigate_to((int(FG), int(FN)), dest_xy, run=True,
-                                           avoid_encounters=False,
-                                           avoid_scripted_events=False,
-                                           expecting_script=True)
-                except Exception as e:
-                    _log_warn(context, f"direct fallback also raised: {e}")
-                if _current_map_id() != (int(FG), int(FN)):
-                    _log_warn(context, "Still not on target map; will loop and retry.")
+                _log_warn(context, "No warps available from current map and the direct path failed; will loop and retry.")
                 continue
 
             if last_map_before_step:
                 warp_dests = [(dg, dn, xy) for (dg, dn, xy) in warp_dests if (dg, dn) != last_map_before_step]
+            warp_dests = [(dg, dn, xy) for (dg, dn, xy) in warp_dests if (cur_ids, (dg, dn)) not in blocked]
 
-            cur_idx = _resolve_current_index(cur_ids, order, context)
+            cur_idx = order.index_of(cur_ids, context)
             tgt_idx = next_idx
             if cur_idx is None:
                 _log_warn(context, "Could not resolve current map index; aborting navigation.")
@@ -635,7 +783,7 @@ def navigate_after_quota(
             target_span = (tgt_idx - cur_idx) % L
 
             for (dg, dn, _xy) in warp_dests:
-                dest_idx = _resolve_current_index((dg, dn), order, context)
+                dest_idx = order.index_of((dg, dn), context)
                 if dest_idx is None:
                     continue
                 fwd = (dest_idx - cur_idx) % L
@@ -645,7 +793,7 @@ def navigate_after_quota(
 
             if best is None:
                 for (dg, dn, _xy) in warp_dests:
-                    dest_idx = _resolve_current_index((dg, dn), order, context)
+                    dest_idx = order.index_of((dg, dn), context)
                     if dest_idx is None:
                         continue
                     fwd = (dest_idx - cur_idx) % L
@@ -657,29 +805,15 @@ def navigate_after_quota(
                 _log_info(context, f"No direct warp. Stepping via intermediate {(step_g, step_n)} toward {final_name}.")
                 warp_list = _list_warp_tiles_to_target(step_g, step_n)
             else:
-                _log_warn(context, "Could not select an intermediate step; will try direct path instead of aborting.")
-                try:
-                    yield from _dismiss_dialog(context)
-                    yield from navigate_to((int(FG), int(FN)), dest_xy, run=True,
-                                           avoid_encounters=False,
-                                           avoid_scripted_events=False,
-                                           expecting_script=True)
-                except Exception:
-                    pass
+                _log_warn(context, "Could not select an intermediate step; will retry the direct path.")
                 continue
         else:
             warp_list = direct_warps
 
         if not warp_list:
-            _log_warn(context, "No warp tiles lead to the next step; will try direct path again.")
-            try:
-                yield from _dismiss_dialog(context)
-                yield from navigate_to((int(FG), int(FN)), dest_xy, run=True,
-                                       avoid_encounters=False,
-                                       avoid_scripted_events=False,
-                                       expecting_script=True)
-            except Exception:
-                pass
+            _log_warn(context, "No warp tiles lead to the next step; routing around it.")
+            if cur_ids and (step_g, step_n) != (int(FG), int(FN)):
+                failed_edges.add((cur_ids, (step_g, step_n)))
             continue
 
         pos_now = _get_player_xy()
@@ -715,7 +849,9 @@ def navigate_after_quota(
                 _log_info(context, "That warp didn’t work; trying the next nearest…")
 
         if not reached:
-            _log_warn(context, "Could not reach any warp tile; will retry loop (and try direct again).")
+            if cur_ids and (step_g, step_n) != (int(FG), int(FN)):
+                failed_edges.add((cur_ids, (step_g, step_n)))
+            _log_warn(context, "Could not reach any warp tile; will retry loop.")
             continue
 
     # --- Phase 3: arrive and hand off back to base mode (Spin) ---
@@ -0,0 +1,208 @@
+# plugins/ProfOak/owned_index.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Incremental owned-shiny index
+#
+# What this does
+#  - Tracks every shiny in the PC boxes and the party, keyed by personality
+#    value, so the same mon moving between box/party is never double counted.
+#  - Hashes each box's raw bytes (and the party's) and only rebuilds the
+#    shiny list for locations whose digest changed. A rescan after a few
+#    catches or a box reshuffle touches one or two boxes instead of 14×30.
+#  - Keeps per-species counts (Unown letters as "UNOWN-X" too) up to date by
+#    diffing the old and new shinies of each rescanned location.
+#
+# Locations are box indices (0..13), "party" and "caught" (shinies reported
+# by on_pokemon_caught that no scan has seen yet).
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Gen III PC storage layout: u32 current box, then 14 boxes × 30 slots × 80 bytes
+STORAGE_HEADER_BYTES = 4
+BOX_MON_BYTES = 80
+SLOTS_PER_BOX = 30
+
+CAUGHT = "caught"
+PARTY = "party"
+
+
+@dataclass(frozen=True)
+class OwnedShiny:
+    personality_value: int
+    species: str
+    letter: Optional[str] = None
+
+    def names(self) -> List[str]:
+        """Names this mon counts towards ("UNOWN" also counts as "UNOWN-X")."""
+        return [self.species, f"UNOWN-{self.letter}"] if self.species == "UNOWN" and self.letter else [self.species]
+
+
+def _norm(name) -> Optional[str]:
+    return name.strip().upper() if isinstance(name, str) and name.strip() else None
+
+
+def shiny_from_mon(mon) -> Optional[OwnedShiny]:
+    """
+    OwnedShiny for a shiny Pokemon object, else None. Mons without a readable
+    personality value are skipped: any stand-in key would merge two identical
+    shinies or split one mon seen in two places.
+    """
+    if not mon or not getattr(mon, "is_shiny", False):
+        return None
+    pv = getattr(mon, "personality_value", None)
+    if not isinstance(pv, int) or isinstance(pv, bool):
+        return None
+    nm = _norm(getattr(mon, "species_name", None) or getattr(getattr(mon, "species", None), "name", None))
+    if not nm:
+        return None
+    letter = _norm(getattr(mon, "unown_letter", None)) if nm == "UNOWN" else None
+    return OwnedShiny(pv, nm, letter)
+
+
+def _digest(chunks: Iterable[bytes]) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for c in chunks:
+        h.update(c)
+    return h.digest()
+
+
+def _mon_bytes(mon) -> Optional[bytes]:
+    d = getattr(mon, "data", None)
+    return bytes(d) if isinstance(d, (bytes, bytearray, memoryview)) else None
+
+
+def _box_raw(storage, box_index: int, box) -> Optional[bytes]:
+    """Raw bytes of one box: sliced from the storage buffer when exposed, else per-slot data."""
+    for attr in ("_data", "data", "raw_data"):
+        data = getattr(storage, attr, None)
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            size = SLOTS_PER_BOX * BOX_MON_BYTES
+            off = STORAGE_HEADER_BYTES + box_index * size
+            if len(data) >= off + size:
+                return bytes(data[off:off + size])
+    parts: List[bytes] = []
+    for slot in getattr(box, "slots", None) or []:
+        raw = _mon_bytes(getattr(slot, "pokemon", None))
+        if raw is None:
+            return None  # can't fingerprint this box; always rescan it
+        parts.append(str(getattr(slot, "slot_index", len(parts))).encode() + raw)
+    return b"".join(parts)
+
+
+class OwnedShinyIndex:
+    def __init__(self) -> None:
+        self._digests: Dict[Hashable, bytes] = {}
+        self._by_location: Dict[Hashable, Dict[int, OwnedShiny]] = {}
+        self._refs: Dict[int, int] = {}              # pv -> number of locations holding it
+        self._mons: Dict[int, OwnedShiny] = {}       # pv -> shiny (deduplicated)
+        self.counts: Dict[str, int] = {}             # species name -> shiny mons owned
+        self.boxes_rescanned = 0                     # diagnostics: boxes rebuilt by the last scan
+
+    # ---- queries -------------------------------------------------------------
+    @property
+    def species(self) -> Set[str]:
+        return set(self.counts)
+
+    def __len__(self) -> int:
+        return len(self._mons)
+
+    # ---- updates -------------------------------------------------------------
+    def add_caught(self, shiny: OwnedShiny) -> List[str]:
+        """Record a fresh catch before any scan sees it. Returns names that became owned."""
+        pending = dict(self._by_location.get(CAUGHT, {}))
+        pending[shiny.personality_value] = shiny
+        return self._apply(CAUGHT, pending)[0]
+
+    def scan_storage(self, storage) -> bool:
+        """Rescan only boxes whose bytes changed. Returns True if the owned set changed."""
+        changed = False
+        for c in self.iter_scan_storage(storage):
+            changed |= c
+        return changed
+
+    def iter_scan_storage(self, storage) -> Iterator[bool]:
+        """scan_storage one box at a time (for the scheduler): yields whether each box changed the owned set."""
+        self.boxes_rescanned = 0
+        for i, box in enumerate(getattr(storage, "boxes", None) or []):
+            raw = _box_raw(storage, i, box)
+            dg = _digest((raw,)) if raw is not None else None
+            if dg is not None and self._digests.get(i) == dg:
+                continue
+            self.boxes_rescanned += 1
+            found: Dict[int, OwnedShiny] = {}
+            for slot in getattr(box, "slots", None) or []:
+                sh = shiny_from_mon(getattr(slot, "pokemon", None))
+                if sh: found[sh.personality_value] = sh
+            changed = self._apply(i, found)[1]
+            if dg is not None: self._digests[i] = dg
+            else: self._digests.pop(i, None)
+            yield changed
+
+    def scan_party(self, party) -> bool:
+        mons = [m for m in (getattr(party, "pokemon", party) or []) if m]
+        raws = [_mon_bytes(m) for m in mons]
+        dg = _digest(raws) if all(r is not None for r in raws) else None
+        if dg is not None and self._digests.get(PARTY) == dg:
+            return False
+        found = {sh.personality_value: sh for sh in (shiny_from_mon(m) for m in mons) if sh}
+        changed = self._apply(PARTY, found)[1]
+        if dg is not None: self._digests[PARTY] = dg
+        else: self._digests.pop(PARTY, None)
+        return changed
+
+    def settle_caught(self) -> bool:
+        """After a complete scan: drop pending catches no location holds (released/traded)."""
+        return self._apply(CAUGHT, {})[1]
+
+    # ---- internals -----------------------------------------------------------
+    def _apply(self, location: Hashable, new: Dict[int, OwnedShiny]) -> Tuple[List[str], bool]:
+        """Replace one location's shinies with *new*; returns (names newly owned, changed?)."""
+        old = self._by_location.get(location, {})
+        if old == new:
+            return [], False
+        gained: List[str] = []
+        pending = self._by_location.get(CAUGHT) if location != CAUGHT else None
+        for pv, sh in old.items():
+            if new.get(pv) != sh:
+                self._release(pv)
+        for pv, sh in new.items():
+            if old.get(pv) == sh:
+                continue
+            if pending and pending.get(pv) == sh:
+                del pending[pv]  # a scan found the fresh catch: hand its reference over
+                continue
+            gained.extend(self._acquire(sh))
+        if new: self._by_location[location] = new
+        else: self._by_location.pop(location, None)
+        if pending is not None and not pending:
+            self._by_location.pop(CAUGHT, None)
+        return gained, True
+
+    def _acquire(self, sh: OwnedShiny) -> List[str]:
+        pv = sh.personality_value
+        self._refs[pv] = self._refs.get(pv, 0) + 1
+        if self._refs[pv] > 1:
+            return []
+        self._mons[pv] = sh
+        gained: List[str] = []
+        for n in sh.names():
+            self.counts[n] = self.counts.get(n, 0) + 1
+            if self.counts[n] == 1: gained.append(n)
+        return gained
+
+    def _release(self, pv: int) -> None:
+        self._refs[pv] = self._refs.get(pv, 1) - 1
+        if self._refs[pv] > 0:
+            return
+        del self._refs[pv]
+        sh = self._mons.pop(pv, None)
+        if sh is None:
+            return
+        for n in sh.names():
+            c = self.counts.get(n, 0) - 1
+            if c > 0: self.counts[n] = c
+            else: self.counts.pop(n, None)
@@ -0,0 +1,265 @@
+# plugins/ProfOak/persistence.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Write-behind JSON persistence
+#
+# What this does
+#  - `WriteBehindStore` queues journal lines, checkpoint documents and other
+#    deferred writes (SQLite transactions, see `call`) and runs them from a
+#    background thread: on a timer, when asked (e.g. map change) and at
+#    interpreter shutdown.
+#  - Every write goes to a temp file that is fsync'd and then renamed over the
+#    target, so a crash never leaves half-written JSON behind.
+#
+# Why this exists
+#  - The plugin used to rewrite whole documents synchronously on the emulator
+#    thread for every learned species, Unown letter and catch.
+#
+# Journal
+#  - `EventJournal` appends one compact JSON line per state change (O(event)).
+#    On startup the journal is replayed over the last checkpoint documents.
+#    `compact(docs)` hands the store fully materialized checkpoint documents
+#    (private copies, so the flush thread never reads live containers); the
+#    flusher writes them first and only then truncates the journal, so a
+#    crash at any point replays to the same state.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+FLUSH_INTERVAL_S = 5.0                     # background flush cadence
+JOURNAL_COMPACT_BYTES = 256 * 1024         # compact once the journal grows past this
+JOURNAL_COMPACT_INTERVAL_S = 15 * 60.0     # ...or when it has had events for this long
+
+
+def atomic_write_json(path: Path, data: Any) -> None:
+    """Write *data* as pretty, key-sorted JSON via temp file + rename."""
+    _atomic_write_text(path, json.dumps(data, indent=2, sort_keys=True))
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(text)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    finally:
+        try:
+            if tmp.exists(): tmp.unlink()
+        except OSError:
+            pass
+
+
+class WriteBehindStore:
+    def __init__(self, interval: float = FLUSH_INTERVAL_S, on_error: Optional[Callable[[str], None]] = None) -> None:
+        self.interval = interval
+        self._on_error = on_error
+        self._lock = threading.Lock()      # guards the queues below
+        self._io_lock = threading.Lock()   # one flush at a time
+        self._dirty: Dict[Path, Any] = {}    # checkpoint documents waiting to be written
+        self._appends: Dict[Path, List[str]] = {}
+        self._truncate: Set[Path] = set()
+        self._calls: List[Callable[[], None]] = []   # deferred writes elsewhere (SQLite), in submit order
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    # ---- queueing (emulator thread) ------------------------------------------
+    def append_line(self, path: Path, line: str) -> None:
+        """Queue *line* (newline included) for appending to *path*."""
+        with self._lock:
+            self._appends.setdefault(path, []).append(line)
+        self._ensure_thread()
+
+    def checkpoint(self, journal: Path, docs: Dict[Path, Any]) -> None:
+        """
+        Replace *docs* with the given (already materialized) data, then empty
+        *journal*. Lines queued for the journal before this call are dropped:
+        the checkpoint already contains their effect.
+        """
+        with self._lock:
+            self._dirty.update(docs)
+            self._appends.pop(journal, None)
+            self._truncate.add(journal)
+        self._ensure_thread()
+
+    def call(self, fn: Callable[[], None]) -> None:
+        """
+        Queue *fn* to run on the flush thread after every call queued before it,
+        and only once the documents and journal lines queued with it are on disk.
+        """
+        with self._lock:
+            self._calls.append(fn)
+        self._ensure_thread()
+
+    def request_flush(self) -> None:
+        """Wake the flusher now instead of waiting for the next tick."""
+        self._wake.set()
+
+    def pending(self) -> bool:
+        with self._lock:
+            return bool(self._dirty or self._appends or self._truncate or self._calls)
+
+    # ---- flushing ------------------------------------------------------------
+    def flush(self) -> None:
+        """Write every dirty document (blocking). Safe from any thread."""
+        with self._io_lock:
+            with self._lock:
+                batch, self._dirty = self._dirty, {}
+                truncs, self._truncate = self._truncate, set()
+                appends, self._appends = self._appends, {}
+                calls, self._calls = self._calls, []
+
+            docs_ok = True
+            for path, data in batch.items():
+                try:
+                    atomic_write_json(path, data)
+                except Exception as e:
+                    docs_ok = False
+                    self._requeue(path, data)
+                    self._error(f"Failed to write {path}: {e}")
+
+            # A journal may only be emptied once its checkpoint is on disk; until then
+            # hold back its new lines too (appending them now would be truncated later).
+            if truncs and not docs_ok:
+                with self._lock:
+                    self._truncate |= truncs
+                    for path in truncs:
+                        if path in appends:
+                            self._appends[path] = appends.pop(path) + self._appends.get(path, [])
+                truncs = set()
+
+            for path in truncs:
+                try:
+                    _atomic_write_text(path, "")
+                except Exception as e:
+                    self._error(f"Failed to truncate {path}: {e}")
+
+            writes_ok = docs_ok
+            for path, lines in appends.items():
+                try:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(path, "a", encoding="utf-8") as fh:
+                        fh.write("".join(lines))
+                        fh.flush()
+                        os.fsync(fh.fileno())
+                except Exception as e:
+                    writes_ok = False
+                    with self._lock:
+                        self._appends[path] = lines + self._appends.get(path, [])
+                    self._error(f"Failed to append to {path}: {e}")
+
+            if calls and not writes_ok:
+                with self._lock:   # a call may depend on what just failed; keep it until that is on disk
+                    self._calls[:0] = calls
+                calls = []
+
+            for i, fn in enumerate(calls):
+                try:
+                    fn()
+                except Exception as e:
+                    with self._lock:   # retried next flush, still ahead of newer calls
+                        self._calls[:0] = calls[i:]
+                    self._error(f"Deferred write failed: {e}")
+                    break
+
+    def close(self) -> None:
+        """Stop the background thread and write whatever is left."""
+        self._closed = True
+        self._wake.set()
+        t = self._thread
+        if t is not None and t is not threading.current_thread():
+            t.join(timeout=max(1.0, self.interval))
+        self.flush()
+
+    # ---- internals -----------------------------------------------------------
+    def _requeue(self, path: Path, data: Any) -> None:
+        with self._lock:
+            self._dirty.setdefault(path, data)  # a newer checkpoint wins
+
+    def _error(self, msg: str) -> None:
+        if self._on_error:
+            try: self._on_error(msg); return
+            except Exception: pass
+        print(f"WARNING: {msg}")
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None or self._closed:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="ProfOak-JSON-flush", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._closed:
+                break
+            self.flush()
+
+
+class EventJournal:
+    """Append-only JSON-lines log of state events, compacted into checkpoint documents."""
+
+    def __init__(self, path: Path, store: WriteBehindStore,
+                 compact_bytes: int = JOURNAL_COMPACT_BYTES,
+                 compact_interval: float = JOURNAL_COMPACT_INTERVAL_S) -> None:
+        self.path = path
+        self.store = store
+        self.compact_bytes = compact_bytes
+        self.compact_interval = compact_interval
+        try:
+            self.size = path.stat().st_size if path.exists() else 0
+        except OSError:
+            self.size = 0
+        self._since = time.monotonic()
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """Yield events in order. Unparseable lines (e.g. a torn last write) are skipped."""
+        try:
+            fh = open(self.path, "r", encoding="utf-8")
+        except OSError:
+            return
+        with fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    ev = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(ev, dict) and isinstance(ev.get("e"), str):
+                    yield ev
+
+    def append(self, kind: str, **fields: Any) -> None:
+        if self.size == 0:
+            self._since = time.monotonic()
+        payload = {"e": kind, **{k: v for k, v in fields.items() if v is not None}}
+        line = json.dumps(payload, separators=(",", ":"), ensure_ascii=False) + "\n"
+        self.store.append_line(self.path, line)
+        self.size += len(line)
+
+    def needs_compaction(self) -> bool:
+        if self.size >= self.compact_bytes:
+            return True
+        return self.size > 0 and (time.monotonic() - self._since) >= self.compact_interval
+
+    def compact(self, docs: Dict[Path, Any]) -> None:
+        """Checkpoint *docs* (already copied; they must not be mutated afterwards) and empty the journal."""
+        self.store.checkpoint(self.path, docs)
+        self.size = 0
+        self._since = time.monotonic()
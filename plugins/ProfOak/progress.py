@@ -0,0 +1,193 @@
+# plugins/ProfOak/progress.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Whole-game quota progress index
+#
+# What this does
+#  - Tracks every known (map, method) quota at once: its required species as
+#    a bitmask (species_index space) and how many of them are still missing.
+#  - Quotas sit in buckets by remaining count, and every species bit knows
+#    which quotas require it. A catch therefore only touches the quotas that
+#    list the caught species, moving each one bucket down, and a learn event
+#    only touches its own (map, method).
+#  - "Closest to done" walks the buckets from 1 upwards; a route has at most
+#    a dozen or so species, so that is a constant number of steps.
+#  - `FamilyProgress` does the same for the living-dex families of the
+#    current route: have/need per family root, adjusted in place per catch.
+#
+# The plugin owns the policy (which species a quota requires, living-dex,
+# Unown letters); this module only does the bookkeeping on masks.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+MapMethod = Tuple[str, str]
+
+
+def _bits(mask: int):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class QuotaProgressIndex:
+    def __init__(self) -> None:
+        self._required: Dict[MapMethod, int] = {}
+        self._remaining: Dict[MapMethod, int] = {}
+        self._buckets: Dict[int, Set[MapMethod]] = {}     # remaining -> quotas
+        self._holders: Dict[int, Set[MapMethod]] = {}     # species index -> quotas requiring it
+        self._owned = 0
+
+    # ---- building ------------------------------------------------------------
+    def rebuild(self, requirements: Mapping[MapMethod, int], owned_mask: int) -> None:
+        self.__init__()
+        self._owned = owned_mask
+        for key, mask in requirements.items():
+            self.set_requirement(key, mask)
+
+    def set_requirement(self, key: MapMethod, mask: int) -> None:
+        """(Re)define one quota, e.g. after a learn event or a ROM merge. A 0 mask removes it."""
+        old = self._required.get(key, 0)
+        if old == mask and (mask == 0 or key in self._remaining):
+            return
+        for i in _bits(old & ~mask):
+            holders = self._holders.get(i)
+            if holders is not None:
+                holders.discard(key)
+                if not holders: del self._holders[i]
+        for i in _bits(mask & ~old):
+            self._holders.setdefault(i, set()).add(key)
+        self._unbucket(key)
+        if mask:
+            self._required[key] = mask
+            self._bucket(key, (mask & ~self._owned).bit_count())
+        else:
+            self._required.pop(key, None)
+
+    # ---- ownership -----------------------------------------------------------
+    def set_owned(self, owned_mask: int) -> None:
+        """Apply a new owned mask, touching only quotas that require a changed species."""
+        gained, lost = owned_mask & ~self._owned, self._owned & ~owned_mask
+        self._owned = owned_mask
+        for i in _bits(gained):
+            for key in self._holders.get(i, ()):
+                self._bucket(key, self._remaining[key] - 1)
+        for i in _bits(lost):
+            for key in self._holders.get(i, ()):
+                self._bucket(key, self._remaining[key] + 1)
+
+    def add_owned(self, index: int) -> None:
+        """A single species became owned (the on-catch fast path)."""
+        if not (self._owned >> index) & 1:
+            self.set_owned(self._owned | (1 << index))
+
+    # ---- queries -------------------------------------------------------------
+    def remaining(self, key: MapMethod) -> Optional[int]:
+        return self._remaining.get(key)
+
+    def total(self, key: MapMethod) -> int:
+        return self._required.get(key, 0).bit_count()
+
+    def required_mask(self, key: MapMethod) -> int:
+        return self._required.get(key, 0)
+
+    def unfinished(self) -> List[MapMethod]:
+        return [key for rem, keys in self._buckets.items() if rem > 0 for key in keys]
+
+    def closest(self, n: int = 5) -> List[Tuple[MapMethod, int, int]]:
+        """Up to *n* unfinished quotas with the fewest shinies left: (key, remaining, total)."""
+        out: List[Tuple[MapMethod, int, int]] = []
+        for rem in sorted(k for k in self._buckets if k > 0):
+            for key in sorted(self._buckets[rem]):
+                out.append((key, rem, self.total(key)))
+                if len(out) >= n:
+                    return out
+        return out
+
+    def summary(self) -> Tuple[int, int, int]:
+        """(quotas complete, quotas known, shinies still missing across all quotas)."""
+        done = len(self._buckets.get(0, ()))
+        return done, len(self._remaining), sum(self._remaining.values())
+
+    def __len__(self) -> int:
+        return len(self._remaining)
+
+    # ---- internals -----------------------------------------------------------
+    def _bucket(self, key: MapMethod, rem: int) -> None:
+        self._unbucket(key)
+        self._remaining[key] = rem
+        self._buckets.setdefault(rem, set()).add(key)
+
+    def _unbucket(self, key: MapMethod) -> None:
+        rem = self._remaining.pop(key, None)
+        if rem is None:
+            return
+        b = self._buckets.get(rem)
+        if b is not None:
+            b.discard(key)
+            if not b: del self._buckets[rem]
+
+
+class FamilyProgress:
+    """Per-family have/need counts for one requirement set (family root -> member mask)."""
+
+    def __init__(self) -> None:
+        self._masks: Dict[int, int] = {}
+        self._family_of: Dict[int, int] = {}     # species index -> family root
+        self._have: Dict[int, int] = {}
+        self._incomplete: Set[int] = set()
+        self._owned = 0
+        self.have_total = 0
+        self.need_total = 0
+
+    def bind(self, family_masks: Mapping[int, int], owned_mask: int) -> None:
+        """Switch to a new requirement set (route/method/living-dex change)."""
+        self.__init__()
+        self._owned = owned_mask
+        for fam, fmask in family_masks.items():
+            self._masks[fam] = fmask
+            for i in _bits(fmask):
+                self._family_of[i] = fam
+            have = (fmask & owned_mask).bit_count()
+            self._have[fam] = have
+            self.have_total += have
+            self.need_total += fmask.bit_count()
+            if have < fmask.bit_count():
+                self._incomplete.add(fam)
+
+    def set_owned(self, owned_mask: int) -> None:
+        gained, lost = owned_mask & ~self._owned, self._owned & ~owned_mask
+        self._owned = owned_mask
+        for i in _bits(gained):
+            self._adjust(i, 1)
+        for i in _bits(lost):
+            self._adjust(i, -1)
+
+    def add_owned(self, index: int) -> None:
+        if not (self._owned >> index) & 1:
+            self._owned |= 1 << index
+            self._adjust(index, 1)
+
+    def have(self, fam: int) -> int:
+        return self._have.get(fam, 0)
+
+    def need(self, fam: int) -> int:
+        return self._masks.get(fam, 0).bit_count()
+
+    def incomplete(self) -> List[Tuple[int, int]]:
+        """(family root, mask of its still-missing members) for unfinished families."""
+        return [(fam, self._masks[fam] & ~self._owned) for fam in sorted(self._incomplete)]
+
+    def _adjust(self, index: int, delta: int) -> None:
+        fam = self._family_of.get(index)
+        if fam is None:
+            return
+        have = self._have[fam] + delta
+        self._have[fam] = have
+        self.have_total += delta
+        if have < self._masks[fam].bit_count():
+            self._incomplete.add(fam)
+        else:
+            self._incomplete.discard(fam)
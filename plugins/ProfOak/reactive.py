@@ -0,0 +1,93 @@
+# plugins/ProfOak/reactive.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Tiny reactive dependency graph
+#
+# What this does
+#  - `Input` cells hold plain values (map key, method, owned mask, ...).
+#    Setting one to an equal value is a no-op; a real change bumps its
+#    version and marks every (transitive) dependent dirty.
+#  - `Derived` nodes declare their inputs up front and recompute lazily, on
+#    the first `get()` after one of them changed. If the recomputed value is
+#    equal to the old one the node keeps its version, so nodes further down
+#    the chain don't recompute either.
+#  - `Node.version` lets consumers (e.g. the status printer) skip work when
+#    nothing they read has changed since last time.
+#
+# Single-threaded by design: plugin hooks all run on the emulator thread.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from typing import Any, Callable, List, Optional, Sequence
+
+
+class Node:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.value: Any = None
+        self.version = 0
+        self._dependents: List["Derived"] = []
+
+    def get(self) -> Any:
+        return self.value
+
+    def _mark_dependents(self) -> None:
+        stack = list(self._dependents)
+        while stack:
+            d = stack.pop()
+            if not d.dirty:
+                d.dirty = True
+                stack.extend(d._dependents)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name} v{self.version}>"
+
+
+class Input(Node):
+    def __init__(self, name: str, value: Any = None, eq: Optional[Callable[[Any, Any], bool]] = None) -> None:
+        super().__init__(name)
+        self.value = value
+        self._eq = eq
+
+    def set(self, value: Any) -> bool:
+        """Returns True if the value changed (and dependents were marked dirty)."""
+        same = self._eq(self.value, value) if self._eq else (self.value is value or self.value == value)
+        if same:
+            return False
+        self.value = value
+        self.version += 1
+        self._mark_dependents()
+        return True
+
+    def touch(self) -> None:
+        """Force dependents to recompute even though the value object is the same (e.g. an epoch)."""
+        self.version += 1
+        self._mark_dependents()
+
+
+class Derived(Node):
+    def __init__(self, name: str, fn: Callable[..., Any], deps: Sequence[Node],
+                 eq: Optional[Callable[[Any, Any], bool]] = None) -> None:
+        super().__init__(name)
+        self._fn = fn
+        self._deps = list(deps)
+        self._eq = eq
+        self._seen: Optional[List[int]] = None      # dep versions at last compute
+        self.dirty = True
+        for d in self._deps:
+            d._dependents.append(self)
+
+    def get(self) -> Any:
+        if self.dirty:
+            # Cleared first: an input changed while _fn runs (e.g. an inline task) re-marks it.
+            self.dirty = False
+            values = [d.get() for d in self._deps]
+            seen = [d.version for d in self._deps]
+            if seen != self._seen:
+                new = self._fn(*values)
+                same = self._seen is not None and (self._eq(self.value, new) if self._eq else self.value == new)
+                if not same:
+                    self.value = new
+                    self.version += 1
+                self._seen = seen
+        return self.value
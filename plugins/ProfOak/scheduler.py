@@ -0,0 +1,180 @@
+# plugins/ProfOak/scheduler.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Frame-budgeted housekeeping scheduler
+#
+# What this does
+#  - Runs housekeeping (PC scans, ROM merges, checkpoints, debug dumps,
+#    history imports) as generator tasks. Each `yield` is a point where the
+#    task may be paused; a frame listener resumes tasks until the frame's
+#    time budget (FRAME_BUDGET_MS) is spent, highest priority first.
+#  - Tasks have a key: submitting a key that is already queued is a no-op,
+#    so "rescan the PC" requested by three hooks in a row runs once.
+#  - While no frames are being seen (no bot mode running, the bot build has
+#    no listener support, or a CLI run) tasks run inline to completion, so
+#    behaviour without the frame loop is the same as calling them directly.
+#    Tasks submitted with `on_frame=True` never run inline: they wait for the
+#    first frame (or an explicit `run_all`).
+#
+# Usage
+#       sched = get_scheduler()
+#       sched.submit("pc_scan", self._scan_owned_steps, priority=HIGH)
+#
+# A task is a generator function, or a plain callable (one step). Exceptions
+# are logged and end the task; they never reach the emulator hook.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import time
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from .log import get_logger
+
+try:
+    from modules.modes import BotListener  # type: ignore
+except Exception:  # older bot builds / running outside the bot
+    BotListener = None  # type: ignore
+
+# Priorities: lower runs first
+HIGH = 0      # affects what the player sees now (owned scan after a catch)
+NORMAL = 10   # keeps state correct soon (ROM merge, checkpoint)
+LOW = 20      # can wait (history import, debug dumps)
+
+FRAME_BUDGET_MS = float(os.getenv("PROFOAK_FRAME_BUDGET_MS", "2.0"))
+TICK_STALE_S = 1.0   # no frame for this long: the listener is gone, run inline
+
+_LOG = get_logger("sched", "[ProfOak][sched] ")
+
+TaskFn = Callable[[], Any]
+
+
+class _Task:
+    __slots__ = ("key", "priority", "fn", "gen")
+
+    def __init__(self, key: Hashable, priority: int, fn: TaskFn) -> None:
+        self.key = key
+        self.priority = priority
+        self.fn = fn
+        self.gen: Optional[Iterator[Any]] = None
+
+    def step(self) -> bool:
+        """Run one slice; returns True when the task is finished."""
+        if self.gen is None:
+            res = self.fn()
+            if not hasattr(res, "__next__"):
+                return True  # plain callable: done in one step
+            self.gen = res
+        try:
+            next(self.gen)
+            return False
+        except StopIteration:
+            return True
+
+
+class Scheduler:
+    def __init__(self, budget_ms: float = FRAME_BUDGET_MS) -> None:
+        self.budget_s = max(0.0, budget_ms) / 1000.0
+        self._heap: List[Tuple[int, int, _Task]] = []
+        self._waiting: List[_Task] = []   # on_frame tasks, released by the next tick / run_all
+        self._queued: Dict[Hashable, _Task] = {}
+        self._seq = itertools.count()
+        self._tick_at: Optional[float] = None
+        self._running = False
+        self.steps = 0   # diagnostics: task slices run so far
+
+    # ---- submitting ------------------------------------------------------------
+    def submit(self, key: Hashable, fn: TaskFn, priority: int = NORMAL, on_frame: bool = False) -> bool:
+        """
+        Queue *fn* under *key* unless that key is already queued. Returns True if
+        queued. *on_frame*: never run it inline, even while no frames are seen.
+        """
+        if key in self._queued:
+            return False
+        task = _Task(key, priority, fn)
+        self._queued[key] = task
+        if on_frame:
+            self._waiting.append(task)
+            return True
+        self._push(task)
+        if not self.ticking and not self._running:
+            self._run(None)
+        return True
+
+    def pending(self, key: Hashable) -> bool:
+        return key in self._queued
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    @property
+    def ticking(self) -> bool:
+        return self._tick_at is not None and time.monotonic() - self._tick_at <= TICK_STALE_S
+
+    # ---- running ---------------------------------------------------------------
+    def tick(self) -> None:
+        """One frame: run task slices until the budget is spent (at least one slice)."""
+        self._tick_at = time.monotonic()
+        self._release_waiting()
+        if self._heap:
+            self._run(self._tick_at + self.budget_s)
+
+    def run_all(self) -> None:
+        """Drain the queue now, on_frame tasks included (profile switch, shutdown)."""
+        self._release_waiting()
+        self._run(None)
+
+    def _push(self, task: _Task) -> None:
+        heapq.heappush(self._heap, (task.priority, next(self._seq), task))
+
+    def _release_waiting(self) -> None:
+        waiting, self._waiting = self._waiting, []
+        for task in waiting:
+            self._push(task)
+
+    def _run(self, deadline: Optional[float]) -> None:
+        if self._running:
+            return  # a task submitted more work; the outer loop picks it up
+        self._running = True
+        try:
+            while self._heap:
+                _prio, _seq, task = self._heap[0]
+                try:
+                    done = task.step()
+                except Exception as e:
+                    _LOG.warning("task %s failed: %s", task.key, e)
+                    done = True
+                self.steps += 1
+                if done:
+                    heapq.heappop(self._heap)
+                    self._queued.pop(task.key, None)
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+        finally:
+            self._running = False
+
+
+_SCHEDULER: Optional[Scheduler] = None
+
+
+def get_scheduler() -> Scheduler:
+    """The process-wide scheduler shared by the quota plugin and the navigator."""
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        _SCHEDULER = Scheduler()
+    return _SCHEDULER
+
+
+if BotListener is not None:
+    class SchedulerFrameListener(BotListener):  # type: ignore[misc, valid-type]
+        """Gives the scheduler its per-frame slice from the bot's frame loop."""
+
+        def __init__(self, scheduler: Scheduler) -> None:
+            self._scheduler = scheduler
+
+        def handle_frame(self, bot_mode, frame) -> None:
+            self._scheduler.tick()
+else:
+    SchedulerFrameListener = None  # type: ignore
@@ -11,16 +11,31 @@ Shiny Quota (Prof Oak) with:
 
 from __future__ import annotations
 
-import json
+import os
+import time
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
 
 from modules.plugin_interface import BotPlugin
 from modules.context import context
-from modules.runtime import get_base_path
-from modules.pokemon import Pokemon, Species
+from modules.pokemon import Pokemon
 from modules.battle_state import BattleOutcome
 
+from .capabilities import get_cached_capabilities
+from .estimator import QuotaEstimate, estimate, format_duration
+from .encounter_tables import EncounterTableSnapshot, StaticWildTable, clear_snapshot_cache, snapshot_for_current_map
+from .nav_graph import get_warp_graph
+from .log import DEBUG, INFO, get_logger, lazy, reset_sink, set_level
+from .owned_index import OwnedShinyIndex, shiny_from_mon
+from .persistence import WriteBehindStore
+from .progress import FamilyProgress, QuotaProgressIndex
+from .reactive import Derived, Input
+from .scheduler import HIGH, LOW, NORMAL, SchedulerFrameListener, get_scheduler
+from .species_index import (UNOWN_MASK_AZ, get_species_table, rebuild_species_table, unown_bit_from_name,
+                            unown_mask, unown_names_for_mask)
+from .state_backend import PersistedState, open_state_backend
+from .status import StatusFrameListener, StatusPublisher
+
 PLUGIN_NAME = "ShinyQuota"
 
 # =============================================================================
@@ -37,6 +52,12 @@ REGISTRY_PATH  = JSON_DIR / "shiny_registry.json"      # (optional) per-route pr
 LEARNED_PATH   = JSON_DIR / "learned_by_mapmode.json"  # encountered/species per map+method
 OWNED_SNAPSHOT = JSON_DIR / "owned_shinies.json"       # last PC+party scan
 WILD_DATA_PATH = JSON_DIR / "wild_by_mapmode.json"     # optional static tables
+JOURNAL_PATH   = JSON_DIR / "state_journal.jsonl"      # learn/catch/Unown events since last checkpoint
+SQLITE_PATH    = JSON_DIR / "profoak_state.sqlite3"    # used when STATE_BACKEND = "SQLITE"
+
+# Persistence
+STATE_BACKEND = os.getenv("PROFOAK_STATE_BACKEND", "JSON")   # JSON / SQLITE
+STATE_PROFILE = os.getenv("PROFOAK_PROFILE", "")             # pins the SQLite row partition; default: the loaded bot profile
 
 # Behavior
 GLOBAL_SPECIES_OWNERSHIP = True
@@ -44,39 +65,41 @@ USE_LEARNED_SPECIES_AS_REQUIREMENTS = True
 PREFER_ROM_WHEN_AVAILABLE = True
 PRUNE_LEARNED_WITH_ROM = True           # drop stale learned entries for methods ROM says are empty
 LIVINGDEX_DEFAULT = False
+IMPORT_HISTORY_ON_LOAD = True           # seed learned tables from the profile's stats.db (new rows only)
+PROGRESS_TOP_N = 5                      # "closest to done" quotas listed after a profile load
+SECONDS_PER_ENCOUNTER = 15.0            # until measured: mean time between logged encounters
+ENCOUNTER_GAP_MAX_S = 120.0             # longer gaps (menus, walking, pauses) aren't timed
+REQUIREMENTS_MEMO_SIZE = 64             # (map, method, living, unown letters, ROM read) combos kept in memory
 ON_QUOTA = "TEST"                       # MANUAL / NAVIGATOR / TEST
 
-# Debug
-DEBUG_DUMP = True
+# Debug (ROM dumps; same as PROFOAK_LOG_LEVELS="rom=DEBUG")
+DEBUG_DUMP = False
 
 # Unown configuration
 UNOWN_FORMS: List[str] = [chr(c) for c in range(ord('A'), ord('Z') + 1)]
 UNOWN_LETTERS_PATH: Path = JSON_DIR / "unown_letters_seen.json"
 
+# (map key, method, living-dex flag, Unown letter mask in scope, ROM snapshot generation) -> requirements
+RequirementsKey = Tuple[str, str, bool, int, Optional[int]]
+# (required species, required bitmask, family root -> family bitmask)
+Requirements = Tuple[Set[str], int, Dict[int, int]]
+# ingest_encounters() record: (map key, method, species, Unown letter or None)
+EncounterRecord = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
 # =============================================================================
 #                              Small utilities
 # =============================================================================
-def _log_info(msg: str) -> None:
-    lg = getattr(context, "logger", None) or getattr(context, "log", None)
-    if lg and hasattr(lg, "info"):
-        try: lg.info(msg); return
-        except Exception: pass
-    print(msg)
-
-def _log_warn(msg: str) -> None:
-    lg = getattr(context, "logger", None) or getattr(context, "log", None)
-    for m in ("warning", "warn"):
-        if lg and hasattr(lg, m):
-            try: getattr(lg, m)(msg); return
-            except Exception: pass
-    print(f"WARNING: {msg}")
+_LOG = get_logger("quota", f"[{PLUGIN_NAME}] ")
+_ROM = get_logger("rom", f"[{PLUGIN_NAME}][ROM] ")
+_STATUS = get_logger("status", f"[{PLUGIN_NAME}] ")   # "Missing"/"Quota met" lines, rate-limited
+if DEBUG_DUMP: set_level("rom", DEBUG)
 
 def _notify(msg: str) -> None:
     try:
         n = getattr(context, "notify", None)
         if callable(n): n(msg); return
     except Exception: pass
-    _log_info(f"[{PLUGIN_NAME}] {msg}")
+    _LOG.info("%s", msg)
 
 def _set_status_line(msg: str) -> None:
     try:
@@ -91,6 +114,17 @@ def _emulator_ready() -> bool:
     except Exception:
         return False
 
+def _profile_partition() -> Optional[str]:
+    """SQLite row partition: PROFOAK_PROFILE if set, else the loaded profile's folder (or name)."""
+    if STATE_PROFILE: return STATE_PROFILE
+    try:
+        prof = getattr(context, "profile", None)
+        path = getattr(prof, "path", None)
+        name = Path(path).name if path is not None else getattr(prof, "name", None)
+        return str(name) if name else None
+    except Exception:
+        return None
+
 def _normalize_species(name: Optional[str]) -> Optional[str]:
     return name.strip().upper() if isinstance(name, str) and name.strip() else None
 
@@ -104,19 +138,12 @@ def _normalize_method(m: Optional[str]) -> str:
     # Modes like "Spin" should default to GRASS
     return "GRASS"
 
-def _read_json(path: Path) -> dict:
-    try:
-        if path.exists():
-            return json.loads(path.read_text(encoding="utf-8"))
-    except Exception: pass
-    return {}
+# Dirty JSON documents are written from a background thread (timer, map change, shutdown).
+_SCHED = get_scheduler()   # housekeeping runs in per-frame slices while a bot mode is running
+_STORE = WriteBehindStore(on_error=lambda m: _LOG.warning("%s", m))
 
-def _write_json(path: Path, data: dict) -> None:
-    try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
-    except Exception as e:
-        _log_warn(f"[{PLUGIN_NAME}] Failed to write {path}: {e}")
+# Optional static tables, parsed once and re-read only when the file changes.
+_WILD = StaticWildTable(WILD_DATA_PATH, on_error=lambda m: _LOG.warning("%s", m))
 
 # ======================================================================================
 # Map helpers
@@ -145,175 +172,187 @@ def _get_current_map_group_number() -> Optional[Tuple[int, int]]:
 # ROM encounter integration + debug
 # ======================================================================================
 
-def _species_from_rom_for_current(method: str) -> Optional[Set[str]]:
-    """Return species set for *current method* from ROM. None means ROM couldn’t be read."""
-    import traceback as _tb
-    def _dbg(m: str): 
-        if DEBUG_DUMP: _log_info(f"[{PLUGIN_NAME}][ROM] {m}")
+def _rom_dbg(m: str) -> None:
+    _ROM.debug("%s", m)
 
-    try:
-        import modules.map as mapmod
-        _dbg(f"Imported modules.map = {mapmod!r}")
-    except Exception as e:
-        _dbg(f"import modules.map failed: {e}")
-        _dbg(_tb.format_exc()); return None
-
-    eff_fn = getattr(mapmod, "get_effective_encounter_rates_for_current_map", None)
-    _dbg(f"has get_effective_encounter_rates_for_current_map: {callable(eff_fn)}")
-    if not callable(eff_fn): return None
+def _current_rom_snapshot() -> Optional[EncounterTableSnapshot]:
+    """Snapshot of the current map's ROM tables (read once per map, LRU-cached)."""
+    return snapshot_for_current_map(_get_current_map_group_number(), debug=_rom_dbg if _ROM.is_enabled(DEBUG) else None)
 
-    try:
-        eff = eff_fn()
-        _dbg(f"effective() returned: {type(eff).__name__}")
-        if eff is None: 
-            _dbg("effective() is None"); return None
-    except Exception as e:
-        _dbg(f"effective() raised: {e}")
-        _dbg(_tb.format_exc()); return None
-
-    we = getattr(eff, "regular_encounters", None)
-    _dbg(f"regular_encounters present: {we is not None} ({type(we).__name__ if we is not None else 'None'})")
-    if we is None: return None
-
-    def names(enc_list) -> Set[str]:
-        s: Set[str] = set()
-        for e in enc_list or []:
-            sp = getattr(e, "species", None)
-            nm = getattr(sp, "name", None) if sp is not None else None
-            nm = _normalize_species(nm)
-            if nm: s.add(nm)
-        return s
-
-    m = _normalize_method(method)
-    _dbg(f"normalized method = {m}")
+def _rod_in_use() -> Optional[str]:
+    """Best rod in the bag per the cached capabilities (None = unknown; rates fall back to the map's best)."""
+    caps = get_cached_capabilities()
+    for attr, rod in (("has_super_rod", "SUPER_ROD"), ("has_good_rod", "GOOD_ROD"), ("has_old_rod", "OLD_ROD")):
+        if getattr(caps, attr, False): return rod
+    return None
 
-    try:
-        if m == "GRASS":      return names(getattr(we, "land_encounters", []))
-        if m == "SURF":       return names(getattr(we, "surf_encounters", []))
-        if m == "ROCK_SMASH": return names(getattr(we, "rock_smash_encounters", []))
-        if m == "ROD":
-            a = names(getattr(we, "old_rod_encounters", []))
-            b = names(getattr(we, "good_rod_encounters", []))
-            c = names(getattr(we, "super_rod_encounters", []))
-            return a | b | c
-    except Exception as e:
-        _dbg(f"while mapping method tables: {e}")
-        _dbg(_tb.format_exc())
-        return None
-    return set()
+def _species_from_rom_for_current(method: str) -> Optional[Set[str]]:
+    """Return species set for *current method* from ROM. None means ROM couldn’t be read."""
+    snap = _current_rom_snapshot()
+    if snap is None: return None
+    return set(snap.species_for(_normalize_method(method)))
 
 def _rom_table_summary_for_current() -> Optional[Dict[str, List[str]]]:
     """Return {METHOD: [species]} for all buckets on current map, or None if ROM not readable."""
-    import traceback as _tb
-    def _dbg(m: str): 
-        if DEBUG_DUMP: _log_info(f"[{PLUGIN_NAME}][ROM] {m}")
-
-    try:
-        import modules.map as mapmod
-    except Exception as e:
-        _dbg(f"import modules.map failed: {e}")
-        _dbg(_tb.format_exc()); return None
-
-    eff_fn = getattr(mapmod, "get_effective_encounter_rates_for_current_map", None)
-    if not callable(eff_fn): return None
-    try:
-        eff = eff_fn()
-        if eff is None: return None
-    except Exception:
-        return None
-
-    we = getattr(eff, "regular_encounters", None)
-    if we is None: return None
-
-    def to_list(enc_list) -> List[str]:
-        s: Set[str] = set()
-        for e in enc_list or []:
-            sp = getattr(e, "species", None)
-            nm = getattr(sp, "name", None) if sp is not None else None
-            nm = _normalize_species(nm)
-            if nm: s.add(nm)
-        return sorted(s)
-
-    grass = to_list(getattr(we, "land_encounters", []))
-    surf  = to_list(getattr(we, "surf_encounters", []))
-    rock  = to_list(getattr(we, "rock_smash_encounters", []))
-    rod   = sorted(set().union(
-        to_list(getattr(we, "old_rod_encounters", [])),
-        to_list(getattr(we, "good_rod_encounters", [])),
-        to_list(getattr(we, "super_rod_encounters", [])),
-    ))
-    if DEBUG_DUMP:
-        _log_info(f"[{PLUGIN_NAME}][ROM] summary counts — GRASS={len(grass)}, SURF={len(surf)}, ROCK_SMASH={len(rock)}, ROD={len(rod)}")
-    return {"GRASS": grass, "SURF": surf, "ROCK_SMASH": rock, "ROD": rod}
+    snap = _current_rom_snapshot()
+    if snap is None: return None
+    summary = snap.summary()
+    _ROM.debug("summary counts — %s", lazy(lambda: ", ".join(f"{m}={len(v)}" for m, v in summary.items())))
+    return summary
 
 def _dump_rom_debug(tag: str = "") -> None:
-    if not DEBUG_DUMP: return
+    if _ROM.is_enabled(DEBUG):
+        _SCHED.submit(("rom_dump", tag), lambda: _dump_rom_debug_now(tag), LOW)
+
+def _dump_rom_debug_now(tag: str) -> None:
     try:
-        g_n = _get_current_map_group_number()
-        _log_info(f"[{PLUGIN_NAME}][ROM][{tag}] map_group_number={g_n}")
+        _ROM.debug("[%s] map_group_number=%s", tag, _get_current_map_group_number())
     except Exception:
         pass
     summary = _rom_table_summary_for_current()
     if summary is None:
-        _log_info(f"[{PLUGIN_NAME}][ROM][{tag}] summary=None")
+        _ROM.debug("[%s] summary=None", tag)
         return
     def pv(lst: List[str]) -> str: return ", ".join(lst[:10]) + (" …" if len(lst) > 10 else "")
-    _log_info(f"[{PLUGIN_NAME}][ROM][{tag}] GRASS: {len(summary['GRASS'])} [{pv(summary['GRASS'])}]")
-    _log_info(f"[{PLUGIN_NAME}][ROM][{tag}] SURF: {len(summary['SURF'])} [{pv(summary['SURF'])}]")
-    _log_info(f"[{PLUGIN_NAME}][ROM][{tag}] ROCK_SMASH: {len(summary['ROCK_SMASH'])} [{pv(summary['ROCK_SMASH'])}]")
-    _log_info(f"[{PLUGIN_NAME}][ROM][{tag}] ROD: {len(summary['ROD'])} [{pv(summary['ROD'])}]")
+    for meth in ("GRASS", "SURF", "ROCK_SMASH", "ROD"):
+        _ROM.debug("[%s] %s: %d [%s]", tag, meth, len(summary[meth]), pv(summary[meth]))
 
 
 # =============================================================================
 #                                  Plugin
 # =============================================================================
+def _input_property(cell: str) -> property:
+    """Plain attribute on the outside, reactive Input cell on the inside."""
+    return property(lambda self: getattr(self, cell).value,
+                    lambda self, v: getattr(self, cell).set(v))
+
+
 class ShinyQuotaPlugin(BotPlugin):
     name = PLUGIN_NAME
     version = "3.4.0"
     description = "Pauses (or navigates) when the shiny quota for the current map+method is complete."
     author = "you"
 
+    # Inputs of the derived-state graph (see _build_graph); assigning an equal value is free.
+    current_map_key = _input_property("_in_map")
+    current_method = _input_property("_in_method")
+    livingdex_enabled = _input_property("_in_living")
+    owned_mask = _input_property("_in_owned")     # bit per owned species index (species_index)
+
     def __init__(self) -> None:
-        self.registry: Dict[str, Dict[str, List[int]]] = _read_json(REGISTRY_PATH) or {"default": {}}
-        self.learned: Dict[str, Dict[str, List[str]]] = _read_json(LEARNED_PATH) or {}
+        self._build_graph()
+        self._state = open_state_backend(
+            STATE_BACKEND, registry_path=REGISTRY_PATH, learned_path=LEARNED_PATH,
+            owned_path=OWNED_SNAPSHOT, unown_path=UNOWN_LETTERS_PATH, journal_path=JOURNAL_PATH,
+            sqlite_path=SQLITE_PATH, profile=STATE_PROFILE or "default", store=_STORE,
+            on_error=lambda m: _LOG.warning("%s", m),
+        )
+        self._apply_persisted(self._state.load())
         self.current_map_key: Optional[str] = None
         self.current_method: str = "GRASS"
         self.livingdex_enabled: bool = LIVINGDEX_DEFAULT
-        self.owned_species_global: Set[str] = set()
-        self.owned_counts_global: Dict[str, int] = {}
+        self._progress = QuotaProgressIndex()        # every learned (map, method) quota
+        self._families = FamilyProgress()            # have/need per family of the current route
+        self._families_bound: Optional[Dict[int, int]] = None
+        self._unsaved_catches: List[Tuple[str, Optional[str]]] = []   # (species, Unown letter), see _save_catches
+        self._quota_check_after_scan: bool = False   # a catch couldn't be read; decide once the owned scan ran
         self.required_species_route: Set[str] = set()
-        self.required_families_current: Dict[int, Tuple[int, Set[str]]] = {}
-        self.unown_letters_seen: Dict[str, Set[str]] = {}
-        self._load_unown_letters_seen()
-        _log_info(f"[{PLUGIN_NAME}] Initialized. Learned: {LEARNED_PATH.name}, Owned: {OWNED_SNAPSHOT.name}")
+        self.required_mask: int = 0
+        self.required_family_masks: Dict[int, int] = {}
+        self._req_memo: Dict[RequirementsKey, Requirements] = {}
+        self._req_source: str = "NONE"
+        self._wild_generation: int = _WILD.generation
+        self._route_rates: Dict[Tuple[str, str], Dict[str, float]] = {}   # slot rates of visited tables
+        self._last_encounter_at: Optional[float] = None
+        self._seconds_per_encounter: float = SECONDS_PER_ENCOUNTER       # EWMA of encounter spacing
+        self._printed_status: Optional[int] = None   # version of _d_status last printed
+        self._status_line = StatusPublisher(_set_status_line)
+        self._recompute_owned_mask()
+        self._maybe_checkpoint()
+        _LOG.info("Initialized. State: %s, Learned: %s, Owned: %s", self._state.name, LEARNED_PATH.name, OWNED_SNAPSHOT.name)
+
+    # ---- derived-state graph ---------------------------------------------------
+    def _build_graph(self) -> None:
+        """
+        Inputs:  map, method, living flag, owned mask, ROM snapshot, and an
+                 epoch bumped whenever learned/static/Unown data changes.
+        Derived: Unown letters in scope -> requirements -> status. Each
+                 recomputes on first read after an input it depends on changed.
+        """
+        self._in_map = Input("map", None)
+        self._in_method = Input("method", "GRASS")
+        self._in_living = Input("living", LIVINGDEX_DEFAULT)
+        self._in_owned = Input("owned", 0)
+        self._in_rom = Input("rom", None)
+        self._in_epoch = Input("epoch", None)   # no value; touch() it when learned/static/Unown data changes
+        self._d_letters = Derived(
+            "unown_mask",
+            lambda mk, living, _e: self._unown_mask_for_map(mk) if living and mk else 0,
+            (self._in_map, self._in_living, self._in_epoch))
+        self._d_requirements = Derived(
+            "requirements", self._compute_requirements,
+            (self._in_map, self._in_method, self._in_living, self._d_letters, self._in_rom, self._in_epoch))
+        self._d_status = Derived(
+            "status",
+            lambda mk, meth, req, owned: (mk, meth, (req[1] & owned).bit_count(), req[1].bit_count()),
+            (self._in_map, self._in_method, self._d_requirements, self._in_owned))
+
+    def _refresh_rom_input(self) -> None:
+        self._in_rom.set(_current_rom_snapshot())
 
     # ---- hooks ---------------------------------------------------------------
     def get_additional_bot_modes(self) -> Iterable[type]: return ()
 
+    def get_additional_bot_listeners(self) -> Iterable[Any]:
+        out: List[Any] = []
+        if SchedulerFrameListener is not None: out.append(SchedulerFrameListener(_SCHED))
+        if StatusFrameListener is not None: out.append(StatusFrameListener(self._status_line))
+        return out
+
     def on_profile_loaded(self, *_a, **_k) -> None:
+        _SCHED.run_all()   # finish the previous profile's housekeeping first
+        self._save_catches()
+        self._use_profile_partition()
+        reset_sink()
+        _STATUS.forget()
+        self._status_line.reset()
+        get_warp_graph().reset_rom()
         self._refresh_current_map()
         self._refresh_method()
+        clear_snapshot_cache()
+        rebuild_species_table()
+        self._recompute_owned_mask()  # indices of non-dex names may differ in the new table
         if _emulator_ready():
-            self._refresh_owned_species_global(write_out=True)
+            self._request_owned_scan(write_out=True)
         else:
-            _log_warn(f"[{PLUGIN_NAME}] Emulator not ready; will scan PC/party later.")
-        if DEBUG_DUMP: _dump_rom_debug("on_profile_loaded")
-        self._rebuild_route_requirements()
-        self._rebuild_requirements_cache()
+            _LOG.warning("Emulator not ready; will scan PC/party later.")
+        if IMPORT_HISTORY_ON_LOAD: self._import_history()
+        self._rebuild_progress()
+        self._refresh_rom_input()
+        _dump_rom_debug("on_profile_loaded")
+        self._invalidate_requirements()
+        self._ensure_requirements()
+        self._printed_status = None
         self._print_missing_now()
+        self._log_progress()
 
     def on_mode_changed(self, *a, **k) -> None:
         self._refresh_method()
-        if DEBUG_DUMP: _dump_rom_debug("on_mode_changed")
-        self._rebuild_route_requirements()
-        self._rebuild_requirements_cache()
+        if self._in_rom.value is None: self._refresh_rom_input()
+        _dump_rom_debug("on_mode_changed")
+        self._ensure_requirements()
         self._print_missing_now()
 
     def on_map_changed(self, *a, **k) -> None:
+        get_warp_graph().record_current()   # routing data for the navigator
+        self._save_catches()
+        self._maybe_checkpoint()
+        self._state.request_flush()
         self._refresh_current_map()
-        if DEBUG_DUMP: _dump_rom_debug("on_map_changed")
-        self._rebuild_route_requirements()
-        self._rebuild_requirements_cache()
+        self._refresh_rom_input()
+        self._sync_learned_for_current_map()
+        _dump_rom_debug("on_map_changed")
+        self._ensure_requirements()
         self._print_missing_now()
 
     def _method_from_encounter(self, encounter) -> Optional[str]:
@@ -350,44 +389,66 @@ class ShinyQuotaPlugin(BotPlugin):
             else: self._refresh_method()
 
             letter = getattr(mon, "unown_letter", None) if nm == "UNOWN" else None
+            self._time_encounter()
 
             self._commit_learn(nm, letter=letter)
-            self._rebuild_route_requirements()
-            self._rebuild_requirements_cache()
+            if self._in_rom.value is None: self._refresh_rom_input()
+            self._ensure_requirements()
             self._print_missing_now()
         except Exception as e:
-            _log_warn(f"[{PLUGIN_NAME}] on_logging_encounter failed: {e}")
+            _LOG.warning("on_logging_encounter failed: %s", e)
 
     def on_pokemon_caught(self, mon: Pokemon, *a, **k) -> None:
+        """
+        Delta path: index the catch, bump the owned/progress/family counters and
+        decide the quota right away. Map and method are already current (map,
+        mode and encounter hooks keep them); the write waits for battle end.
+        """
         try:
             if not getattr(mon, "is_shiny", False): return
-            self._refresh_current_map()
-            self._refresh_method()
-
-            raw_letter = getattr(mon, "unown_letter", None)
-            nm = _normalize_species(getattr(mon, "species_name", None) or getattr(getattr(mon, "species", None), "name", None))
-
-            if nm == "UNOWN" or (not nm and isinstance(raw_letter, str) and raw_letter.strip()):
-                self._record_unown_letter(raw_letter)
-
-            if nm:
-                if nm == "UNOWN" and isinstance(raw_letter, str) and raw_letter.strip():
-                    self._bump_owned(f"UNOWN-{raw_letter.strip().upper()}")
-                self._bump_owned(nm)
-                _write_json(OWNED_SNAPSHOT, {"species": sorted(self.owned_species_global), "counts": self.owned_counts_global})
+            if not self.current_map_key: self._refresh_current_map()
+
+            sh = shiny_from_mon(mon)
+            if sh is None:
+                # species or PV unreadable: record the letter if any, then trust a full scan
+                self._record_unown_letter(getattr(mon, "unown_letter", None))
+                self._quota_check_after_scan = True   # the quota decision waits for the scan
+                self._request_owned_scan(write_out=True)
             else:
-                self._refresh_owned_species_global(write_out=True)
-
-            self._rebuild_route_requirements()
-            self._rebuild_requirements_cache()
+                if sh.letter: self._record_unown_letter(sh.letter)
+                before = len(self._owned_index)
+                self._owned_index.add_caught(sh)
+                if len(self._owned_index) > before:  # the same mon reported twice counts once
+                    for n in sh.names():
+                        self._bump_owned(n)
+                    self._unsaved_catches.append((sh.species, sh.letter))
+
+            self._ensure_requirements()
+            if sh is not None:   # else the owned scan decides (inline or a few frames later)
+                self._maybe_quota_action()
             self._print_missing_now()
-            self._maybe_quota_action()
         except Exception as e:
-            _log_warn(f"[{PLUGIN_NAME}] on_pokemon_caught error: {e}")
+            _LOG.warning("on_pokemon_caught error: %s", e)
 
     def on_battle_ended(self, outcome: BattleOutcome) -> None:
         self._refresh_current_map()
         self._refresh_method()
+        self._save_catches()
+        self._maybe_checkpoint()
+
+    # ---- control (used by prof_oak_mode) ---------------------------------------
+    def set_livingdex_enabled(self, enabled: bool) -> None:
+        if bool(enabled) == self.livingdex_enabled: return
+        self.livingdex_enabled = bool(enabled)
+        self._invalidate_requirements()
+        self._rebuild_progress()
+
+    def force_refresh(self) -> None:
+        _STATUS.forget()
+        self._printed_status = None
+        self._refresh_rom_input()
+        self._ensure_requirements()
+        self._print_missing_now()
 
     # ---- core ----------------------------------------------------------------
     def _commit_learn(self, species: str, letter: Optional[str] = None) -> None:
@@ -399,27 +460,161 @@ class ShinyQuotaPlugin(BotPlugin):
         if species not in cur:
             cur.add(species)
             per_map[self.current_method] = sorted(cur)
-            _write_json(LEARNED_PATH, self.learned)
-            _log_info(f"[{PLUGIN_NAME}] Learned {species} on {self.current_map_key} ({self.current_method}).")
-
-    def _load_unown_letters_seen(self) -> None:
-        raw = _read_json(UNOWN_LETTERS_PATH)
-        if not isinstance(raw, dict):
+            self._state.record_learn(self.current_map_key, self.current_method, species)
+            self._maybe_checkpoint()
+            self._invalidate_requirements(self.current_map_key)
+            self._touch_progress(self.current_map_key, (self.current_method,))
+            _LOG.info("Learned %s on %s (%s).", species, self.current_map_key, self.current_method)
+
+    # ---- bulk ingestion ----------------------------------------------------------
+    def ingest_encounters(self, records: Iterable[Any]) -> int:
+        """
+        Backfill learned tables (and Unown letters) from a stream of encounters,
+        e.g. an old encounter log. Records are (map, method, species, letter)
+        tuples or mappings with those keys; letter may be omitted/None.
+        Updates memory in one pass and persists once at the end.
+        Returns the number of new (map, method, species) entries.
+        """
+        norm_cache: Dict[Any, Optional[str]] = {}
+        meth_cache: Dict[Any, str] = {}
+        sets: Dict[Tuple[str, str], Set[str]] = {}
+        added: Dict[str, Dict[str, Set[str]]] = {}
+        letters_added: Dict[str, Set[str]] = {}
+
+        def norm(x) -> Optional[str]:
+            try: return norm_cache[x]
+            except KeyError: pass
+            except TypeError: return _normalize_species(x)
+            n = norm_cache[x] = _normalize_species(x)
+            return n
+
+        for rec in records:
+            if isinstance(rec, Mapping):
+                mk, meth, sp, letter = rec.get("map"), rec.get("method"), rec.get("species"), rec.get("letter")
+            else:
+                try: mk, meth, sp, letter = (tuple(rec) + (None,))[:4]
+                except (TypeError, ValueError): continue
+            mk, sp = norm(mk), norm(sp)
+            if not mk or not sp: continue
+            try: m = meth_cache[meth]
+            except (KeyError, TypeError):
+                m = _normalize_method(meth)
+                try: meth_cache[meth] = m
+                except TypeError: pass
+
+            cur = sets.get((mk, m))
+            if cur is None:
+                cur = sets[(mk, m)] = set(self.learned.get(mk, {}).get(m, []))
+            if sp not in cur:
+                cur.add(sp)
+                added.setdefault(mk, {}).setdefault(m, set()).add(sp)
+            if sp == "UNOWN":
+                l = norm(letter)
+                if l:
+                    seen = self.unown_letters_seen.setdefault(mk, set())
+                    if l not in seen:
+                        seen.add(l)
+                        self._unown_seen_masks[mk] = self._unown_seen_masks.get(mk, 0) | unown_mask((l,))
+                        letters_added.setdefault(mk, set()).add(l)
+
+        n_new = 0
+        for mk, per in added.items():
+            per_map = self.learned.setdefault(mk, {})
+            for m, new in per.items():
+                per_map[m] = sorted(sets[(mk, m)])
+                n_new += len(new)
+        if added or letters_added:
+            self._state.record_bulk(added, letters_added)
+            self._maybe_checkpoint()
+            self._state.request_flush()
+            for mk in set(added) | set(letters_added):
+                self._invalidate_requirements(mk)
+                self._touch_progress(mk, self.learned.get(mk, {}))
+            self._ensure_requirements()
+            _LOG.debug("Ingested encounters: %d new species entries on %d map(s), %d new Unown letter(s).",
+                      n_new, len(added), sum(len(v) for v in letters_added.values()))
+        return n_new
+
+    def after_state_saved(self, fn: Callable[[], None]) -> None:
+        """Run *fn* once everything recorded so far is on disk (e.g. a history-import watermark)."""
+        self._checkpoint_now()   # the JSON backend keeps bulk learns in the next checkpoint
+        self._state.after_writes(fn)
+
+    def _import_history(self) -> None:
+        """Ingest encounters the bot logged (this profile's stats.db) since the last import."""
+        try:
+            prof = getattr(context, "profile", None)
+            path = getattr(prof, "path", None)
+            if path is None: return
+            from .history_import import import_history_steps
+        except Exception as e:
+            _LOG.warning("Encounter history import failed: %s", e)
             return
-        for map_key, letters in raw.items():
-            if not isinstance(map_key, str):
-                continue
-            bucket: Set[str] = set()
-            if isinstance(letters, list):
-                for entry in letters:
-                    if isinstance(entry, str) and entry.strip():
-                        bucket.add(entry.strip().upper())
-            if bucket:
-                self.unown_letters_seen[map_key] = bucket
-
-    def _persist_unown_letters_seen(self) -> None:
-        serializable = {mk: sorted(letters) for mk, letters in self.unown_letters_seen.items() if letters}
-        _write_json(UNOWN_LETTERS_PATH, serializable)
+
+        def task():
+            added = yield from import_history_steps(self, Path(path))
+            if added:
+                _LOG.info("Imported encounter history: %d new learned entries.", added)
+        _SCHED.submit("history_import", task, LOW, on_frame=True)   # starts on the first frame, never inline
+
+    # ---- persistence (backend: JSON journal + checkpoints, or SQLite) --------
+    def _apply_persisted(self, loaded: PersistedState) -> None:
+        """Adopt freshly loaded state (startup, or a switch to another profile's rows)."""
+        self.registry: Dict[str, Dict[str, List[int]]] = loaded.registry
+        self.learned: Dict[str, Dict[str, List[str]]] = loaded.learned
+        self.owned_species_global: Set[str] = set(loaded.owned_counts)
+        self.owned_counts_global: Dict[str, int] = dict(loaded.owned_counts)
+        self._owned_index = OwnedShinyIndex()
+        self._owned_scanned: bool = False
+        self.unown_letters_seen: Dict[str, Set[str]] = loaded.unown_letters
+        self._unown_seen_masks: Dict[str, int] = {mk: unown_mask(l) for mk, l in self.unown_letters_seen.items()}
+        self._unown_learned_masks: Dict[str, int] = {}   # fallback: "UNOWN-X" entries in learned lists (lazy)
+
+    def _use_profile_partition(self) -> None:
+        """Point the backend at the loaded profile's rows (SQLite), reloading state if they differ."""
+        if self._state.use_profile(_profile_partition()):
+            self._apply_persisted(self._state.load())
+            self._recompute_owned_mask()
+            _LOG.info("State partition: %s", self._state.profile)
+
+    def _persisted_state(self) -> PersistedState:
+        """Private copy of everything the backend persists (checkpoint contents)."""
+        return PersistedState(
+            registry=self.registry,
+            learned={mk: dict(per) for mk, per in self.learned.items()},
+            unown_letters={mk: set(letters) for mk, letters in self.unown_letters_seen.items()},
+            owned_counts=dict(self.owned_counts_global),
+        )
+
+    def _maybe_checkpoint(self) -> None:
+        if self._state.wants_checkpoint():
+            _SCHED.submit("checkpoint", self._checkpoint_now, NORMAL)
+
+    def _checkpoint_now(self) -> None:
+        if self._state.wants_checkpoint():
+            self._save_catches()  # journal them before compaction, or a replay would count them twice
+            self._state.checkpoint(self._persisted_state())
+
+    def _save_catches(self) -> None:
+        """Write catches the on-catch fast path only applied in memory."""
+        pending, self._unsaved_catches = self._unsaved_catches, []
+        for species, letter in pending:
+            self._state.record_catch(species, letter)
+
+    def _sync_learned_for_current_map(self) -> None:
+        """Pick up rows another process learned for this map (shared SQLite store only)."""
+        mk = self.current_map_key
+        if not mk: return
+        fresh = self._state.learned_for_map(mk)
+        if fresh is None: return
+        mine = self.learned.get(mk, {})
+        if any(set(v) - set(mine.get(m, [])) for m, v in fresh.items()):
+            merged = dict(mine)
+            for m, v in fresh.items():
+                merged[m] = sorted(set(mine.get(m, [])) | set(v))
+            self.learned[mk] = merged
+            self._invalidate_requirements(mk)
+            self._touch_progress(mk, merged)
 
     def _record_unown_letter(self, letter: Optional[str]) -> bool:
         if not self.current_map_key:
@@ -431,37 +626,44 @@ class ShinyQuotaPlugin(BotPlugin):
         if normalized in letters:
             return False
         letters.add(normalized)
-        self._persist_unown_letters_seen()
+        mk = self.current_map_key
+        self._unown_seen_masks[mk] = self._unown_seen_masks.get(mk, 0) | unown_mask((normalized,))
+        self._state.record_unown(self.current_map_key, normalized)
+        self._maybe_checkpoint()
+        self._in_epoch.touch()
+        if self.livingdex_enabled:
+            self._touch_progress(self.current_map_key, self.learned.get(self.current_map_key, {}))
         return True
 
-    def _unown_letters_for_current_map(self) -> Set[str]:
-        letters: Set[str] = set()
-        if self.current_map_key:
-            letters.update(self.unown_letters_seen.get(self.current_map_key, set()))
-            if not letters:
-                per_map = self.learned.get(self.current_map_key, {})
-                for lst in per_map.values():
+    def _unown_mask_for_map(self, map_key: Optional[str]) -> int:
+        """Letters seen on the map, else "UNOWN-X" entries learned there, else A..Z."""
+        if map_key:
+            m = self._unown_seen_masks.get(map_key, 0)
+            if m: return m
+            m = self._unown_learned_masks.get(map_key)
+            if m is None:
+                m = 0
+                for lst in self.learned.get(map_key, {}).values():
                     for species in lst:
-                        if isinstance(species, str) and species.startswith("UNOWN-"):
-                            letters.add(species.split("-", 1)[1].strip().upper())
-        if not letters:
-            return set(UNOWN_FORMS)
-        return {ltr.strip().upper() for ltr in letters if isinstance(ltr, str) and ltr.strip()}
+                        if isinstance(species, str): m |= unown_bit_from_name(species)
+                self._unown_learned_masks[map_key] = m
+            if m: return m
+        return UNOWN_MASK_AZ
 
-    def _expand_unown_if_needed(self, species_set: Set[str]) -> Set[str]:
+    def _expand_unown_if_needed(self, species_set: Set[str], map_key: Optional[str] = None) -> Set[str]:
         if not self.livingdex_enabled: return species_set
         if "UNOWN" not in species_set: return species_set
         expanded = set(s for s in species_set if s != "UNOWN")
-        for letter in sorted(self._unown_letters_for_current_map()):
-            expanded.add(f"UNOWN-{letter}")
+        expanded.update(unown_names_for_mask(self._unown_mask_for_map(map_key or self.current_map_key)))
         return expanded
 
     def _merge_rom_into_learned(self, map_key: str) -> None:
         """ROM MERGE/PRUNE: seed learned JSON from ROM summary and prune stale buckets."""
+        if map_key != self.current_map_key: return  # left the map before the merge ran; redone on return
         summary = _rom_table_summary_for_current()
         if summary is None: return
         per = self.learned.setdefault(map_key, {})
-        changed = False
+        changed: List[str] = []
 
         # Merge
         for meth, lst in summary.items():
@@ -469,21 +671,75 @@ class ShinyQuotaPlugin(BotPlugin):
             before = len(ss)
             ss.update(lst)
             if len(ss) != before:
-                per[meth] = sorted(ss); changed = True
+                per[meth] = sorted(ss); changed.append(meth)
 
         # Prune methods that have no ROM entries (avoid stale mis-learns)
         if PRUNE_LEARNED_WITH_ROM:
             for meth in ("GRASS", "SURF", "ROCK_SMASH", "ROD"):
                 if meth not in summary or len(summary[meth]) == 0:
                     if per.get(meth):
-                        per[meth] = []; changed = True
+                        per[meth] = []; changed.append(meth)
 
         if changed:
-            _write_json(LEARNED_PATH, self.learned)
-            _log_info(f"[{PLUGIN_NAME}] Learned JSON updated from ROM for {map_key}.")
+            self._unown_learned_masks.pop(map_key, None)
+            self._in_epoch.touch()   # Unown letters/requirements read the learned lists
+            for meth in changed:
+                self._state.record_method(map_key, meth, per[meth])
+            self._maybe_checkpoint()
+            self._touch_progress(map_key, changed)
+            _LOG.info("Learned JSON updated from ROM for %s.", map_key)
+
+    # ---- memoized requirements -----------------------------------------------
+    def _invalidate_requirements(self, map_key: Optional[str] = None) -> None:
+        """Drop memoized requirements (all of them, or only those for *map_key*)."""
+        if map_key is None:
+            self._req_memo.clear()
+            self._unown_learned_masks.clear()
+        else:
+            self._unown_learned_masks.pop(map_key, None)
+            for k in [k for k in self._req_memo if k[0] == map_key]:
+                del self._req_memo[k]
+        self._in_epoch.touch()
+
+    def _ensure_requirements(self) -> None:
+        """Bring required_* up to date; a no-op unless an input of the requirements node changed."""
+        if not self.current_map_key: self._refresh_current_map()
+        if not self.current_method:  self._refresh_method()
+        _WILD.refresh()
+        if _WILD.generation != self._wild_generation:
+            self._wild_generation = _WILD.generation
+            self._invalidate_requirements()
+        route, mask, fams = self._d_requirements.get()
+        if self._d_requirements.dirty:   # an inline ROM merge changed learned lists mid-compute
+            route, mask, fams = self._d_requirements.get()
+        if fams is not self._families_bound:   # new requirement set; catches adjust it in place
+            self._families.bind(fams, self.owned_mask)
+            self._families_bound = fams
+        self.required_species_route, self.required_mask, self.required_family_masks = route, mask, fams
+
+    def _compute_requirements(self, map_key, method, living, letters, rom, _epoch) -> Requirements:
+        if map_key:
+            # ROM MERGE/PRUNE on every recompute, memo hit or not (the requirements read the ROM directly, so this can wait)
+            _SCHED.submit(("rom_merge", map_key), lambda: self._merge_rom_into_learned(map_key), NORMAL)
+        rom_gen = rom.generation if rom is not None else None
+        key: Optional[RequirementsKey] = (map_key, method, living, letters, rom_gen) if map_key else None
+        hit = self._req_memo.get(key) if key is not None else None
+        if hit is not None:
+            return hit
+        self._rebuild_route_requirements()
+        self._rebuild_requirements_cache()
+        req = (self.required_species_route, self.required_mask, self.required_family_masks)
+        # Only ROM results are memoized: a LEARNED/STATIC/EMPTY fallback must be
+        # recomputed once the ROM becomes readable, since the ROM is authoritative.
+        if key is not None and self._req_source == "ROM":
+            if len(self._req_memo) >= REQUIREMENTS_MEMO_SIZE:
+                del self._req_memo[next(iter(self._req_memo))]
+            self._req_memo[key] = req
+        return req
 
     def _rebuild_route_requirements(self) -> None:
         self.required_species_route = set()
+        self._req_source = "NONE"
         if not self.current_map_key: self._refresh_current_map()
         if not self.current_method:  self._refresh_method()
         if not self.current_map_key: return
@@ -491,23 +747,19 @@ class ShinyQuotaPlugin(BotPlugin):
         map_key = self.current_map_key
         method  = self.current_method
 
-        # Always try to sync learned with ROM when available
-        self._merge_rom_into_learned(map_key)  # ROM MERGE/PRUNE
-
         learned_set: Set[str] = set()
         if USE_LEARNED_SPECIES_AS_REQUIREMENTS:
             learned_set = {s for s in (self.learned.get(map_key, {}).get(method, [])) if s}
 
-        static_set: Set[str] = set()
-        if WILD_DATA_PATH.exists():
-            try:
-                wild = json.loads(WILD_DATA_PATH.read_text(encoding="utf-8"))
-                static_set = {s.upper() for s in wild.get(map_key, {}).get(method, [])}
-            except Exception as e:
-                _log_warn(f"[{PLUGIN_NAME}] wild-data read failed: {e}")
+        static_set: Set[str] = set(_WILD.species_for(map_key, method))
 
         # AUTHORITATIVE ROM (even when empty)
         rom_read = _species_from_rom_for_current(method)  # None = not readable; set() allowed
+        snap = _current_rom_snapshot() if rom_read is not None else None
+        if snap is not None:
+            rod = _rod_in_use()
+            for meth in ("GRASS", "SURF", "ROCK_SMASH", "ROD"):
+                self._route_rates[(map_key, meth)] = snap.rates_for(meth, rod)
         selected: Set[str]; selected_src = "NONE"
         if PREFER_ROM_WHEN_AVAILABLE and rom_read is not None:
             selected, selected_src = rom_read, "ROM"
@@ -518,27 +770,108 @@ class ShinyQuotaPlugin(BotPlugin):
         else:
             selected, selected_src = set(), "EMPTY"
 
-        if DEBUG_DUMP:
-            _log_info(f"[{PLUGIN_NAME}] requirements source = {selected_src} on {map_key} ({method})")
-            _dump_rom_debug("rebuild_requirements")
+        _LOG.debug("requirements source = %s on %s (%s)", selected_src, map_key, method)
+        _dump_rom_debug("rebuild_requirements")
 
         self.required_species_route = self._expand_unown_if_needed(selected)
+        self._req_source = selected_src
 
         if selected_src == "EMPTY":
-            _log_warn(f"No learned/spec data for {map_key} ({method}); quota will activate after first encounters.")
+            _LOG.warning("No learned/spec data for %s (%s); quota will activate after first encounters.", map_key, method)
 
     def _rebuild_requirements_cache(self) -> None:
-        self.required_families_current.clear()
-        if not self.required_species_route: return
-
-        fam_to_members: Dict[int, Set[str]] = {}
+        """Bitmasks for the required species: the whole route and per family root."""
+        # Fresh dict (not clear()): the previous one may be shared with the memo.
+        self.required_family_masks = {}
+        self.required_mask = 0
+        table = get_species_table()
         for s in self.required_species_route:
-            fam = self._family_root_index_for_species_name(s)
-            fam_to_members.setdefault(fam, set()).add(s)
-
-        for fam, members in fam_to_members.items():
-            need = len(members) if self.livingdex_enabled else 1
-            self.required_families_current[fam] = (need, members)
+            i = table.index_of(s)
+            fam = table.family_root[i]
+            self.required_family_masks[fam] = self.required_family_masks.get(fam, 0) | (1 << i)
+            self.required_mask |= 1 << i
+
+    # ---- whole-game progress ---------------------------------------------------
+    def _quota_mask(self, map_key: str, method: str) -> int:
+        """Required-species mask of one learned (map, method) quota."""
+        species = {s for s in self.learned.get(map_key, {}).get(method, []) if s}
+        return get_species_table().mask_of(self._expand_unown_if_needed(species, map_key))
+
+    def _rebuild_progress(self) -> None:
+        reqs = {(mk, meth): self._quota_mask(mk, meth)
+                for mk, per in self.learned.items() for meth in per}
+        self._progress.rebuild(reqs, self.owned_mask)
+
+    def _touch_progress(self, map_key: str, methods: Iterable[str]) -> None:
+        for meth in list(methods):
+            self._progress.set_requirement((map_key, meth), self._quota_mask(map_key, meth))
+
+    def closest_quotas(self, n: int = PROGRESS_TOP_N) -> List[Tuple[Tuple[str, str], int, int]]:
+        """Unfinished (map, method) quotas with the fewest shinies left: ((map, method), remaining, total)."""
+        return self._progress.closest(n)
+
+    def _log_progress(self) -> None:
+        done, known, missing = self._progress.summary()
+        if not known: return
+        _LOG.info("Progress: %d/%d map+method quotas complete, %d shinies missing. Closest: %s", done, known, missing,
+                  lazy(lambda: ", ".join(f"{m}/{meth} ({rem} left)" for (m, meth), rem, _t in self.closest_quotas()) or "-"))
+        cheapest = self._cheapest_text()
+        if cheapest: _LOG.info("Cheapest by expected encounters: %s", cheapest)
+
+    # ---- cost estimates --------------------------------------------------------
+    def _time_encounter(self) -> None:
+        now = time.monotonic()
+        last, self._last_encounter_at = self._last_encounter_at, now
+        if last is not None and 0 < now - last <= ENCOUNTER_GAP_MAX_S:
+            self._seconds_per_encounter += 0.1 * ((now - last) - self._seconds_per_encounter)
+
+    def estimate_quota(self, map_key: Optional[str] = None, method: Optional[str] = None) -> Optional[QuotaEstimate]:
+        """
+        Expected encounters/time to finish a (map, method) quota, weighted by the
+        table's slot rates. None if that table's rates haven't been read this session.
+        """
+        map_key = map_key or self.current_map_key
+        method = method or self.current_method
+        rates = self._route_rates.get((map_key, method))
+        if rates is None or not map_key:
+            return None
+        if (map_key, method) == (self.current_map_key, self.current_method) and self.required_mask:
+            req = self.required_mask
+        else:
+            req = self._progress.required_mask((map_key, method)) or self._quota_mask(map_key, method)
+        missing = get_species_table().names_in(req & ~self.owned_mask)
+        # Unown forms share the base Unown slots evenly across the letters in scope on this map.
+        # The base entry is replaced by every form (owned ones too), so the table total is unchanged.
+        if "UNOWN" in rates and any(s.startswith("UNOWN-") for s in missing):
+            rates = dict(rates)
+            base = rates.pop("UNOWN")
+            forms = unown_names_for_mask(self._unown_mask_for_map(map_key))
+            for s in forms:
+                rates[s] = base / max(1, len(forms))
+        return estimate(rates, missing, self._seconds_per_encounter)
+
+    def _estimate_text(self) -> str:
+        est = self.estimate_quota()
+        if est is None: return "? (encounter rates not read yet)"
+        if not est.reachable: return "never (some missing species don't appear in this table)"
+        return f"≈{est.encounters:,.0f} encounters (~{format_duration(est.seconds)})"
+
+    def cheapest_quotas(self, n: int = PROGRESS_TOP_N) -> List[Tuple[Tuple[str, str], QuotaEstimate]]:
+        """Unfinished quotas with known rates, cheapest expected encounters first."""
+        out = []
+        for key in self._progress.unfinished():
+            if key in self._route_rates:
+                est = self.estimate_quota(*key)
+                if est is not None and est.reachable:
+                    out.append((key, est))
+        out.sort(key=lambda kv: kv[1].encounters)
+        return out[:n]
+
+    def _cheapest_text(self) -> str:
+        """"MAP/METHOD ≈N enc (~time)" for the cheapest unfinished quotas; "" when no rates are known."""
+        if not _LOG.is_enabled(INFO): return ""
+        return ", ".join(f"{m}/{meth} ≈{est.encounters:,.0f} enc (~{format_duration(est.seconds)})"
+                         for (m, meth), est in self.cheapest_quotas())
 
     # ---- ownership -----------------------------------------------------------
     def _bump_owned(self, name: Optional[str]) -> None:
@@ -546,73 +879,65 @@ class ShinyQuotaPlugin(BotPlugin):
         if not n: return
         self.owned_species_global.add(n)
         self.owned_counts_global[n] = self.owned_counts_global.get(n, 0) + 1
+        i = get_species_table().index_of(n)
+        self.owned_mask |= 1 << i
+        self._progress.add_owned(i)
+        self._families.add_owned(i)
+
+    def _recompute_owned_mask(self) -> None:
+        self.owned_mask = get_species_table().mask_of(self.owned_species_global)
+        self._progress.set_owned(self.owned_mask)
+        self._families.set_owned(self.owned_mask)
+
+    def _request_owned_scan(self, write_out: bool = False) -> None:
+        """Owned scan on the scheduler (one box per slice), then refresh the status line."""
+        def task():
+            yield from self._scan_owned_steps(write_out)
+            self._ensure_requirements()
+            if self._quota_check_after_scan:
+                self._quota_check_after_scan = False
+                self._maybe_quota_action()
+            self._print_missing_now()
+        _SCHED.submit(("owned_scan", write_out), task, HIGH)
 
-    def _refresh_owned_species_global(self, write_out: bool = False) -> None:
-        owned_set: Set[str] = set()
-        owned_counts: Dict[str, int] = {}
-
-        def bump(n: Optional[str]) -> None:
-            nn = _normalize_species(n)
-            if not nn: return
-            owned_set.add(nn)
-            owned_counts[nn] = owned_counts.get(nn, 0) + 1
+    def _scan_owned_steps(self, write_out: bool) -> Iterator[None]:
+        idx = self._owned_index
+        changed = False
+        complete = True
 
         # PC
         try:
             from modules.pokemon_storage import get_pokemon_storage  # type: ignore
-            storage = get_pokemon_storage()
-            for box in storage.boxes:
-                for slot in box.slots:
-                    mon: Pokemon = slot.pokemon
-                    if getattr(mon, "is_shiny", False):
-                        nm = getattr(mon, "species_name", None) or getattr(getattr(mon, "species", None), "name", None)
-                        bump(nm)
-                        if _normalize_species(nm) == "UNOWN":
-                            letter = getattr(mon, "unown_letter", None)
-                            if isinstance(letter, str) and letter:
-                                bump(f"UNOWN-{letter.upper()}")
+            for c in idx.iter_scan_storage(get_pokemon_storage()):
+                changed |= c
+                yield
         except Exception as e:
-            _log_warn(f"[{PLUGIN_NAME}] PC scan failed: {e}")
+            complete = False
+            _LOG.warning("PC scan failed: %s", e)
 
         # Party
         try:
             from modules.pokemon_party import get_party  # type: ignore
-            mons = get_party()
-            for mon in getattr(mons, "pokemon", mons) or []:
-                if mon and getattr(mon, "is_shiny", False):
-                    nm = getattr(mon, "species_name", None) or getattr(getattr(mon, "species", None), "name", None)
-                    bump(nm)
-                    if _normalize_species(nm) == "UNOWN":
-                        letter = getattr(mon, "unown_letter", None)
-                        if isinstance(letter, str) and letter:
-                            bump(f"UNOWN-{letter.upper()}")
+            changed |= idx.scan_party(get_party())
         except Exception as e:
-            _log_warn(f"[{PLUGIN_NAME}] Party scan failed: {e}")
-
-        self.owned_species_global = owned_set
-        self.owned_counts_global = owned_counts
-        if write_out:
-            _write_json(OWNED_SNAPSHOT, {"species": sorted(owned_set), "counts": owned_counts})
-        _log_info(f"[{PLUGIN_NAME}] Shinies in PC+party: {sum(owned_counts.values())} mons, {len(owned_set)} species")
-
-    # ---- families & mapping --------------------------------------------------
-    def _family_root_index_for_species_name(self, species_name: str) -> int:
-        if species_name.startswith("UNOWN-"):
-            return self._family_root_index_for_species_name("UNOWN")
-        try:
-            dex = getattr(context, "species_index_by_name", None)
-            idx = dex.get(species_name, None) if isinstance(dex, dict) else None
-            if idx is None:
-                member = getattr(Species, species_name.title(), None)
-                idx = getattr(member, "index", None)
-            if isinstance(idx, int):
-                fam = getattr(context, "species_family_root", None)
-                if isinstance(fam, list) and 0 <= idx < len(fam):
-                    return int(fam[idx])
-                return idx
-        except Exception:
-            pass
-        return abs(hash(species_name)) % 1000003
+            complete = False
+            _LOG.warning("Party scan failed: %s", e)
+
+        if complete:
+            changed |= idx.settle_caught()
+
+        # The first scan always replaces the checkpointed snapshot loaded at startup.
+        if changed or not self._owned_scanned:
+            self.owned_counts_global = dict(idx.counts)
+            self.owned_species_global = set(self.owned_counts_global)
+            self._recompute_owned_mask()
+            if write_out:
+                self._unsaved_catches = []  # the full snapshot below already contains them
+                self._state.replace_owned(dict(self.owned_counts_global))
+                self._maybe_checkpoint()
+        self._owned_scanned = True
+        _LOG.info("Shinies in PC+party: %d mons, %d species (%d box(es) rescanned)",
+                  len(idx), len(self.owned_species_global), idx.boxes_rescanned)
 
     # ---- map/method refreshers ----------------------------------------------
     def _refresh_method(self) -> None:
@@ -644,55 +969,71 @@ class ShinyQuotaPlugin(BotPlugin):
 
     # ---- status/printing/action ---------------------------------------------
     def _status_tuple(self) -> Tuple[int, int]:
-        if self.livingdex_enabled and self.required_families_current:
-            have = 0; total = 0
-            for fam, (need, members) in self.required_families_current.items():
-                total += need
-                owned = sum(1 for s in members if s in self.owned_species_global)
-                have += min(owned, need)
-            return have, total
-        total = len(self.required_species_route)
-        have = len(self.required_species_route & self.owned_species_global)
-        return have, total
+        # Living-dex needs every member of each family, so the family sums collapse to the route mask.
+        self._ensure_requirements()
+        return self._d_status.get()[2:]
 
     def _set_status_progress(self) -> None:
         have, total = self._status_tuple()
-        _set_status_line(f"[{PLUGIN_NAME}] {have}/{total} route+mode shinies")
+        self._status_line.publish(f"[{PLUGIN_NAME}] {have}/{total} route+mode shinies")
 
     def _missing_breakdown(self) -> List[str]:
         missing: List[str] = []
-        if self.livingdex_enabled and self.required_families_current:
-            for fam, (need, members) in self.required_families_current.items():
-                have = sum(1 for s in members if s in self.owned_species_global)
-                rem = max(0, need - have)
-                if rem > 0:
-                    todo = [s for s in sorted(members) if s not in self.owned_species_global][:3]
-                    missing.append(f"{(todo[0] if todo else next(iter(members)))}×{rem}")
+        table = get_species_table()
+        if self.livingdex_enabled and self.required_family_masks:
+            # only unfinished families are visited; counts are kept up to date per catch
+            for _fam, todo in self._families.incomplete():
+                missing.append(f"{min(table.names_in(todo))}×{todo.bit_count()}")
         else:
-            for s in sorted(self.required_species_route):
-                if s not in self.owned_species_global:
-                    missing.append(f"{s}×1")
+            for s in sorted(table.names_in(self.required_mask & ~self.owned_mask)):
+                missing.append(f"{s}×1")
         return missing
 
     def _print_missing_now(self) -> None:
         have, total = self._status_tuple()
+        if self._d_status.version == self._printed_status:
+            return  # nothing this line depends on changed since it was last printed
+        self._printed_status = self._d_status.version
         self._set_status_progress()
         if total == 0: return
+        sig = (self.current_map_key, self.current_method, have, total)
         if have >= total:
-            _notify(f"✅ Quota met on {self.current_map_key} ({self.current_method}).")
+            if _STATUS.is_enabled(INFO) and _STATUS.allow("quota_met", sig):
+                _notify(f"✅ Quota met on {self.current_map_key} ({self.current_method}).")
+                nxt = self._cheapest_text()
+                if nxt: _LOG.info("Cheapest hunts left: %s", nxt)
         else:
-            mlist = self._missing_breakdown()
-            _log_info(f"[{PLUGIN_NAME}] Missing ({max(0, total - have)}): {',  '.join(mlist[:6])}…")
+            _STATUS.throttled(INFO, "missing", sig, "Missing (%d): %s…", max(0, total - have),
+                              lazy(lambda: ",  ".join(self._missing_breakdown()[:6])))
+            _STATUS.throttled(INFO, "estimate", sig, "Expected to finish here: %s", lazy(self._estimate_text))
+            _LOG.debug("Elsewhere: %s", lazy(self._elsewhere_summary))
+
+    def where_to_find(self, species: str) -> List[Tuple[str, str]]:
+        """(map, method) pairs the static wild table lists *species* for, excluding the current one."""
+        here = (self.current_map_key, self.current_method)
+        return [loc for loc in _WILD.locations_of(species) if loc != here]
+
+    def _elsewhere_summary(self) -> str:
+        table = get_species_table()
+        parts = []
+        for s in sorted(table.names_in(self.required_mask & ~self.owned_mask))[:6]:
+            locs = self.where_to_find(s)
+            if locs:
+                parts.append(f"{s} → " + ", ".join(f"{m}/{meth}" for m, meth in locs[:3]))
+        return "; ".join(parts) or "-"
 
     def _maybe_quota_action(self) -> None:
         have, total = self._status_tuple()
         if total == 0 or have < total: return
+        first = _STATUS.allow("quota_action", (self.current_map_key, self.current_method))
         if ON_QUOTA == "TEST":
-            _notify("✅ Quota met (TEST mode) — staying in current mode."); return
+            if first: _notify("✅ Quota met (TEST mode) — staying in current mode.")
+            return
         if ON_QUOTA == "NAVIGATOR":
-            _notify("✅ Quota met — handing off to Navigator (if available)."); return
+            if first: _notify("✅ Quota met — handing off to Navigator (if available).")
+            return
         try:
             set_manual = getattr(context, "set_manual_mode", None) or getattr(context, "set_manual", None)
             if callable(set_manual): set_manual(); _notify("✅ Quota met — switched to Manual.")
         except Exception as e:
-            _log_warn(f"[{PLUGIN_NAME}] Could not switch to Manual: {e}")
+            _LOG.warning("Could not switch to Manual: %s", e)
@@ -0,0 +1,235 @@
+# plugins/ProfOak/species_index.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Dense species / evolution-family table
+#
+# What this does
+#  - Builds, once per profile load, a dense index space over species names:
+#    national dex number for real species (1..386), then one slot per Unown
+#    form ("UNOWN-A" .. "UNOWN-?"), then any name the game data didn't know.
+#  - `family_root[i]` gives the family root of index i (the base of its
+#    evolution line), so family lookups are two list/dict probes with no
+#    per-call getattr or hashing.
+#  - `mask_of(names)` / `names_in(mask)` convert between name sets and int
+#    bitmasks over the same index space (bit i = index i), so set algebra on
+#    species is AND/OR plus int.bit_count().
+#
+# Sources (first one that works wins, all optional)
+#  - species: modules.pokemon.get_species_by_index(), else the `Species`
+#    namespace. Only species with a national dex number get a dex slot;
+#    internal ids (Gen III placeholders 252-276 sit between Celebi and
+#    Treecko) are a different numbering and never used as indices.
+#  - families: context.species_family_root (indexed by internal id, names
+#    from the species objects or context.species_index_by_name), else
+#    evolution data on the species objects, else every species is its own
+#    family
+#
+# Unknown names get a fresh index (their own family) instead of a hash, so
+# families are never split silently and the index space stays dense.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# 28 Unown forms in Gen III order
+UNOWN_FORMS_ALL: List[str] = [chr(c) for c in range(ord("A"), ord("Z") + 1)] + ["!", "?"]
+UNOWN_BIT: Dict[str, int] = {f: 1 << i for i, f in enumerate(UNOWN_FORMS_ALL)}
+UNOWN_MASK_AZ = (1 << 26) - 1
+
+MAX_SOURCE_INDEX = 450  # Gen III internal species ids stop at 411
+
+
+def _norm(name) -> Optional[str]:
+    return name.strip().upper() if isinstance(name, str) and name.strip() else None
+
+
+# ---------- Unown letter masks (bit i = UNOWN_FORMS_ALL[i]) ----------
+def unown_mask(letters: Iterable[str]) -> int:
+    m = 0
+    for l in letters:
+        m |= UNOWN_BIT.get(_norm(l) or "", 0)
+    return m
+
+
+def unown_bit_from_name(name: str) -> int:
+    """Bit for "UNOWN-X" style names, else 0."""
+    return UNOWN_BIT.get(name[6:], 0) if name.startswith("UNOWN-") else 0
+
+
+@lru_cache(maxsize=256)
+def unown_letters_for_mask(mask: int) -> Tuple[str, ...]:
+    """Letters in *mask*, in form order (cached: chambers reuse a handful of masks)."""
+    return tuple(f for f in UNOWN_FORMS_ALL if mask & UNOWN_BIT[f])
+
+
+@lru_cache(maxsize=256)
+def unown_names_for_mask(mask: int) -> Tuple[str, ...]:
+    """("UNOWN-A", ...) for *mask*; the living-dex expansion of "UNOWN"."""
+    return tuple(f"UNOWN-{f}" for f in unown_letters_for_mask(mask))
+
+
+class SpeciesTable:
+    def __init__(self, dex_by_name: Dict[str, int], parent_by_name: Dict[str, str]) -> None:
+        """
+        :param dex_by_name: species name -> national dex number (> 0)
+        :param parent_by_name: species name -> name it evolves from
+        """
+        size = max(dex_by_name.values(), default=0) + 1
+        self.names: List[Optional[str]] = [None] * size
+        self.index_by_name: Dict[str, int] = {}
+        for nm, dex in dex_by_name.items():
+            self.names[dex] = nm
+            self.index_by_name[nm] = dex
+
+        # family roots: follow pre-evolutions to the base of the line
+        self.family_root: List[int] = list(range(size))
+        for nm, dex in dex_by_name.items():
+            root, seen = nm, {nm}
+            while root in parent_by_name and parent_by_name[root] not in seen and parent_by_name[root] in dex_by_name:
+                root = parent_by_name[root]; seen.add(root)
+            self.family_root[dex] = dex_by_name[root]
+
+        # Unown forms: own indices, Unown's family
+        unown = self.index_by_name.get("UNOWN")
+        self.unown_base = len(self.names)
+        for letter in UNOWN_FORMS_ALL:
+            i = self._append(f"UNOWN-{letter}")
+            if unown is None:
+                unown = i  # no base Unown known; the forms share the first form's family
+            self.family_root[i] = self.family_root[unown]
+
+    # ---- lookups -------------------------------------------------------------
+    def index_of(self, name: str) -> int:
+        """Dense index for *name*; unknown names get a fresh slot (their own family)."""
+        i = self.index_by_name.get(name)
+        if i is None:
+            n = _norm(name)
+            i = self.index_by_name.get(n) if n else None
+            if i is None:
+                i = self._append(n or str(name))
+                self.index_by_name[name] = i
+        return i
+
+    def family_of(self, name: str) -> int:
+        return self.family_root[self.index_of(name)]
+
+    def name_of(self, index: int) -> Optional[str]:
+        return self.names[index] if 0 <= index < len(self.names) else None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    # ---- bitmasks (bit i = index i) ------------------------------------------
+    def mask_of(self, names: Iterable[str]) -> int:
+        m = 0
+        for nm in names:
+            m |= 1 << self.index_of(nm)
+        return m
+
+    def names_in(self, mask: int) -> List[str]:
+        """Names whose bits are set in *mask*, in index (dex) order."""
+        out: List[str] = []
+        while mask:
+            low = mask & -mask
+            nm = self.name_of(low.bit_length() - 1)
+            if nm: out.append(nm)
+            mask ^= low
+        return out
+
+    def _append(self, name: str) -> int:
+        i = len(self.names)
+        self.names.append(name)
+        self.family_root.append(i)
+        self.index_by_name[name] = i
+        return i
+
+
+# ---------- Building from game data ----------
+def _species_objects() -> List[object]:
+    try:
+        from modules.pokemon import get_species_by_index  # type: ignore
+        out = []
+        for i in range(1, MAX_SOURCE_INDEX):
+            try: sp = get_species_by_index(i)
+            except Exception: break
+            if sp is not None: out.append(sp)
+        if out: return out
+    except Exception:
+        pass
+    try:
+        from modules.pokemon import Species  # type: ignore
+        return [v for v in vars(Species).values() if hasattr(v, "name") and hasattr(v, "index")]
+    except Exception:
+        return []
+
+
+def _evolution_targets(sp) -> Iterable[str]:
+    for ev in getattr(sp, "evolutions", None) or []:
+        tgt = None
+        for attr in ("target_species", "species", "to", "into", "evolves_into"):
+            tgt = getattr(ev, attr, None)
+            if tgt is not None: break
+        nm = _norm(getattr(tgt, "name", tgt))
+        if nm: yield nm
+
+
+def build_species_table() -> SpeciesTable:
+    from modules.context import context  # type: ignore
+
+    species = _species_objects()
+    dex_by_name: Dict[str, int] = {}
+    source_index: Dict[int, str] = {}
+    dex_taken: Set[int] = set()
+    for sp in species:
+        nm = _norm(getattr(sp, "name", None))
+        src = getattr(sp, "index", None)
+        if nm and isinstance(src, int): source_index.setdefault(src, nm)
+        dex = getattr(sp, "national_dex_number", None)
+        if not nm or not isinstance(dex, int) or dex <= 0 or nm in dex_by_name or dex in dex_taken:
+            continue  # placeholders/unknowns get a fresh slot on first use instead
+        dex_by_name[nm] = dex
+        dex_taken.add(dex)
+
+    # internal ids: only to read species_family_root below, never as dex numbers
+    by_name = getattr(context, "species_index_by_name", None)
+    if isinstance(by_name, dict):
+        for nm, src in by_name.items():
+            n = _norm(nm)
+            if n and isinstance(src, int):
+                source_index.setdefault(src, n)
+
+    parent_by_name: Dict[str, str] = {}
+    fam = getattr(context, "species_family_root", None)
+    if isinstance(fam, list):
+        for src, nm in source_index.items():
+            if 0 <= src < len(fam) and fam[src] in source_index and fam[src] != src:
+                parent_by_name[nm] = source_index[fam[src]]
+    else:
+        for sp in species:
+            nm = _norm(getattr(sp, "name", None))
+            for tgt in _evolution_targets(sp):
+                if nm and tgt != nm: parent_by_name.setdefault(tgt, nm)
+
+    return SpeciesTable(dex_by_name, parent_by_name)
+
+
+_TABLE: Optional[SpeciesTable] = None
+
+
+def get_species_table() -> SpeciesTable:
+    """The table built by the last `rebuild_species_table()` (built lazily on first use)."""
+    global _TABLE
+    if _TABLE is None:
+        _TABLE = rebuild_species_table()
+    return _TABLE
+
+
+def rebuild_species_table() -> SpeciesTable:
+    """Build the table from game data; call once per profile load."""
+    global _TABLE
+    try:
+        _TABLE = build_species_table()
+    except Exception:
+        _TABLE = SpeciesTable({}, {})
+    return _TABLE
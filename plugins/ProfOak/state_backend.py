@@ -0,0 +1,430 @@
+# plugins/ProfOak/state_backend.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Persistent state backends
+#
+# What this does
+#  - Gives ShinyQuota one small interface for loading and recording its
+#    persistent state: learned species per (map, method), owned shinies,
+#    Unown letters seen per map and the (read-only) shiny registry.
+#  - `JsonStateBackend` (default) keeps the JSON files in plugins/ProfOak/JSON
+#    as checkpoints and appends events to `state_journal.jsonl`.
+#  - `SqliteStateBackend` (optional) stores the same data in one SQLite file in
+#    WAL mode: indexed tables, point queries and small upserts instead of
+#    whole-document rewrites. Several bot processes on one machine can share
+#    it; rows are partitioned by bot profile (see `use_profile`). Writes run
+#    on the WriteBehindStore thread; only reads happen on the caller's thread.
+#
+# Entry point
+#       open_state_backend(kind, ...)  -> JsonStateBackend | SqliteStateBackend
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from .persistence import EventJournal, WriteBehindStore
+
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+
+# ---------- Data model ----------
+@dataclass
+class PersistedState:
+    registry: Dict[str, Dict[str, List[int]]] = field(default_factory=dict)
+    learned: Dict[str, Dict[str, List[str]]] = field(default_factory=dict)
+    unown_letters: Dict[str, Set[str]] = field(default_factory=dict)
+    owned_counts: Dict[str, int] = field(default_factory=dict)
+
+
+def _read_json(path: Path):
+    try:
+        if path.exists():
+            return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        pass
+    return {}
+
+
+def _norm(name) -> Optional[str]:
+    return name.strip().upper() if isinstance(name, str) and name.strip() else None
+
+
+def _bump(counts: Dict[str, int], name: Optional[str], n: int = 1) -> None:
+    nn = _norm(name)
+    if nn: counts[nn] = counts.get(nn, 0) + n
+
+
+# ---------- JSON files + event journal ----------
+class JsonStateBackend:
+    name = "JSON"
+
+    def __init__(self, *, registry_path: Path, learned_path: Path, owned_path: Path,
+                 unown_path: Path, journal_path: Path, store: WriteBehindStore) -> None:
+        self.registry_path = registry_path
+        self.learned_path = learned_path
+        self.owned_path = owned_path
+        self.unown_path = unown_path
+        self.store = store
+        self.journal = EventJournal(journal_path, store)
+        self._force_checkpoint = False
+
+    # ---- loading -------------------------------------------------------------
+    def load(self) -> PersistedState:
+        """Checkpoint documents with the journal replayed over them."""
+        st = PersistedState(
+            registry=_read_json(self.registry_path) or {"default": {}},
+            learned=_read_json(self.learned_path) or {},
+        )
+
+        raw = _read_json(self.unown_path)
+        if isinstance(raw, dict):
+            for map_key, letters in raw.items():
+                if not isinstance(map_key, str) or not isinstance(letters, list):
+                    continue
+                bucket = {l for l in (_norm(x) for x in letters) if l}
+                if bucket:
+                    st.unown_letters[map_key] = bucket
+
+        # owned_shinies.json: {"species": [...], "counts": {...}} (older files: a bare list)
+        raw = _read_json(self.owned_path)
+        species = raw.get("species", []) if isinstance(raw, dict) else raw if isinstance(raw, list) else []
+        counts = raw.get("counts", {}) if isinstance(raw, dict) else {}
+        for sp in species:
+            c = counts.get(sp) if isinstance(counts, dict) else None
+            _bump(st.owned_counts, sp, int(c) if isinstance(c, int) and c > 0 else 1)
+
+        replayed = self._replay(st)
+        self._force_checkpoint = replayed > 0  # fold a non-empty journal back in right away
+        return st
+
+    def _replay(self, st: PersistedState) -> int:
+        applied = 0
+        for ev in self.journal.replay():
+            kind = ev["e"]
+            mk = ev.get("m"); meth = ev.get("k")
+            if kind == "learn" and isinstance(mk, str) and isinstance(meth, str) and ev.get("s"):
+                per = st.learned.setdefault(mk, {})
+                cur = per.get(meth, [])
+                if ev["s"] not in cur:
+                    per[meth] = sorted(set(cur) | {ev["s"]})
+            elif kind == "set" and isinstance(mk, str) and isinstance(meth, str):
+                st.learned.setdefault(mk, {})[meth] = [x for x in (ev.get("v") or []) if isinstance(x, str)]
+            elif kind == "unown" and isinstance(mk, str) and isinstance(ev.get("l"), str):
+                st.unown_letters.setdefault(mk, set()).add(ev["l"])
+            elif kind == "catch" and ev.get("s"):
+                if ev["s"] == "UNOWN" and isinstance(ev.get("l"), str):
+                    _bump(st.owned_counts, f"UNOWN-{ev['l']}")
+                _bump(st.owned_counts, ev["s"])
+            else:
+                continue
+            applied += 1
+        return applied
+
+    def learned_for_map(self, map_key: str) -> Optional[Dict[str, List[str]]]:
+        return None  # memory is authoritative; nobody else writes these files
+
+    def use_profile(self, profile: Optional[str]) -> bool:
+        return False  # one set of files for every profile
+
+    # ---- recording -----------------------------------------------------------
+    def record_learn(self, map_key: str, method: str, species: str) -> None:
+        self.journal.append("learn", m=map_key, k=method, s=species)
+
+    def record_method(self, map_key: str, method: str, species: Iterable[str]) -> None:
+        self.journal.append("set", m=map_key, k=method, v=sorted(species))
+
+    def record_unown(self, map_key: str, letter: str) -> None:
+        self.journal.append("unown", m=map_key, l=letter)
+
+    def record_catch(self, species: str, letter: Optional[str] = None) -> None:
+        self.journal.append("catch", s=species, l=letter)
+
+    def replace_owned(self, counts: Dict[str, int]) -> None:
+        self._force_checkpoint = True  # the whole document changes; journaling it buys nothing
+
+    def record_bulk(self, learned: Dict[str, Dict[str, Set[str]]], unown_letters: Dict[str, Set[str]]) -> None:
+        """Many learns at once (backfill): one checkpoint instead of a journal line each."""
+        if learned or unown_letters:
+            self._force_checkpoint = True
+
+    # ---- checkpoints ---------------------------------------------------------
+    def wants_checkpoint(self) -> bool:
+        return self._force_checkpoint or self.journal.needs_compaction()
+
+    def checkpoint(self, st: PersistedState) -> None:
+        """Compact the journal into the documents. *st* must be a private copy."""
+        self._force_checkpoint = False
+        self.journal.compact({
+            self.learned_path: st.learned,
+            self.unown_path: {mk: sorted(l) for mk, l in st.unown_letters.items() if l},
+            self.owned_path: {"species": sorted(st.owned_counts), "counts": st.owned_counts},
+        })
+
+    def after_writes(self, fn: Callable[[], None]) -> None:
+        """Run *fn* once everything recorded (and checkpointed) so far is on disk."""
+        self.store.call(fn)
+
+    def request_flush(self) -> None:
+        self.store.request_flush()
+
+    def close(self) -> None:
+        self.store.close()
+
+
+# ---------- SQLite (WAL) ----------
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS learned (
+    profile TEXT NOT NULL, map TEXT NOT NULL, method TEXT NOT NULL, species TEXT NOT NULL,
+    PRIMARY KEY (profile, map, method, species)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS owned_shinies (
+    profile TEXT NOT NULL, species TEXT NOT NULL, count INTEGER NOT NULL,
+    PRIMARY KEY (profile, species)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS unown_letters (
+    profile TEXT NOT NULL, map TEXT NOT NULL, letter TEXT NOT NULL,
+    PRIMARY KEY (profile, map, letter)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS registry (
+    profile TEXT NOT NULL, bucket TEXT NOT NULL, route TEXT NOT NULL, ids TEXT NOT NULL,
+    PRIMARY KEY (profile, bucket, route)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+class SqliteStateBackend:
+    name = "SQLITE"
+
+    def __init__(self, db_path: Path, profile: str = "default",
+                 seed_from: Optional[Callable[[], PersistedState]] = None,
+                 store: Optional[WriteBehindStore] = None) -> None:
+        """
+        :param seed_from: called once per profile when its tables are empty, to
+            import existing JSON state (e.g. `JsonStateBackend.load`).
+        :param store: runs the write transactions on its flush thread; without
+            one (CLI, tests) they run inline.
+        """
+        self.db_path = db_path
+        self.profile = profile
+        self.store = store
+        self._seed_from = seed_from
+        self._lock = threading.Lock()  # hooks may arrive from more than one thread
+        self._pending_lock = threading.Lock()
+        self._pending_maps: Dict[str, int] = {}   # map -> queued writes not committed yet
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                                     check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+        self._conn.executescript(_SCHEMA)
+        if seed_from is not None:
+            self._seed_once(seed_from)
+
+    def _tx(self):
+        return _Transaction(self._conn, self._lock)
+
+    def _read(self):
+        # DEFERRED takes no write lock: under WAL a reader never waits for another process's writer
+        return _Transaction(self._conn, self._lock, "DEFERRED")
+
+    def _write(self, fn: Callable[[sqlite3.Cursor], None], maps: Iterable[str] = ()) -> None:
+        """Run *fn* in one write transaction on the store's thread. Rows must be captured by the caller."""
+        if self.store is None:
+            with self._tx() as cur:
+                fn(cur)
+            return
+        maps = tuple(maps)
+        with self._pending_lock:
+            for mk in maps:
+                self._pending_maps[mk] = self._pending_maps.get(mk, 0) + 1
+
+        def run() -> None:
+            with self._tx() as cur:
+                fn(cur)
+            with self._pending_lock:   # only once committed; a failed write is retried by the store
+                for mk in maps:
+                    left = self._pending_maps.get(mk, 0) - 1
+                    if left > 0: self._pending_maps[mk] = left
+                    else: self._pending_maps.pop(mk, None)
+        self.store.call(run)
+
+    def use_profile(self, profile: Optional[str]) -> bool:
+        """Switch the row partition (profile load). Returns True if it changed; reload with `load()`."""
+        if not profile or profile == self.profile:
+            return False
+        self.profile = profile
+        if self._seed_from is not None:
+            self._seed_once(self._seed_from)
+        return True
+
+    def _seed_once(self, seed_from: Callable[[], PersistedState]) -> None:
+        key = f"seeded:{self.profile}"
+        with self._tx() as cur:
+            if cur.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+                return
+        st = seed_from()
+        self._write_state(st, key)
+
+    def _write_state(self, st: PersistedState, meta_key: Optional[str] = None) -> None:
+        p = self.profile
+        learned = [(p, mk, meth, sp) for mk, per in st.learned.items() for meth, lst in per.items() for sp in lst]
+        letters = [(p, mk, l) for mk, ls in st.unown_letters.items() for l in ls]
+        owned = [(p, sp, c) for sp, c in st.owned_counts.items()]
+        registry = [(p, b, r, json.dumps(ids)) for b, routes in (st.registry or {}).items()
+                    if isinstance(routes, dict) for r, ids in routes.items()]
+
+        def write(cur: sqlite3.Cursor) -> None:
+            cur.executemany("INSERT OR IGNORE INTO learned VALUES (?, ?, ?, ?)", learned)
+            cur.executemany("INSERT OR IGNORE INTO unown_letters VALUES (?, ?, ?)", letters)
+            cur.executemany("INSERT INTO owned_shinies VALUES (?, ?, ?) "
+                            "ON CONFLICT(profile, species) DO UPDATE SET count = excluded.count", owned)
+            cur.executemany("INSERT OR REPLACE INTO registry VALUES (?, ?, ?, ?)", registry)
+            if meta_key:
+                cur.execute("INSERT OR REPLACE INTO meta VALUES (?, '1')", (meta_key,))
+        self._write(write, st.learned)
+
+    # ---- loading -------------------------------------------------------------
+    def load(self) -> PersistedState:
+        """The partition's state (startup / profile switch): queued writes are committed first."""
+        if self.store is not None:
+            self.store.flush()
+        st = PersistedState(registry={"default": {}})
+        p = (self.profile,)
+        with self._read() as cur:
+            for mk, meth, sp in cur.execute("SELECT map, method, species FROM learned WHERE profile = ? ORDER BY species", p):
+                st.learned.setdefault(mk, {}).setdefault(meth, []).append(sp)
+            for mk, l in cur.execute("SELECT map, letter FROM unown_letters WHERE profile = ?", p):
+                st.unown_letters.setdefault(mk, set()).add(l)
+            for sp, c in cur.execute("SELECT species, count FROM owned_shinies WHERE profile = ?", p):
+                st.owned_counts[sp] = int(c)
+            for b, r, ids in cur.execute("SELECT bucket, route, ids FROM registry WHERE profile = ?", p):
+                try: st.registry.setdefault(b, {})[r] = json.loads(ids)
+                except ValueError: pass
+        return st
+
+    def learned_for_map(self, map_key: str) -> Optional[Dict[str, List[str]]]:
+        """Point query: current rows for one map (picks up other processes' learns)."""
+        with self._pending_lock:
+            if map_key in self._pending_maps:
+                return None   # our own writes for it aren't committed yet; memory is ahead of the table
+        out: Dict[str, List[str]] = {}
+        with self._read() as cur:
+            for meth, sp in cur.execute(
+                "SELECT method, species FROM learned WHERE profile = ? AND map = ? ORDER BY species",
+                (self.profile, map_key),
+            ):
+                out.setdefault(meth, []).append(sp)
+        return out
+
+    # ---- recording (queued on the store; rows are built here, on the caller's thread) --
+    def record_learn(self, map_key: str, method: str, species: str) -> None:
+        row = (self.profile, map_key, method, species)
+        self._write(lambda cur: cur.execute("INSERT OR IGNORE INTO learned VALUES (?, ?, ?, ?)", row), (map_key,))
+
+    def record_method(self, map_key: str, method: str, species: Iterable[str]) -> None:
+        key = (self.profile, map_key, method)
+        rows = [key + (sp,) for sp in species]
+
+        def write(cur: sqlite3.Cursor) -> None:
+            cur.execute("DELETE FROM learned WHERE profile = ? AND map = ? AND method = ?", key)
+            cur.executemany("INSERT OR IGNORE INTO learned VALUES (?, ?, ?, ?)", rows)
+        self._write(write, (map_key,))
+
+    def record_unown(self, map_key: str, letter: str) -> None:
+        row = (self.profile, map_key, letter)
+        self._write(lambda cur: cur.execute("INSERT OR IGNORE INTO unown_letters VALUES (?, ?, ?)", row), (map_key,))
+
+    def record_catch(self, species: str, letter: Optional[str] = None) -> None:
+        names = [species] + ([f"UNOWN-{letter}"] if species == "UNOWN" and letter else [])
+        rows = [(self.profile, n) for n in names]
+        self._write(lambda cur: cur.executemany(
+            "INSERT INTO owned_shinies VALUES (?, ?, 1) "
+            "ON CONFLICT(profile, species) DO UPDATE SET count = count + 1", rows))
+
+    def record_bulk(self, learned: Dict[str, Dict[str, Set[str]]], unown_letters: Dict[str, Set[str]]) -> None:
+        """Many learns at once (backfill), in a single transaction."""
+        p = self.profile
+        rows = [(p, mk, meth, sp) for mk, per in learned.items() for meth, new in per.items() for sp in new]
+        letters = [(p, mk, l) for mk, ls in unown_letters.items() for l in ls]
+
+        def write(cur: sqlite3.Cursor) -> None:
+            cur.executemany("INSERT OR IGNORE INTO learned VALUES (?, ?, ?, ?)", rows)
+            cur.executemany("INSERT OR IGNORE INTO unown_letters VALUES (?, ?, ?)", letters)
+        self._write(write, set(learned) | set(unown_letters))
+
+    def replace_owned(self, counts: Dict[str, int]) -> None:
+        p = self.profile
+        rows = [(p, sp, int(c)) for sp, c in counts.items()]
+
+        def write(cur: sqlite3.Cursor) -> None:
+            cur.execute("DELETE FROM owned_shinies WHERE profile = ?", (p,))
+            cur.executemany("INSERT INTO owned_shinies VALUES (?, ?, ?)", rows)
+        self._write(write)
+
+    # ---- checkpoints (nothing to compact) ------------------------------------
+    def wants_checkpoint(self) -> bool:
+        return False
+
+    def checkpoint(self, st: PersistedState) -> None:
+        pass
+
+    def after_writes(self, fn: Callable[[], None]) -> None:
+        """Run *fn* once every write queued so far is committed (inline without a store)."""
+        if self.store is None: fn()
+        else: self.store.call(fn)
+
+    def request_flush(self) -> None:
+        if self.store is not None:
+            self.store.request_flush()
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.flush()
+        with self._lock:
+            try: self._conn.close()
+            except Exception: pass
+
+
+class _Transaction:
+    """`with` block = one BEGIN IMMEDIATE (writes) or BEGIN DEFERRED (reads) ... COMMIT under the backend lock."""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock, mode: str = "IMMEDIATE") -> None:
+        self.conn = conn; self.lock = lock; self.mode = mode
+
+    def __enter__(self) -> sqlite3.Cursor:
+        self.lock.acquire()
+        try:
+            self.conn.execute(f"BEGIN {self.mode}")
+        except Exception:
+            self.lock.release(); raise
+        return self.conn.cursor()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+
+
+# ---------- Public API ----------
+def open_state_backend(kind: str, *, registry_path: Path, learned_path: Path, owned_path: Path,
+                       unown_path: Path, journal_path: Path, sqlite_path: Path, profile: str,
+                       store: WriteBehindStore, on_error: Optional[Callable[[str], None]] = None):
+    """Build the configured backend; falls back to JSON if SQLite can't be opened."""
+    json_backend = JsonStateBackend(registry_path=registry_path, learned_path=learned_path,
+                                    owned_path=owned_path, unown_path=unown_path,
+                                    journal_path=journal_path, store=store)
+    if str(kind).strip().upper() != "SQLITE":
+        return json_backend
+    try:
+        return SqliteStateBackend(sqlite_path, profile=profile, seed_from=json_backend.load, store=store)
+    except Exception as e:
+        if on_error: on_error(f"SQLite state store unavailable ({e}); using JSON files.")
+        return json_backend
@@ -0,0 +1,85 @@
+# plugins/ProfOak/status.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Overlay status line publisher
+#
+# What this does
+#  - Remembers the last text pushed to the overlay and only pushes again when
+#    the rendered text differs, so encounters that don't change "have/total"
+#    cost a string compare instead of an overlay redraw.
+#  - Coalesces bursts (map change + mode change + encounter in the same few
+#    frames) into one push per frame window: `publish()` only records the
+#    newest text, and a BotListener flushes it from the frame loop.
+#  - While the listener isn't seeing frames (no bot mode running, or the bot
+#    build has no listener support) texts are pushed immediately, still
+#    diffed against the last push.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Optional
+
+try:
+    from modules.modes import BotListener  # type: ignore
+except Exception:  # older bot builds / running outside the bot
+    BotListener = None  # type: ignore
+
+STATUS_FRAME_WINDOW = 30   # frames between overlay pushes (~0.5 s at 60 fps)
+TICK_STALE_S = 1.0         # no frame for this long: the listener is gone, push directly
+
+
+class StatusPublisher:
+    def __init__(self, push: Callable[[str], None], window_frames: int = STATUS_FRAME_WINDOW) -> None:
+        self._push = push
+        self._window = max(1, int(window_frames))
+        self._last: Optional[str] = None      # text currently on the overlay
+        self._pending: Optional[str] = None   # newest text not pushed yet
+        self._last_frame: Optional[int] = None
+        self._tick_at: Optional[float] = None  # monotonic time of the last frame seen
+        self.pushes = 0
+
+    def publish(self, text: str) -> None:
+        if text == self._last:
+            self._pending = None   # a burst that ended where it started: nothing to redraw
+            return
+        self._pending = text
+        if self._tick_at is None or time.monotonic() - self._tick_at > TICK_STALE_S:
+            self.flush()
+
+    def on_frame(self, frame_count: Optional[int]) -> None:
+        self._tick_at = time.monotonic()
+        if self._pending is None:
+            return
+        if frame_count is not None and self._last_frame is not None and frame_count - self._last_frame < self._window:
+            return
+        self._last_frame = frame_count
+        self.flush()
+
+    def flush(self) -> None:
+        text, self._pending = self._pending, None
+        if text is None or text == self._last:
+            return
+        self._last = text
+        self.pushes += 1
+        try: self._push(text)
+        except Exception: pass
+
+    def reset(self) -> None:
+        """Forget what the overlay shows (profile load); the next publish always pushes."""
+        self._last = None
+        self._pending = None
+        self._last_frame = None
+        self._tick_at = None
+
+
+if BotListener is not None:
+    class StatusFrameListener(BotListener):  # type: ignore[misc, valid-type]
+        """Flushes a StatusPublisher from the bot's frame loop."""
+
+        def __init__(self, publisher: StatusPublisher) -> None:
+            self._publisher = publisher
+
+        def handle_frame(self, bot_mode, frame) -> None:
+            self._publisher.on_frame(getattr(frame, "frame_count", None))
+else:
+    StatusFrameListener = None  # type: ignore
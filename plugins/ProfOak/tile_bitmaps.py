@@ -0,0 +1,250 @@
+# plugins/ProfOak/tile_bitmaps.py
+# -----------------------------------------------------------------------------
+# Prof Oak – Cached encounter-tile bitmaps
+#
+# What this does
+#  - For each map (group, number) keeps one bitmap per tile class: GRASS
+#    (land encounters), WATER (Surf and fishing) and ROCK (Rock Smash).
+#    Bit y*w+x is set when tile (x, y) is a candidate farm tile.
+#  - A map is scanned once (the navigator supplies the scan: tile matrix or
+#    per-tile probes), all three classes in a single pass. After that, a
+#    pick only scores the precomputed candidate tuple; nothing is rescanned.
+#  - The farm tile is the best-scoring candidate: viable tiles within
+#    FARM_RADIUS (counted from a summed-area table over the bitmap) minus
+#    FARM_DIST_WEIGHT per tile of distance from where the player arrives, so
+#    spinning starts inside a patch rather than on a lone edge tile. Only
+#    ties between equal scores are broken at random.
+#  - Bitmaps are stored zlib+base64 packed in JSON/tile_bitmaps/<rom>.json,
+#    keyed by the ROM fingerprint, so a different game/revision (or a patched
+#    ROM with a different checksum) never reuses stale layouts.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+import random
+import re
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .log import get_logger
+
+CACHE_DIR = Path(__file__).resolve().parent / "JSON" / "tile_bitmaps"
+
+FARM_RADIUS = int(os.getenv("PROFOAK_FARM_RADIUS", "2"))                  # neighbourhood: (2r+1)² tiles
+FARM_DIST_WEIGHT = float(os.getenv("PROFOAK_FARM_DIST_WEIGHT", "0.1"))   # score lost per tile from arrival
+
+GRASS, WATER, ROCK = "GRASS", "WATER", "ROCK"
+CLASSES = (GRASS, WATER, ROCK)
+METHOD_CLASS = {
+    "GRASS": GRASS, "LAND": GRASS,
+    "SURF": WATER, "WATER": WATER, "ROD": WATER, "FISHING": WATER,
+    "ROCK_SMASH": ROCK, "ROCKSMASH": ROCK, "ROCK": ROCK,
+}
+
+MapId = Tuple[int, int]
+# scan result: (width, height, class -> bitmask)
+ScanResult = Tuple[int, int, Dict[str, int]]
+
+_LOG = get_logger("nav", "[Navigator] ")
+_SAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def method_class(method: str) -> Optional[str]:
+    return METHOD_CLASS.get(str(method).strip().replace("-", "_").replace(" ", "_").upper())
+
+
+def rom_fingerprint() -> str:
+    """ROM id plus whatever checksum the bot exposes (header checksum / hash)."""
+    from .nav_graph import rom_key
+    fp = rom_key()
+    try:
+        from modules.context import context  # type: ignore
+        rom = getattr(context, "rom", None)
+        for attr in ("sha1_hash", "sha1", "checksum", "header_checksum", "crc32"):
+            v = getattr(rom, attr, None)
+            if v is not None and not callable(v):
+                fp += f"-{v:x}" if isinstance(v, int) else f"-{v}"
+                break
+    except Exception:
+        pass
+    return _SAFE.sub("_", fp)
+
+
+def _pack(mask: int, nbits: int) -> str:
+    return base64.b64encode(zlib.compress(mask.to_bytes((nbits + 7) // 8, "little"), 9)).decode("ascii")
+
+
+def _unpack(s: str) -> int:
+    return int.from_bytes(zlib.decompress(base64.b64decode(s)), "little")
+
+
+class MapTiles:
+    __slots__ = ("w", "h", "masks", "_cands", "_density")
+
+    def __init__(self, w: int, h: int, masks: Dict[str, int]) -> None:
+        self.w, self.h = w, h
+        self.masks = masks
+        self._cands: Dict[str, Tuple[int, ...]] = {}
+        self._density: Dict[Tuple[str, int], Tuple[int, ...]] = {}
+
+    def candidates(self, cls: str) -> Tuple[int, ...]:
+        """Bit indices (y*w+x) of every candidate tile of *cls*, computed once."""
+        c = self._cands.get(cls)
+        if c is None:
+            m, out = self.masks.get(cls, 0), []
+            while m:
+                low = m & -m
+                out.append(low.bit_length() - 1)
+                m ^= low
+            c = self._cands[cls] = tuple(out)
+        return c
+
+    def xy(self, i: int) -> Tuple[int, int]:
+        return i % self.w, i // self.w
+
+    def _summed_area(self, cls: str) -> List[int]:
+        """(w+1)×(h+1) table: entry (x, y) counts set bits in the rectangle [0, x) × [0, y)."""
+        w, h, m = self.w, self.h, self.masks.get(cls, 0)
+        sat = [0] * ((w + 1) * (h + 1))
+        row_mask = (1 << w) - 1
+        for y in range(h):
+            bits = (m >> (y * w)) & row_mask
+            above, cur = y * (w + 1), (y + 1) * (w + 1)
+            run = 0
+            for x in range(w):
+                run += (bits >> x) & 1
+                sat[cur + x + 1] = sat[above + x + 1] + run
+        return sat
+
+    def density(self, cls: str, radius: int) -> Tuple[int, ...]:
+        """Viable *cls* tiles within *radius* of each candidate (aligned with candidates())."""
+        key = (cls, radius)
+        d = self._density.get(key)
+        if d is None:
+            w, h, stride = self.w, self.h, self.w + 1
+            sat = self._summed_area(cls)
+            out = []
+            for i in self.candidates(cls):
+                x, y = i % w, i // w
+                x0, x1 = max(0, x - radius), min(w, x + radius + 1)
+                y0, y1 = max(0, y - radius), min(h, y + radius + 1)
+                out.append(sat[y1 * stride + x1] - sat[y0 * stride + x1] - sat[y1 * stride + x0] + sat[y0 * stride + x0])
+            d = self._density[key] = tuple(out)
+        return d
+
+    def best(self, cls: str, origin: Optional[Tuple[int, int]] = None, radius: int = FARM_RADIUS,
+             dist_weight: float = FARM_DIST_WEIGHT, rng: random.Random = random) -> Optional[Tuple[Tuple[int, int], int]]:
+        """
+        Highest-scoring candidate ((x, y), neighbour count): density minus
+        *dist_weight* per tile (Manhattan) from *origin*. Ties are broken at
+        random so repeated visits don't always pick the same tile.
+        """
+        cands = self.candidates(cls)
+        if not cands:
+            return None
+        dens = self.density(cls, radius)
+        w = self.w
+        best_score, best = None, []
+        for i, d in zip(cands, dens):
+            score = float(d)
+            if origin is not None:
+                score -= dist_weight * (abs(i % w - origin[0]) + abs(i // w - origin[1]))
+            if best_score is None or score > best_score + 1e-9:
+                best_score, best = score, [(i, d)]
+            elif abs(score - best_score) <= 1e-9:
+                best.append((i, d))
+        i, d = rng.choice(best)
+        return self.xy(i), d
+
+
+class TileBitmapCache:
+    def __init__(self, cache_dir: Path = CACHE_DIR) -> None:
+        self.cache_dir = cache_dir
+        self._fp: Optional[str] = None
+        self._maps: Dict[MapId, MapTiles] = {}
+
+    def _path(self) -> Path:
+        return self.cache_dir / f"{self._fp}.json"
+
+    def _ensure_loaded(self) -> None:
+        fp = rom_fingerprint()
+        if fp == self._fp:
+            return
+        self._fp, self._maps = fp, {}
+        try:
+            raw = json.loads(self._path().read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            _LOG.warning("could not read tile cache %s (%s); rescanning maps", self._path().name, e)
+            return
+        for key, d in (raw.get("maps") or {}).items():
+            try:
+                g, n = (int(p) for p in key.split(":", 1))
+                self._maps[(g, n)] = MapTiles(int(d["w"]), int(d["h"]),
+                                              {c: _unpack(d[c]) for c in CLASSES if d.get(c)})
+            except Exception:
+                continue
+
+    def to_json(self) -> Dict[str, object]:
+        maps = {}
+        for (g, n), t in self._maps.items():
+            d: Dict[str, object] = {"w": t.w, "h": t.h}
+            for c, m in t.masks.items():
+                if m: d[c] = _pack(m, t.w * t.h)
+            maps[f"{g}:{n}"] = d
+        return {"version": 1, "fingerprint": self._fp, "maps": maps}
+
+    def save(self) -> None:
+        from .persistence import atomic_write_json
+        try:
+            atomic_write_json(self._path(), self.to_json())
+        except Exception as e:
+            _LOG.warning("could not write tile cache: %s", e)
+
+    def get(self, map_id: MapId, scan: Callable[[], Optional[ScanResult]]) -> Optional[MapTiles]:
+        """Bitmaps for *map_id*, scanning (once per ROM) on a miss. None if the scan failed."""
+        self._ensure_loaded()
+        tiles = self._maps.get(map_id)
+        if tiles is None:
+            res = scan()
+            if res is None:
+                return None  # unreadable now; try again next time rather than caching "nothing"
+            w, h, masks = res
+            tiles = self._maps[map_id] = MapTiles(w, h, masks)
+            from .scheduler import LOW, get_scheduler
+            get_scheduler().submit("tile_bitmaps_save", self.save, LOW)
+        return tiles
+
+    def pick(self, map_id: MapId, method: str, scan: Callable[[], Optional[ScanResult]],
+             origin: Optional[Tuple[int, int]] = None,
+             rng: random.Random = random) -> Optional[Tuple[Optional[Tuple[int, int]], int, MapTiles]]:
+        """
+        (best farm tile (x, y) or None, its neighbour count, tiles) for *method*
+        on *map_id*, scored against the arrival tile *origin* when known; None
+        when the method has no tile class or the map can't be read.
+        """
+        cls = method_class(method)
+        if cls is None:
+            return None
+        tiles = self.get(map_id, scan)
+        if tiles is None:
+            return None
+        best = tiles.best(cls, origin, rng=rng)
+        if best is None:
+            return None, 0, tiles
+        return best[0], best[1], tiles
+
+
+_CACHE: Optional[TileBitmapCache] = None
+
+
+def get_tile_bitmaps() -> TileBitmapCache:
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = TileBitmapCache()
+    return _CACHE
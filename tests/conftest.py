@@ -0,0 +1,110 @@
+# tests/conftest.py
+# -----------------------------------------------------------------------------
+# Test harness for the ProfOak plugin outside the bot.
+#
+#  - Puts the repository root on sys.path so `plugins.ProfOak` imports.
+#  - When the bot's `modules` package isn't importable, installs minimal
+#    stand-ins for the handful of names the plugin imports at module level.
+#    Inside a bot checkout the real modules are used.
+#  - `rom` controls what `modules.map` reports for the current map, and
+#    `plugin` builds a ShinyQuotaPlugin whose files live in tmp_path.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import sys
+import types
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def _install_fake_modules() -> None:
+    try:
+        import modules.plugin_interface  # noqa: F401
+        return
+    except Exception:
+        pass
+    pkg = types.ModuleType("modules"); pkg.__path__ = []  # type: ignore[attr-defined]
+    fakes = {
+        "plugin_interface": {"BotPlugin": type("BotPlugin", (), {})},
+        "context": {"context": SimpleNamespace()},
+        "runtime": {"get_base_path": lambda: ROOT},
+        "pokemon": {"Pokemon": type("Pokemon", (), {}), "Species": type("Species", (), {})},
+        "battle_state": {"BattleOutcome": type("BattleOutcome", (), {})},
+        "map": {"get_effective_encounter_rates_for_current_map": lambda: None},
+    }
+    sys.modules["modules"] = pkg
+    for name, attrs in fakes.items():
+        mod = types.ModuleType(f"modules.{name}")
+        mod.__dict__.update(attrs)
+        sys.modules[f"modules.{name}"] = mod
+        setattr(pkg, name, mod)
+
+
+_install_fake_modules()
+
+
+def make_tables(**methods: Dict[str, float]):
+    """`regular_encounters` as modules.map reports it, from {"land_encounters": {"ZIGZAGOON": 50, ...}, ...}."""
+    return SimpleNamespace(**{
+        attr: [SimpleNamespace(species=SimpleNamespace(name=sp), encounter_rate=rate, min_level=2, max_level=4)
+               for sp, rate in slots.items()]
+        for attr, slots in methods.items()
+    })
+
+
+class RomStub:
+    """What modules.map reports for the current map; None = ROM not readable."""
+
+    def __init__(self, monkeypatch) -> None:
+        self._monkeypatch = monkeypatch
+        self.tables = None
+
+    def set(self, tables, map_id: Tuple[int, int] = (0, 16)) -> None:
+        from modules.context import context
+        from plugins.ProfOak.encounter_tables import clear_snapshot_cache
+        self.tables = tables
+        clear_snapshot_cache()   # the tables changed under the cached snapshots
+        self._monkeypatch.setattr(context, "player_avatar", SimpleNamespace(map_group_and_number=map_id), raising=False)
+
+    def effective(self) -> Optional[SimpleNamespace]:
+        return None if self.tables is None else SimpleNamespace(regular_encounters=self.tables)
+
+
+@pytest.fixture
+def rom(monkeypatch) -> RomStub:
+    import modules.map as mapmod
+    from plugins.ProfOak.encounter_tables import clear_snapshot_cache
+    stub = RomStub(monkeypatch)
+    monkeypatch.setattr(mapmod, "get_effective_encounter_rates_for_current_map", stub.effective)
+    clear_snapshot_cache()
+    return stub
+
+
+@pytest.fixture
+def plugin(tmp_path, monkeypatch, rom):
+    from plugins.ProfOak import shiny_quota as sq
+    for attr, name in (("REGISTRY_PATH", "shiny_registry.json"), ("LEARNED_PATH", "learned_by_mapmode.json"),
+                       ("OWNED_SNAPSHOT", "owned_shinies.json"), ("UNOWN_LETTERS_PATH", "unown_letters_seen.json"),
+                       ("WILD_DATA_PATH", "wild_by_mapmode.json"), ("JOURNAL_PATH", "state_journal.jsonl"),
+                       ("SQLITE_PATH", "profoak_state.sqlite3")):
+        monkeypatch.setattr(sq, attr, tmp_path / name)
+    monkeypatch.setattr(sq, "_WILD", sq.StaticWildTable(sq.WILD_DATA_PATH, stat_interval=0))
+    yield sq.ShinyQuotaPlugin()
+    sq._STORE.flush()
+
+
+def require(p, map_key: str, method: str = "GRASS"):
+    """Point the plugin at (map, method) and return its required species."""
+    p.current_map_key = map_key
+    p.current_method = method
+    p._refresh_rom_input()
+    p._ensure_requirements()
+    return set(p.required_species_route)
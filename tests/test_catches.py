@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import make_tables, require
+
+from plugins.ProfOak import shiny_quota as sq
+
+
+@pytest.fixture
+def route(plugin, rom, monkeypatch):
+    rom.set(make_tables(land_encounters={"ZIGZAGOON": 100}))
+    require(plugin, "ROUTE_101")
+    decisions = []
+    monkeypatch.setattr(plugin, "_maybe_quota_action", lambda: decisions.append(plugin._status_tuple()))
+    plugin.decisions = decisions
+    return plugin
+
+
+def _shiny(name=None, pv=1):
+    return SimpleNamespace(is_shiny=True, species_name=name, personality_value=pv)
+
+
+def test_readable_catch_decides_immediately(route):
+    route.on_pokemon_caught(_shiny("ZIGZAGOON"))
+    assert route.decisions == [(1, 1)]
+
+
+def test_unreadable_catch_decides_after_deferred_scan(route, monkeypatch):
+    monkeypatch.setattr(route, "_scan_owned_steps", lambda write_out: iter(()))
+    monkeypatch.setattr(sq._SCHED, "_tick_at", float("inf"))   # frame loop running: tasks wait for ticks
+    route.on_pokemon_caught(_shiny(None))
+    assert route.decisions == []
+    monkeypatch.setattr(sq._SCHED, "_tick_at", None)
+    sq._SCHED.run_all()
+    assert len(route.decisions) == 1
+
+
+def test_unreadable_catch_decides_once_when_scan_runs_inline(route, monkeypatch):
+    monkeypatch.setattr(route, "_scan_owned_steps", lambda write_out: iter(()))
+    route.on_pokemon_caught(_shiny(None))
+    assert len(route.decisions) == 1
+
+
+def test_same_catch_reported_twice_counts_once(route):
+    route.on_pokemon_caught(_shiny("ZIGZAGOON", pv=7))
+    route.on_pokemon_caught(_shiny("ZIGZAGOON", pv=7))
+    assert route.owned_counts_global["ZIGZAGOON"] == 1
@@ -0,0 +1,52 @@
+import json
+import os
+
+from conftest import make_tables
+
+from plugins.ProfOak.encounter_tables import StaticWildTable, build_snapshot, snapshot_for_current_map
+
+
+def test_snapshot_groups_slots_by_method():
+    snap = build_snapshot(make_tables(land_encounters={"ZIGZAGOON": 20, "WURMPLE": 10}, surf_encounters={"MARILL": 60}))
+    assert snap.species_for("GRASS") == {"ZIGZAGOON", "WURMPLE"}
+    assert snap.rates_for("SURF") == {"MARILL": 60.0}
+    assert snap.summary()["ROCK_SMASH"] == []
+
+
+def test_snapshot_is_read_once_per_map(rom, monkeypatch):
+    rom.set(make_tables(land_encounters={"ZIGZAGOON": 100}))
+    reads = []
+    real = rom.effective
+    monkeypatch.setattr("modules.map.get_effective_encounter_rates_for_current_map", lambda: (reads.append(1), real())[1])
+    first = snapshot_for_current_map((0, 16))
+    assert snapshot_for_current_map((0, 16)) is first
+    assert snapshot_for_current_map(None) is not first   # no map id: read, but never cached
+    assert len(reads) == 2
+
+
+def test_static_table_reloads_on_mtime_and_indexes_species(tmp_path):
+    path = tmp_path / "wild.json"
+    path.write_text(json.dumps({"ROUTE101": {"GRASS": ["ZIGZAGOON", "WURMPLE"]}, "ROUTE102": {"GRASS": ["WURMPLE"]}}))
+    table = StaticWildTable(path, stat_interval=0)
+    assert table.species_for("ROUTE101", "GRASS") == {"ZIGZAGOON", "WURMPLE"}
+    assert table.locations_of("WURMPLE") == (("ROUTE101", "GRASS"), ("ROUTE102", "GRASS"))
+    generation = table.generation
+
+    assert not table.refresh()   # unchanged file: no reload
+    path.write_text(json.dumps({"ROUTE101": {"SURF": ["MARILL"]}}))
+    os.utime(path, (1, 1))
+    assert table.refresh()
+    assert table.generation == generation + 1
+    assert table.locations_of("WURMPLE") == ()
+    assert table.locations_of("MARILL") == (("ROUTE101", "SURF"),)
+
+
+def test_rod_rates_come_from_one_rod_table():
+    snap = build_snapshot(make_tables(old_rod_encounters={"MAGIKARP": 70, "TENTACOOL": 30},
+                                      good_rod_encounters={"MAGIKARP": 60, "WAILMER": 40},
+                                      super_rod_encounters={"WAILMER": 100}))
+    assert snap.species_for("ROD") == {"MAGIKARP", "TENTACOOL", "WAILMER"}
+    assert snap.rates_for("ROD", "OLD_ROD") == {"MAGIKARP": 70.0, "TENTACOOL": 30.0}
+    assert snap.rates_for("ROD", "GOOD_ROD") == {"MAGIKARP": 60.0, "WAILMER": 40.0}
+    assert snap.rates_for("ROD") == {"WAILMER": 100.0}   # rod unknown: the best table the map has
+    assert "OLD_ROD" not in snap.summary()
@@ -0,0 +1,54 @@
+import math
+
+import pytest
+
+from conftest import make_tables, require
+
+from plugins.ProfOak.estimator import SHINY_ODDS, estimate, expected_encounters
+
+
+def test_expected_encounters_single_and_pair():
+    q = 1 / 8192
+    assert expected_encounters([q]) == pytest.approx(8192)
+    assert expected_encounters([q, q]) == pytest.approx(8192 * 1.5)
+    assert math.isinf(expected_encounters([q, 0.0]))
+
+
+def test_estimate_ignores_owned_share_of_the_table():
+    est = estimate({"ZIGZAGOON": 50, "WURMPLE": 50}, ["WURMPLE"])
+    assert est.encounters == pytest.approx(2 / SHINY_ODDS)
+
+
+@pytest.fixture
+def ruins(plugin, rom):
+    plugin.set_livingdex_enabled(True)
+    rom.set(make_tables(land_encounters={"UNOWN": 100}))
+    plugin.current_map_key = "RUINS"
+    plugin._record_unown_letter("A")
+    plugin._record_unown_letter("B")
+    require(plugin, "RUINS")
+    return plugin
+
+
+def test_unown_split_counts_the_base_rate_once(ruins):
+    # two letters, each half the Unown slots: 1/qa + 1/qb - 1/(qa+qb)
+    assert ruins.required_species_route == {"UNOWN-A", "UNOWN-B"}
+    assert ruins.estimate_quota().encounters == pytest.approx(24576)
+
+
+def test_unown_split_keeps_owned_letters_in_the_total(ruins):
+    ruins._bump_owned("UNOWN-A")
+    assert ruins.estimate_quota().encounters == pytest.approx(16384)
+
+
+def test_cheapest_quotas_orders_by_expected_encounters(plugin, rom):
+    plugin.learned["ROUTE_101"] = {"GRASS": ["ZIGZAGOON", "WURMPLE"]}
+    plugin.learned["ROUTE_102"] = {"GRASS": ["ZIGZAGOON"]}
+    plugin._rebuild_progress()
+    rom.set(make_tables(land_encounters={"ZIGZAGOON": 50, "WURMPLE": 50}))
+    require(plugin, "ROUTE_101")
+    rom.set(make_tables(land_encounters={"ZIGZAGOON": 100}), map_id=(0, 17))
+    require(plugin, "ROUTE_102")
+    keys = [key for key, _est in plugin.cheapest_quotas()]
+    assert keys == [("ROUTE_102", "GRASS"), ("ROUTE_101", "GRASS")]
+    assert "ROUTE_102/GRASS" in plugin._cheapest_text()
@@ -0,0 +1,49 @@
+import sqlite3
+
+import pytest
+
+from plugins.ProfOak import history_import as hi
+from plugins.ProfOak import shiny_quota as sq
+
+
+@pytest.mark.parametrize("pv, letter", [(0, "A"), (0x00000001, "B"), (0x00010203, "?"), (0x03030303, "D")])
+def test_unown_letter_from_pv(pv, letter):
+    assert hi.unown_letter_from_pv(pv) == letter
+
+
+def test_method_from_type():
+    assert hi.method_from_type(None) == "GRASS"
+    assert hi.method_from_type("SURFING") == "SURF"
+    assert hi.method_from_type("FISHING") == "ROD"
+    assert hi.method_from_type("ROCK_SMASH") == "ROCK_SMASH"
+    assert hi.method_from_type("GIFT") is None
+
+
+def test_import_resumes_after_the_last_row(plugin, tmp_path, monkeypatch):
+    monkeypatch.setattr(hi, "MARKER_PATH", tmp_path / "history_import.json")
+    db = tmp_path / "stats.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE encounters (encounter_id INTEGER PRIMARY KEY, species_name TEXT, map TEXT, type TEXT, personality_value INTEGER)")
+    conn.executemany("INSERT INTO encounters VALUES (?, ?, ?, ?, ?)", [
+        (1, "Zigzagoon", "ROUTE_101", "LAND", 7),
+        (2, "Unown", "RUINS", "LAND", 0x00000001),
+        (3, "Tentacool", "ROUTE_103", "GIFT", 9),   # not a wild encounter
+    ])
+    conn.commit()
+
+    assert hi.import_history(plugin, tmp_path) == 2
+    assert plugin.learned["ROUTE_101"]["GRASS"] == ["ZIGZAGOON"]
+    assert plugin.unown_letters_seen["RUINS"] == {"B"}
+    assert "ROUTE_103" not in plugin.learned
+    marker = tmp_path / "history_import.json"
+    sq._STORE.flush()
+    assert marker.exists() and "ZIGZAGOON" in sq.LEARNED_PATH.read_text()
+
+    conn.execute("INSERT INTO encounters VALUES (4, 'Marill', 'ROUTE_102', 'SURFING', 3)")
+    conn.commit()
+    conn.close()
+    reads = []
+    real = hi.iter_sqlite_encounters
+    monkeypatch.setattr(hi, "iter_sqlite_encounters", lambda path, after_id, **kw: (reads.append(after_id), real(path, after_id, **kw))[1])
+    assert hi.import_history(plugin, tmp_path) == 1
+    assert reads == [3]
@@ -0,0 +1,19 @@
+def test_ingest_counts_only_new_entries(plugin):
+    plugin.learned["ROUTE_101"] = {"GRASS": ["ZIGZAGOON"]}
+    added = plugin.ingest_encounters([
+        ("route_101", "grass", "zigzagoon"),
+        ("ROUTE_101", "GRASS", "WURMPLE"),
+        {"map": "ROUTE_101", "method": "GRASS", "species": "WURMPLE"},
+        ("ROUTE_102", "SURF", "MARILL"),
+        ("ROUTE_102",),          # malformed: skipped
+        None,
+    ])
+    assert added == 2
+    assert plugin.learned["ROUTE_101"]["GRASS"] == ["WURMPLE", "ZIGZAGOON"]
+    assert plugin.learned["ROUTE_102"]["SURF"] == ["MARILL"]
+
+
+def test_ingest_records_unown_letters(plugin):
+    plugin.ingest_encounters([("RUINS", "GRASS", "UNOWN", "b"), {"map": "RUINS", "method": "GRASS", "species": "UNOWN", "letter": "C"}])
+    assert plugin.unown_letters_seen["RUINS"] == {"B", "C"}
+    assert plugin.ingest_encounters([("RUINS", "GRASS", "UNOWN", "B")]) == 0
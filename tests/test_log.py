@@ -0,0 +1,41 @@
+import pytest
+
+from plugins.ProfOak import log
+from plugins.ProfOak.log import INFO, WARNING, CategoryLogger, lazy
+
+
+@pytest.fixture
+def lines(monkeypatch):
+    out = []
+    monkeypatch.setattr(log, "_SINK", (out.append, lambda m: out.append(f"W:{m}")))
+    return out
+
+
+def test_messages_below_the_level_are_never_formatted(lines):
+    lg = CategoryLogger("test", "[T] ")
+    lg.level = WARNING
+    calls = []
+    lg.info("missing %s", lazy(lambda: calls.append(1) or "X"))
+    lg.warning("quota %d/%d", 1, 2)
+    assert calls == [] and lines == ["W:[T] quota 1/2"]
+
+
+def test_throttled_repeats_are_counted(lines, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(log.time, "monotonic", lambda: clock[0])
+    lg = CategoryLogger("test")
+    for _ in range(3):
+        lg.throttled(INFO, "missing", ("A",), "Missing A", interval=30)
+    lg.throttled(INFO, "missing", ("B",), "Missing B", interval=30)   # new signature: through at once
+    clock[0] += 31
+    lg.throttled(INFO, "missing", ("B",), "Missing B", interval=30)
+    assert lines == ["Missing A", "Missing B", "Missing B"]
+    lg.throttled(INFO, "missing", ("B",), "Missing B", interval=30)
+    clock[0] += 31
+    lg.throttled(INFO, "missing", ("B",), "Missing B", interval=30)
+    assert lines[-1] == "Missing B (repeated 1×)"
+
+
+def test_category_levels_parse():
+    assert log._parse_category_levels("rom=DEBUG, nav=warning,bad") == {"rom": log.DEBUG, "nav": WARNING}
+    assert log._parse_level("OFF") == log.OFF and log._parse_level("nonsense", INFO) == INFO
@@ -0,0 +1,47 @@
+import json
+
+from plugins.ProfOak.nav_graph import NavGates, WarpGraph
+
+
+def _gates(tmp_path):
+    path = tmp_path / "gates.json"
+    path.write_text(json.dumps({
+        "flags": {"POKEDEX": 2145},
+        "edges": [{"from": "0:16", "to": "0:17", "requires": ["FLAG:POKEDEX"], "note": "Birch's lab first"}],
+        "maps": [{"map": "0:30", "requires": ["SURF"]}],
+    }))
+    return NavGates(path)
+
+
+def _graph(tmp_path):
+    g = WarpGraph(tmp_path / "warp_graph.json")
+    g.record((0, 16), [], [((0, 17), "north"), ((0, 30), "east")])
+    g.record((0, 17), [], [((0, 30), "south")])
+    return g
+
+
+def test_flags_and_tokens_close_edges(tmp_path):
+    gates, graph = _gates(tmp_path), _graph(tmp_path)
+    no_dex = {2145: False}.get
+    assert gates.blocked_edges(graph, set(), no_dex) == {((0, 16), (0, 17)), ((0, 16), (0, 30)), ((0, 17), (0, 30))}
+    assert gates.blocked_edges(graph, {"SURF"}, {2145: True}.get) == frozenset()
+    assert gates.map_unmet((0, 30), {"BADGE5"}, no_dex) == ["SURF"]
+
+
+def test_unreadable_flags_count_as_met(tmp_path):
+    gates = _gates(tmp_path)
+    assert gates.unmet(gates.requirements((0, 16), (0, 17)), set(), lambda _fid: None) == []
+    assert gates.unmet(["!FLAG:2145"], set(), lambda _fid: True) == ["!FLAG:2145"]
+
+
+def test_target_behind_a_closed_gate_is_skipped_without_a_known_path(tmp_path, monkeypatch):
+    from plugins.ProfOak import navigator as nav
+    gates, graph = _gates(tmp_path), _graph(tmp_path)
+    no_dex = {2145: False}.get
+    monkeypatch.setattr(nav, "read_event_flag", no_dex)
+    blocked = gates.blocked_edges(graph, {"SURF"}, no_dex)
+    elsewhere = (24, 11)   # no recorded route from here to Route 102
+    assert nav._target_blocked({}, (0, 17), elsewhere, graph, gates, {"SURF"}, blocked) == ["FLAG:POKEDEX"]
+    assert nav._target_blocked({}, (0, 17), None, graph, gates, {"SURF"}, blocked) == ["FLAG:POKEDEX"]
+    graph.record((0, 20), [], [((0, 17), "west")])   # a second, ungated way in
+    assert nav._target_blocked({}, (0, 17), elsewhere, graph, gates, {"SURF"}, blocked) == []
@@ -0,0 +1,31 @@
+from plugins.ProfOak.nav_graph import CONNECTION, WARP, WarpGraph
+
+
+def _graph(tmp_path):
+    g = WarpGraph(tmp_path / "warp_graph.json")
+    g.record((0, 16), [((0, 10), (5, 1))], [((0, 17), "north")], standing=(5, 2))
+    g.record((0, 10), [((0, 16), (5, 19))], [((0, 17), "west")])
+    g.record((0, 17), [((1, 0), (3, 3)), ((127, 127), (9, 9))], [])
+    return g
+
+
+def test_shortest_path_prefers_known_edges_and_honours_avoid(tmp_path):
+    g = _graph(tmp_path)
+    assert g.shortest_path((0, 16), (1, 0)) == [(0, 16), (0, 17), (1, 0)]
+    assert g.shortest_path((0, 16), (1, 0), frozenset({((0, 16), (0, 17))})) == [(0, 16), (0, 10), (0, 17), (1, 0)]
+    assert g.shortest_path((1, 0), (0, 16)) is None
+    assert g.edge_kind((0, 16), (0, 10)) == WARP and g.edge_kind((0, 16), (0, 17)) == CONNECTION
+
+
+def test_dynamic_warps_are_not_recorded(tmp_path):
+    assert (127, 127) not in dict(_graph(tmp_path).edges_from((0, 17)))
+
+
+def test_graph_round_trips_through_json(tmp_path):
+    g = _graph(tmp_path)
+    g.save()
+    again = WarpGraph(tmp_path / "warp_graph.json")
+    assert again.entry_xy((0, 16)) == (5, 2)   # loads lazily on first query
+    assert again.to_json() == g.to_json()
+    assert again.warp_tiles((0, 10), (0, 16)) == [(5, 19)]
+    assert not again.record((0, 16), [((0, 10), (5, 1))], [])   # nothing new
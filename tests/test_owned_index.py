@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+from plugins.ProfOak.owned_index import OwnedShiny, OwnedShinyIndex, shiny_from_mon
+
+
+def _mon(pv, species="ZIGZAGOON", shiny=True, letter=None):
+    return SimpleNamespace(is_shiny=shiny, species_name=species, personality_value=pv, unown_letter=letter,
+                           data=pv.to_bytes(4, "little") + species.encode() + bytes([shiny]))
+
+
+def _storage(*boxes):
+    return SimpleNamespace(boxes=[SimpleNamespace(slots=[SimpleNamespace(slot_index=i, pokemon=m) for i, m in enumerate(box)])
+                                  for box in boxes])
+
+
+def test_mon_moved_from_party_to_box_counts_once():
+    idx = OwnedShinyIndex()
+    idx.scan_party([_mon(1)])
+    assert idx.scan_storage(_storage([_mon(1)], []))   # seen in both places mid-move
+    assert idx.counts == {"ZIGZAGOON": 1}
+    idx.scan_party([])
+    assert idx.counts == {"ZIGZAGOON": 1} and len(idx) == 1
+    idx.scan_storage(_storage([], []))
+    assert idx.counts == {}
+
+
+def test_unchanged_boxes_are_not_rescanned():
+    idx = OwnedShinyIndex()
+    idx.scan_storage(_storage([_mon(1)], [_mon(2, shiny=False)]))
+    assert idx.boxes_rescanned == 2
+    assert not idx.scan_storage(_storage([_mon(1)], [_mon(2, shiny=False)]))
+    assert idx.boxes_rescanned == 0
+    assert idx.scan_storage(_storage([_mon(1)], [_mon(2, shiny=False), _mon(3, "MARILL")]))
+    assert idx.boxes_rescanned == 1 and idx.counts == {"ZIGZAGOON": 1, "MARILL": 1}
+
+
+def test_catch_is_handed_over_to_the_scan_that_finds_it():
+    idx = OwnedShinyIndex()
+    assert idx.add_caught(OwnedShiny(5, "UNOWN", "B")) == ["UNOWN", "UNOWN-B"]
+    assert idx.add_caught(OwnedShiny(5, "UNOWN", "B")) == []   # reported twice
+    idx.scan_party([_mon(5, "UNOWN", letter="B")])
+    assert not idx.settle_caught()
+    assert idx.counts == {"UNOWN": 1, "UNOWN-B": 1}
+    idx.scan_party([])
+    assert idx.counts == {}                                   # the scan's reference was the only one left
+
+
+def test_settle_drops_catches_no_scan_holds():
+    idx = OwnedShinyIndex()
+    idx.add_caught(OwnedShiny(7, "MARILL"))
+    idx.scan_storage(_storage([]))
+    assert idx.counts == {"MARILL": 1}   # not settled until a complete scan
+    assert idx.settle_caught()
+    assert idx.counts == {} and len(idx) == 0
+
+
+def test_shinies_without_a_personality_value_are_skipped():
+    twin = SimpleNamespace(is_shiny=True, species_name="ZIGZAGOON", personality_value=None, data=b"same")
+    assert shiny_from_mon(twin) is None
+    idx = OwnedShinyIndex()
+    idx.scan_storage(_storage([twin, twin, _mon(1)]))
+    assert idx.counts == {"ZIGZAGOON": 1} and len(idx) == 1
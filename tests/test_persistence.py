@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from plugins.ProfOak.persistence import EventJournal, WriteBehindStore
+
+
+@pytest.fixture
+def store():
+    s = WriteBehindStore(interval=3600)
+    yield s
+    s.close()
+
+
+def test_checkpoint_writes_documents_then_empties_the_journal(tmp_path, store):
+    doc, journal = tmp_path / "doc.json", tmp_path / "journal.jsonl"
+    j = EventJournal(journal, store)
+    j.append("learn", m="ROUTE_101", s="ZIGZAGOON")
+    store.flush()
+    j.compact({doc: {"v": 1}})
+    j.compact({doc: {"v": 2}})
+    j.append("learn", m="ROUTE_101", s="WURMPLE")
+    store.flush()
+    assert json.loads(doc.read_text()) == {"v": 2}
+    assert [ev["s"] for ev in j.replay()] == ["WURMPLE"]
+    assert not store.pending()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["doc.json", "journal.jsonl"]   # no temp files left
+
+
+def test_journal_waits_for_a_failed_checkpoint(tmp_path):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    journal = tmp_path / "journal.jsonl"
+    errors = []
+    store = WriteBehindStore(interval=3600, on_error=errors.append)
+    j = EventJournal(journal, store)
+    j.append("learn", s="ZIGZAGOON")
+    store.flush()
+    j.compact({blocker / "doc.json": {"v": 1}})
+    j.append("learn", s="WURMPLE")
+    store.flush()
+    assert errors and store.pending()
+    assert [ev["s"] for ev in j.replay()] == ["ZIGZAGOON"]   # neither truncated nor appended yet
+    blocker.unlink()
+    store.close()
+    assert json.loads((blocker / "doc.json").read_text()) == {"v": 1}
+    assert [ev["s"] for ev in j.replay()] == ["WURMPLE"]
+
+
+def test_deferred_calls_wait_for_failed_writes(tmp_path):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    ran = []
+    store = WriteBehindStore(interval=3600, on_error=lambda m: None)
+    store.append_line(blocker / "journal.jsonl", "{}\n")
+    store.call(lambda: ran.append("marker"))
+    store.flush()
+    assert ran == [] and store.pending()   # never ahead of the data it follows
+    blocker.unlink()
+    store.close()
+    assert ran == ["marker"]
+
+
+def test_torn_last_line_is_skipped(tmp_path, store):
+    journal = tmp_path / "journal.jsonl"
+    j = EventJournal(journal, store)
+    j.append("learn", s="ZIGZAGOON")
+    store.flush()
+    with open(journal, "a", encoding="utf-8") as fh:
+        fh.write('{"e":"learn","s":"WUR')
+    assert [ev["s"] for ev in j.replay()] == ["ZIGZAGOON"]
+
+
+def test_plugin_replays_its_journal_on_startup(plugin, tmp_path):
+    from plugins.ProfOak import shiny_quota as sq
+    plugin.current_map_key, plugin.current_method = "ROUTE_101", "GRASS"
+    plugin._commit_learn("ZIGZAGOON")
+    plugin._state.checkpoint(plugin._persisted_state())
+    plugin._commit_learn("WURMPLE")
+    sq._STORE.flush()
+    assert json.loads((tmp_path / "learned_by_mapmode.json").read_text()) == {"ROUTE_101": {"GRASS": ["ZIGZAGOON"]}}
+    assert sq.ShinyQuotaPlugin().learned == {"ROUTE_101": {"GRASS": ["WURMPLE", "ZIGZAGOON"]}}
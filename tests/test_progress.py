@@ -0,0 +1,25 @@
+from plugins.ProfOak.progress import QuotaProgressIndex
+
+
+def test_catch_only_moves_quotas_that_require_it():
+    idx = QuotaProgressIndex()
+    idx.rebuild({("R101", "GRASS"): 0b011, ("R102", "GRASS"): 0b110, ("R103", "SURF"): 0b1000}, owned_mask=0)
+    idx.add_owned(1)
+    assert idx.remaining(("R101", "GRASS")) == 1
+    assert idx.remaining(("R102", "GRASS")) == 1
+    assert idx.remaining(("R103", "SURF")) == 1
+    idx.add_owned(0)
+    assert idx.closest(5) == [(("R102", "GRASS"), 1, 2), (("R103", "SURF"), 1, 1)]
+    assert idx.summary() == (1, 3, 2)
+
+
+def test_requirement_change_rebuckets_one_quota():
+    idx = QuotaProgressIndex()
+    idx.rebuild({("R101", "GRASS"): 0b01}, owned_mask=0b01)
+    assert idx.remaining(("R101", "GRASS")) == 0
+    idx.set_requirement(("R101", "GRASS"), 0b11)
+    assert idx.remaining(("R101", "GRASS")) == 1
+    idx.set_owned(0)
+    assert idx.remaining(("R101", "GRASS")) == 2
+    idx.set_requirement(("R101", "GRASS"), 0)
+    assert len(idx) == 0
@@ -0,0 +1,62 @@
+from conftest import make_tables, require
+
+from plugins.ProfOak.species_index import UNOWN_MASK_AZ
+
+
+def test_rom_overrides_learned_fallback_once_readable(plugin, rom):
+    plugin.learned["ROUTE_101"] = {"GRASS": ["PIKACHU", "ZIGZAGOON"]}
+
+    rom.set(None)
+    assert require(plugin, "ROUTE_101") == {"PIKACHU", "ZIGZAGOON"}   # LEARNED fallback
+
+    rom.set(make_tables(land_encounters={"ZIGZAGOON": 100}))
+    assert require(plugin, "ROUTE_101") == {"ZIGZAGOON"}              # ROM is authoritative
+
+    require(plugin, "ROUTE_102")
+    assert require(plugin, "ROUTE_101") == {"ZIGZAGOON"}              # memo hit stays ROM-sourced
+
+
+def test_rom_result_is_memoized(plugin, rom, monkeypatch):
+    rom.set(make_tables(land_encounters={"ZIGZAGOON": 50, "WURMPLE": 50}))
+    require(plugin, "ROUTE_101")
+    require(plugin, "ROUTE_102")
+    rebuilds = []
+    real = plugin._rebuild_route_requirements
+    monkeypatch.setattr(plugin, "_rebuild_route_requirements", lambda: (rebuilds.append(1), real())[1])
+    assert require(plugin, "ROUTE_101") == {"ZIGZAGOON", "WURMPLE"}
+    assert rebuilds == []
+
+
+def test_fallback_result_is_not_memoized(plugin, rom):
+    plugin.learned["ROUTE_101"] = {"GRASS": ["PIKACHU"]}
+    rom.set(None)
+    require(plugin, "ROUTE_101")
+    assert plugin._req_memo == {}
+
+
+def test_rom_merge_seeds_learned_on_memo_hit(plugin, rom):
+    rom.set(make_tables(land_encounters={"ZIGZAGOON": 100}))
+    require(plugin, "ROUTE_101")
+    plugin.learned["ROUTE_101"]["GRASS"] = []
+    require(plugin, "ROUTE_102")
+    require(plugin, "ROUTE_101")
+    assert plugin.learned["ROUTE_101"]["GRASS"] == ["ZIGZAGOON"]
+
+
+def test_memo_respects_rom_input(plugin, rom):
+    rom.set(make_tables(land_encounters={"ZIGZAGOON": 100}))
+    assert require(plugin, "ROUTE_101") == {"ZIGZAGOON"}
+    rom.set(make_tables(land_encounters={"WURMPLE": 100}))   # e.g. re-read after a ROM/profile switch
+    assert require(plugin, "ROUTE_101") == {"WURMPLE"}
+
+
+def test_rom_prune_refreshes_unown_letters(plugin, rom):
+    # "UNOWN-B" learned under ROD scopes the living-dex Unown expansion to B;
+    # the ROM has no ROD table, so the prune drops it and all letters apply again.
+    plugin.set_livingdex_enabled(True)
+    plugin.learned["RUINS"] = {"GRASS": ["UNOWN"], "ROD": ["UNOWN-B"]}
+    rom.set(make_tables(land_encounters={"UNOWN": 100}))
+    required = require(plugin, "RUINS")
+    assert plugin.learned["RUINS"]["ROD"] == []
+    assert len(required) == 26 and "UNOWN-A" in required
+    assert plugin._d_letters.get() == UNOWN_MASK_AZ   # memo key follows the pruned lists
@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from plugins.ProfOak.navigator import RouteOrder
+
+
+def _order():
+    return RouteOrder([
+        {"name": "Littleroot Town", "group": 0, "number": 9},
+        {"name": "Route 101", "map_key": "0:16", "alt": ["R101"]},
+        {"name": "Route 101 (again)", "id": "0-16"},
+        {"name": "Oldale Town", "alt": "Oldale"},
+        {"name": "Petalburg Woods", "group": 24, "number": 11},
+    ])
+
+
+def test_index_by_id_name_and_alt():
+    order = _order()
+    assert order.ids == [(0, 9), (0, 16), (0, 16), None, (24, 11)]
+    assert order.index_of((0, 16)) == 1        # first entry wins
+    assert order.index_of("route-101") == 1
+    assert order.index_of("r101") == 1
+    assert order.index_of("OLDALE") == 3
+    assert order.index_of("Nowhere") is None
+
+
+def test_falls_back_to_the_map_on_the_context():
+    assert _order().index_of(None, SimpleNamespace(map_group=24, map_number=11)) == 4
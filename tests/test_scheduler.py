@@ -0,0 +1,55 @@
+import time
+
+from plugins.ProfOak.scheduler import HIGH, LOW, Scheduler
+
+
+def _steps(log, name, n):
+    def task():
+        for i in range(n):
+            log.append((name, i))
+            yield
+    return task
+
+
+def test_runs_inline_without_frames():
+    log = []
+    sched = Scheduler()
+    assert sched.submit("scan", _steps(log, "scan", 3))
+    assert log == [("scan", 0), ("scan", 1), ("scan", 2)]
+    assert len(sched) == 0
+
+
+def test_ticks_run_by_priority_and_dedupe_keys():
+    log = []
+    sched = Scheduler(budget_ms=0)     # one slice per frame
+    sched._tick_at = time.monotonic()  # the frame loop is running
+    sched.submit("import", _steps(log, "import", 1), LOW)
+    sched.submit("scan", _steps(log, "scan", 2), HIGH)
+    assert not sched.submit("scan", _steps(log, "dup", 1), HIGH)
+    assert log == []
+    for _ in range(5):
+        sched.tick()
+    assert log == [("scan", 0), ("scan", 1), ("import", 0)]
+    assert not sched.pending("scan")
+
+
+def test_failing_task_is_dropped():
+    log = []
+    sched = Scheduler()
+
+    def broken():
+        yield
+        raise RuntimeError("boom")
+    sched.submit("broken", broken)
+    sched.submit("next", lambda: log.append("ran"))
+    assert log == ["ran"] and len(sched) == 0
+
+
+def test_on_frame_task_waits_for_the_first_frame():
+    log = []
+    sched = Scheduler()
+    assert sched.submit("import", _steps(log, "import", 2), LOW, on_frame=True)
+    sched.submit("scan", _steps(log, "scan", 1), HIGH)   # runs inline; the import still waits
+    assert log == [("scan", 0)] and sched.pending("import")
+    sched.tick()
+    assert log == [("scan", 0), ("import", 0), ("import", 1)] and len(sched) == 0
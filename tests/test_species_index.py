@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+from plugins.ProfOak.species_index import (UNOWN_MASK_AZ, SpeciesTable, unown_bit_from_name, unown_letters_for_mask,
+                                           unown_mask, unown_names_for_mask)
+
+
+def test_family_roots():
+    t = SpeciesTable({"MARILL": 183, "AZUMARILL": 184, "AZURILL": 298}, {"MARILL": "AZURILL", "AZUMARILL": "MARILL"})
+    assert t.family_of("AZUMARILL") == t.family_of("MARILL") == 298
+    assert t.family_of("UNOWN-B") != t.family_of("MARILL")
+    assert t.family_of("UNOWN-B") == t.family_of("UNOWN-?")
+
+
+def test_unknown_names_get_fresh_slots():
+    t = SpeciesTable({"MARILL": 183}, {})
+    i = t.index_of("MISSINGNO")
+    assert i > 183 and i != t.index_of("UNOWN-A")
+    assert t.index_of("missingno") == i
+    assert t.family_of("MISSINGNO") == i
+
+
+def test_masks_round_trip_names():
+    t = SpeciesTable({"MARILL": 183, "AZUMARILL": 184, "AZURILL": 298}, {"MARILL": "AZURILL", "AZUMARILL": "MARILL"})
+    assert t.names_in(t.mask_of(["AZUMARILL", "marill"])) == ["MARILL", "AZUMARILL"]
+    assert t.mask_of([]) == 0
+
+
+def test_unown_masks_round_trip():
+    m = unown_mask(["a", "C", " z ", "not-a-letter"])
+    assert unown_letters_for_mask(m) == ("A", "C", "Z")
+    assert unown_names_for_mask(m) == ("UNOWN-A", "UNOWN-C", "UNOWN-Z")
+    assert unown_bit_from_name("UNOWN-C") == unown_mask(["C"])
+    assert unown_bit_from_name("UNOWN") == 0
+    assert len(unown_letters_for_mask(UNOWN_MASK_AZ)) == 26
+
+
+def test_table_uses_national_dex_numbers_only(monkeypatch):
+    import modules.pokemon
+    from modules.context import context
+    from plugins.ProfOak.species_index import build_species_table
+
+    species = {
+        251: SimpleNamespace(name="Celebi", index=251, national_dex_number=251),
+        252: SimpleNamespace(name="Placeholder", index=252, national_dex_number=None),   # Gen III filler slot
+        277: SimpleNamespace(name="Treecko", index=277, national_dex_number=252),
+    }
+
+    def get_species_by_index(i):
+        if i > 300: raise IndexError(i)
+        return species.get(i)
+    monkeypatch.setattr(modules.pokemon, "get_species_by_index", get_species_by_index, raising=False)
+    monkeypatch.setattr(context, "species_index_by_name", {"MUDKIP": 283}, raising=False)
+    t = build_species_table()
+    assert t.index_of("TREECKO") == 252
+    assert t.index_of("PLACEHOLDER") not in (251, 252)
+    assert t.index_of("MUDKIP") != 283   # internal ids are never dex numbers
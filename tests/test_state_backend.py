@@ -0,0 +1,162 @@
+import sqlite3
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from plugins.ProfOak import shiny_quota as sq
+from plugins.ProfOak.persistence import WriteBehindStore
+from plugins.ProfOak.state_backend import JsonStateBackend, PersistedState, SqliteStateBackend
+
+
+@pytest.fixture
+def store():
+    s = WriteBehindStore(interval=3600)
+    yield s
+    s.close()
+
+
+def _json_backend(tmp_path, store):
+    return JsonStateBackend(registry_path=tmp_path / "registry.json", learned_path=tmp_path / "learned.json",
+                            owned_path=tmp_path / "owned.json", unown_path=tmp_path / "unown.json",
+                            journal_path=tmp_path / "journal.jsonl", store=store)
+
+
+def _record_some(b):
+    b.record_learn("ROUTE_101", "GRASS", "ZIGZAGOON")
+    b.record_learn("ROUTE_101", "GRASS", "WURMPLE")
+    b.record_method("ROUTE_101", "SURF", ["MARILL"])
+    b.record_unown("RUINS", "A")
+    b.record_catch("UNOWN", "A")
+    b.record_catch("ZIGZAGOON")
+
+
+EXPECTED_LEARNED = {"ROUTE_101": {"GRASS": ["WURMPLE", "ZIGZAGOON"], "SURF": ["MARILL"]}}
+EXPECTED_OWNED = {"UNOWN": 1, "UNOWN-A": 1, "ZIGZAGOON": 1}
+
+
+def test_journal_replays_to_the_recorded_state(tmp_path, store):
+    _record_some(_json_backend(tmp_path, store))
+    store.flush()
+    fresh = _json_backend(tmp_path, store)
+    st = fresh.load()
+    assert st.learned == EXPECTED_LEARNED
+    assert st.unown_letters == {"RUINS": {"A"}}
+    assert st.owned_counts == EXPECTED_OWNED
+    assert fresh.wants_checkpoint()   # a non-empty journal is folded back in right away
+
+
+def test_checkpoint_then_journal_round_trip(tmp_path, store):
+    b = _json_backend(tmp_path, store)
+    _record_some(b)
+    store.flush()
+    b.checkpoint(_json_backend(tmp_path, store).load())
+    b.record_learn("ROUTE_102", "GRASS", "LINOONE")
+    store.flush()
+    assert (tmp_path / "journal.jsonl").read_text().count("\n") == 1
+    st = _json_backend(tmp_path, store).load()
+    assert st.learned == {**EXPECTED_LEARNED, "ROUTE_102": {"GRASS": ["LINOONE"]}}
+    assert st.owned_counts == EXPECTED_OWNED   # catches replayed once, not on top of the checkpoint
+
+
+def test_torn_last_journal_line_is_skipped(tmp_path, store):
+    _record_some(_json_backend(tmp_path, store))
+    store.flush()
+    with open(tmp_path / "journal.jsonl", "a", encoding="utf-8") as fh:
+        fh.write('{"e":"learn","m":"ROUTE_1')
+    assert _json_backend(tmp_path, store).load().learned == EXPECTED_LEARNED
+
+
+def test_sqlite_round_trip(tmp_path):
+    db = tmp_path / "state.sqlite3"
+    b = SqliteStateBackend(db)
+    _record_some(b)
+    b.close()
+    st = SqliteStateBackend(db).load()
+    assert st.learned == EXPECTED_LEARNED
+    assert st.unown_letters == {"RUINS": {"A"}}
+    assert st.owned_counts == EXPECTED_OWNED
+
+
+def test_sqlite_profiles_are_separate_and_seeded_once(tmp_path):
+    db = tmp_path / "state.sqlite3"
+    seeds = []
+
+    def seed():
+        seeds.append(1)
+        return PersistedState(learned={"ROUTE_103": {"GRASS": ["WURMPLE"]}})
+
+    SqliteStateBackend(db, profile="a", seed_from=seed).close()
+    b = SqliteStateBackend(db, profile="a", seed_from=seed)
+    assert seeds == [1]
+    b.record_learn("ROUTE_101", "GRASS", "ZIGZAGOON")
+    b.replace_owned({"MARILL": 2})
+    assert b.load().learned == {"ROUTE_103": {"GRASS": ["WURMPLE"]}, "ROUTE_101": {"GRASS": ["ZIGZAGOON"]}}
+    assert b.load().owned_counts == {"MARILL": 2}
+    assert SqliteStateBackend(db, profile="b").load().learned == {}
+
+
+def test_sqlite_use_profile_switches_partition(tmp_path):
+    b = SqliteStateBackend(tmp_path / "state.sqlite3", seed_from=lambda: PersistedState(owned_counts={"MARILL": 1}))
+    b.replace_owned({"ZIGZAGOON": 3})
+    assert not b.use_profile("default") and not b.use_profile(None)
+    assert b.use_profile("ruby")
+    assert b.load().owned_counts == {"MARILL": 1}   # a new partition is seeded once
+    b.replace_owned({})
+    assert b.use_profile("default")
+    assert b.load().owned_counts == {"ZIGZAGOON": 3}
+
+
+def test_bots_on_different_profiles_keep_their_own_owned_rows(plugin, monkeypatch):
+    from modules.context import context
+    monkeypatch.setattr(sq, "STATE_BACKEND", "SQLITE")
+    bots = []
+    for name in ("ruby", "emerald"):
+        monkeypatch.setattr(context, "profile", SimpleNamespace(path=Path("profiles") / name), raising=False)
+        bot = sq.ShinyQuotaPlugin()
+        bot._use_profile_partition()
+        bots.append(bot)
+    ruby, emerald = bots
+    assert (ruby._state.profile, emerald._state.profile) == ("ruby", "emerald")
+    ruby._state.replace_owned({"MARILL": 2})
+    emerald._state.replace_owned({"ZIGZAGOON": 1})   # a full PC scan on the other bot
+    assert ruby._state.load().owned_counts == {"MARILL": 2}
+    for bot in bots:
+        bot._state.close()
+
+
+def test_sqlite_reads_do_not_wait_for_another_writer(tmp_path):
+    db = tmp_path / "state.sqlite3"
+    b = SqliteStateBackend(db)
+    b.record_learn("ROUTE_101", "GRASS", "ZIGZAGOON")
+    other = sqlite3.connect(str(db), isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    other.execute("INSERT INTO learned VALUES ('default', 'ROUTE_101', 'GRASS', 'WURMPLE')")
+    try:
+        t = time.monotonic()
+        assert b.learned_for_map("ROUTE_101") == {"GRASS": ["ZIGZAGOON"]}
+        assert b.load().learned == {"ROUTE_101": {"GRASS": ["ZIGZAGOON"]}}
+        assert time.monotonic() - t < 1.0
+    finally:
+        other.execute("COMMIT")
+        other.close()
+    assert b.learned_for_map("ROUTE_101") == {"GRASS": ["WURMPLE", "ZIGZAGOON"]}
+
+
+def test_sqlite_writes_wait_for_the_store_thread(tmp_path, store):
+    db = tmp_path / "state.sqlite3"
+    b = SqliteStateBackend(db, store=store)
+    b.record_learn("ROUTE_101", "GRASS", "ZIGZAGOON")
+    b.record_catch("ZIGZAGOON")
+    other = sqlite3.connect(str(db))
+    try:
+        assert other.execute("SELECT COUNT(*) FROM learned").fetchone() == (0,)
+        assert b.learned_for_map("ROUTE_101") is None
+        store.flush()
+        assert other.execute("SELECT species FROM learned").fetchall() == [("ZIGZAGOON",)]
+        assert other.execute("SELECT species, count FROM owned_shinies").fetchall() == [("ZIGZAGOON", 1)]
+    finally:
+        other.close()
+    assert b.learned_for_map("ROUTE_101") == {"GRASS": ["ZIGZAGOON"]}
+    b.close()
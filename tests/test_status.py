@@ -0,0 +1,39 @@
+from plugins.ProfOak.status import StatusPublisher
+
+
+def test_pushes_directly_without_frames_and_skips_repeats():
+    pushed = []
+    pub = StatusPublisher(pushed.append)
+    pub.publish("1/3")
+    pub.publish("1/3")
+    pub.publish("2/3")
+    assert pushed == ["1/3", "2/3"]
+
+
+def test_burst_within_a_window_coalesces_to_the_newest_text():
+    pushed = []
+    pub = StatusPublisher(pushed.append, window_frames=30)
+    pub.on_frame(100)
+    pub.publish("A")
+    pub.publish("B")
+    assert pushed == []            # frames are ticking: wait for the listener
+    pub.on_frame(101)
+    assert pushed == ["B"]
+    pub.publish("C")
+    pub.publish("D")
+    pub.on_frame(110)              # still inside the window
+    assert pushed == ["B"]
+    pub.on_frame(131)
+    assert pushed == ["B", "D"]
+    assert pub.pushes == 2
+
+
+def test_burst_that_ends_where_it_started_pushes_nothing():
+    pushed = []
+    pub = StatusPublisher(pushed.append)
+    pub.publish("A")
+    pub.on_frame(1)
+    pub.publish("B")
+    pub.publish("A")
+    pub.on_frame(100)
+    assert pushed == ["A"]
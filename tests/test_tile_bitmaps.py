@@ -0,0 +1,44 @@
+import random
+
+from plugins.ProfOak.tile_bitmaps import GRASS, MapTiles, _pack, _unpack, method_class
+
+
+def _tiles(w=20, h=12, cells=()):
+    m = 0
+    for x, y in cells:
+        m |= 1 << (y * w + x)
+    return MapTiles(w, h, {GRASS: m})
+
+
+def test_pack_round_trip():
+    m = random.Random(1).getrandbits(60 * 60)
+    assert _unpack(_pack(m, 60 * 60)) == m
+
+
+def test_method_classes():
+    assert method_class("Old Rod") is None
+    assert method_class("rod") == method_class("surf") == "WATER"
+    assert method_class("rock-smash") == "ROCK"
+
+
+def test_candidates_are_row_major_tiles():
+    t = _tiles(cells=[(3, 1), (0, 0), (19, 11)])
+    assert [t.xy(i) for i in t.candidates(GRASS)] == [(0, 0), (3, 1), (19, 11)]
+    assert t.candidates("WATER") == ()
+
+
+def test_density_matches_brute_force():
+    rng = random.Random(2)
+    cells = {(rng.randrange(20), rng.randrange(12)) for _ in range(80)}
+    t = _tiles(cells=cells)
+    for i, d in zip(t.candidates(GRASS), t.density(GRASS, 2)):
+        x, y = t.xy(i)
+        assert d == sum(1 for cx, cy in cells if abs(cx - x) <= 2 and abs(cy - y) <= 2)
+
+
+def test_best_prefers_patch_interior_over_lone_tiles():
+    patch = [(x, y) for x in range(10, 15) for y in range(3, 8)]
+    t = _tiles(cells=patch + [(0, 0), (19, 11)])
+    assert t.best(GRASS) == ((12, 5), 25)
+    assert t.best(GRASS, origin=(0, 0), dist_weight=0.1)[0] == (12, 5)   # density outweighs a short walk
+    assert t.best(GRASS, origin=(0, 0), dist_weight=10.0)[0] == (0, 0)